@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# Copyright (C) 2019 Huawei
+# GNU General Public License v3.0+ (see COPYING or
+# https://www.gnu.org/licenses/gpl-3.0.txt)
+
+"""
+Measure the wire size and the time of listing scaling configurations from
+a stub server which gzips its responses, with the default compression
+negotiation and with it turned off by 'Accept-Encoding: identity'.
+
+    python benchmarks/bench_compression.py --items 200 --bandwidth 2000000
+"""
+
+import argparse
+import json
+import sys
+import time
+
+from fixtures import scaling_configurations_page
+from hcs_env import FakeModule, load_module_utils
+from stub_server import StubServer
+
+
+class ListServer(StubServer):
+    compress = True
+
+    def __init__(self, page):
+        StubServer.__init__(self)
+        self.page = json.dumps(page).encode()
+
+    def route(self, method, path, body):
+        if method == "GET" and "/scaling_configuration?" in path:
+            return 200, self.page
+
+        return StubServer.route(self, method, path, body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--bandwidth", type=int, default=2000000,
+                        help="simulated link speed in bytes per second")
+    args = parser.parse_args()
+
+    hcs_utils = load_module_utils()
+    server = ListServer(scaling_configurations_page(args.items))
+    server.bandwidth = args.bandwidth
+    server.start()
+    try:
+        url = "scaling_configuration?limit=%d&start_number=0" % args.items
+        cases = [("gzip", None), ("identity", {"Accept-Encoding": "identity"})]
+        for name, header in cases:
+            config = hcs_utils.Config(FakeModule(server.auth_url), "as")
+            client = config.client("region-1", "autoscaling", "project")
+
+            start = time.time()
+            for i in range(args.pages):
+                n = sum(1 for i in client.list_items(
+                    url, "scaling_configurations", header=header))
+            elapsed = time.time() - start
+
+            s = config.stats.summary()
+            print("%-9s pages: %d x %d items  wire: %9.1f KiB  "
+                  "decoded: %9.1f KiB  %8.1f ms" % (
+                      name, args.pages, n, s["wire_bytes"] / 1024.0,
+                      s["decoded_bytes"] / 1024.0, elapsed * 1000))
+
+    finally:
+        server.stop()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+# Copyright (C) 2019 Huawei
+# GNU General Public License v3.0+ (see COPYING or
+# https://www.gnu.org/licenses/gpl-3.0.txt)
+
+"""
+Microbenchmarks of the helpers which run once per item of every listing:
+navigate_value, build_path, are_different_dicts and the
+build_create_parameters / fill_read_resp_body functions of hcs_as_utils.
+
+It is a pyperf script, so the results can be stored and compared across
+commits:
+
+    pip install pyperf
+    python benchmarks/bench_helpers.py -o before.json
+    (check out the change)
+    python benchmarks/bench_helpers.py -o after.json
+    python -m pyperf compare_to before.json after.json --table
+
+``--fast`` gives a quick, noisier run; ``--bench NAME`` runs only the
+benchmarks whose name contains NAME.
+"""
+
+import copy
+import os
+
+import pyperf
+
+import hcs_env
+from fixtures import (scaling_configuration, scaling_configuration_params,
+                      scaling_group, scaling_group_params, scaling_policy)
+
+# (name, kwargs of scaling_configuration)
+SIZES = [
+    ("realistic", dict(user_data_size=2048, metadata_keys=8, disks=2)),
+    ("extreme", dict(user_data_size=65536, metadata_keys=512, disks=24)),
+]
+
+
+class _Module(object):
+    def __init__(self, params):
+        self.params = params
+
+
+def load_library():
+    hcs_env.load_module_utils()
+
+    from ansible.module_utils import hcs_as_utils, hwc_utils
+    return hwc_utils, hcs_as_utils
+
+
+def add_benchmarks(runner, only=None):
+    hwc_utils, as_utils = load_library()
+
+    def bench(name, func, *args):
+        if only and only not in name:
+            return
+        runner.bench_func(name, func, *args)
+
+    # navigate_value
+    body = scaling_configuration(0)
+    bench("navigate_value/shallow", hwc_utils.navigate_value, body,
+          ["scaling_configuration_name"])
+    bench("navigate_value/deep", hwc_utils.navigate_value, body,
+          ["instance_config", "public_ip", "eip", "bandwidth", "size"])
+    bench("navigate_value/array_index", hwc_utils.navigate_value, body,
+          ["instance_config", "disk", "size"], {"instance_config.disk": 1})
+
+    # build_path
+    module = _Module({"project": "region-1_project", "id": "configuration",
+                      "region": "region-1"})
+    bench("build_path/1_var", hwc_utils.build_path, module,
+          "scaling_configuration/{id}")
+    bench("build_path/3_vars", hwc_utils.build_path, module,
+          "{region}/{project}/scaling_configuration/{id}")
+    bench("build_path/kv", hwc_utils.build_path, module,
+          "scaling_policy/{group_id}/list", {"group_id": "group"})
+
+    for size, kwargs in SIZES:
+        body = scaling_configuration(0, **kwargs)
+        params = scaling_configuration_params(0, **kwargs)
+        identity = as_utils.build_configuration_identity_object(params)
+        resource = as_utils.fill_configuration_resp_body(body)
+        # the read body keeps public_ip in the shape of the API, skip it so
+        # that the dicts are equal
+        identity["public_ip"] = None
+
+        # equal dicts are the worst case, every value is compared
+        bench("are_different_dicts/configuration_%s" % size,
+              hwc_utils.are_different_dicts, identity, resource)
+
+        changed = copy.deepcopy(resource)
+        changed["disks"][-1]["size"] += 1
+        bench("are_different_dicts/configuration_%s_last_disk" % size,
+              hwc_utils.are_different_dicts, identity, changed)
+
+        bench("build_create_parameters/configuration_%s" % size,
+              as_utils.build_configuration_create_parameters, params)
+        bench("fill_read_resp_body/configuration_%s" % size,
+              as_utils.fill_configuration_resp_body, body)
+
+    for size, networks in [("realistic", 1), ("extreme", 64)]:
+        body = scaling_group(0, networks)
+        params = scaling_group_params(0, networks)
+        identity = as_utils.build_group_identity_object(params)
+
+        bench("are_different_dicts/group_%s" % size,
+              hwc_utils.are_different_dicts, identity,
+              as_utils.fill_group_resp_body(body))
+        bench("build_create_parameters/group_%s" % size,
+              as_utils.build_group_create_parameters, params)
+        bench("fill_read_resp_body/group_%s" % size,
+              as_utils.fill_group_resp_body, body)
+
+    body = scaling_policy(0, "group")
+    bench("fill_read_resp_body/policy", as_utils.fill_policy_resp_body, body)
+
+
+def _worker_args(cmd, args):
+    # the workers must register the same benchmarks as the manager
+    if args.bench:
+        cmd.extend(("--bench", args.bench))
+
+
+def main():
+    runner = pyperf.Runner(add_cmdline_args=_worker_args)
+    runner.argparser.add_argument(
+        "--bench", help="only run the benchmarks whose name contains this")
+    runner.metadata["description"] = "hcs module_utils helpers"
+    args = runner.parse_args()
+
+    add_benchmarks(runner, args.bench)
+
+
+if __name__ == "__main__":
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    main()
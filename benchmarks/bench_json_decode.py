@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# Copyright (C) 2019 Huawei
+# GNU General Public License v3.0+ (see COPYING or
+# https://www.gnu.org/licenses/gpl-3.0.txt)
+
+"""
+Compare the ways of decoding a large scaling_configurations list page.
+
+``requests`` is the former ``r.json()`` path, the others decode
+``r.content`` directly with the parser selected by hcs_utils, or with each
+of the optional parsers which is installed.
+
+    python benchmarks/bench_json_decode.py --items 500 --repeat 20
+"""
+
+import argparse
+import importlib
+import json
+import sys
+import timeit
+
+import requests
+
+from fixtures import scaling_configurations_page
+from hcs_env import load_module_utils
+
+
+def make_response(data):
+    r = requests.Response()
+    r.status_code = 200
+    r.headers["Content-Type"] = "application/json"
+    r._content = data
+    return r
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--items", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    hcs_utils = load_module_utils()
+    data = json.dumps(scaling_configurations_page(args.items)).encode()
+    print("page: %d items, %.1f KiB" % (args.items, len(data) / 1024.0))
+
+    cases = [
+        ("requests r.json()", lambda: make_response(data).json()),
+        ("hcs_utils (%s)" % hcs_utils._json_loads.__module__,
+         lambda: hcs_utils._json_loads(make_response(data).content)),
+        ("json.loads(bytes)", lambda: json.loads(make_response(data).content)),
+    ]
+    for name in ["orjson", "ujson"]:
+        try:
+            loads = importlib.import_module(name).loads
+        except ImportError:
+            continue
+        cases.append(("%s.loads(bytes)" % name,
+                      lambda f=loads: f(make_response(data).content)))
+
+    base = None
+    for name, f in cases:
+        t = min(timeit.repeat(f, number=1, repeat=args.repeat))
+        base = base or t
+        print("%-24s %8.2f ms  x%.2f" % (name, t * 1000, base / t))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
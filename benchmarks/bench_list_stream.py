@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# Copyright (C) 2019 Huawei
+# GNU General Public License v3.0+ (see COPYING or
+# https://www.gnu.org/licenses/gpl-3.0.txt)
+
+"""
+Compare the peak memory of walking a large scaling_configurations page
+loaded as one dict with _ServiceClient.get against streaming it with
+_ServiceClient.list_items.
+
+    python benchmarks/bench_list_stream.py --items 500
+"""
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+
+from fixtures import scaling_configurations_page
+from hcs_env import FakeModule, load_module_utils
+from stub_server import StubServer
+
+
+class ListServer(StubServer):
+    def __init__(self, page):
+        StubServer.__init__(self)
+        # encode the page once, so that the server does not add to the
+        # memory traced in the client
+        self.page = json.dumps(page).encode()
+
+    def route(self, method, path, body):
+        if method == "GET" and "/scaling_configuration?" in path:
+            return 200, self.page
+
+        return StubServer.route(self, method, path, body)
+
+
+def measure(f):
+    tracemalloc.start()
+    start = time.time()
+    n = f()
+    elapsed = time.time() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return n, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--items", type=int, default=500)
+    args = parser.parse_args()
+
+    hcs_utils = load_module_utils()
+    page = scaling_configurations_page(args.items)
+    server = ListServer(page).start()
+    try:
+        config = hcs_utils.Config(FakeModule(server.auth_url), "as")
+        client = config.client("region-1", "autoscaling", "project")
+        url = "scaling_configuration?limit=%d&start_number=0" % args.items
+
+        def whole_page():
+            r = client.get(url)
+            return sum(1 for i in r["scaling_configurations"])
+
+        def stream():
+            return sum(1 for i in client.list_items(
+                url, "scaling_configurations"))
+
+        # warm up the connection and the endpoint cache
+        whole_page()
+
+        size = len(server.page) / 1024.0
+        print("page: %d items, %.1f KiB, ijson: %s" % (
+            args.items, size, hcs_utils.HAS_IJSON))
+        for name, f in [("get", whole_page), ("list_items", stream)]:
+            n, elapsed, peak = measure(f)
+            print("%-12s items: %d  %8.1f ms  peak: %8.1f KiB" % (
+                name, n, elapsed * 1000, peak / 1024.0))
+
+    finally:
+        server.stop()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# Copyright (C) 2019 Huawei
+# GNU General Public License v3.0+ (see COPYING or
+# https://www.gnu.org/licenses/gpl-3.0.txt)
+
+"""
+Record a play of several hcs_as_* tasks into a cassette directory and replay
+it twice, the way the README runs a play again, and exit non-zero when a
+replay sends any request to the mock server or returns other results.
+
+    python check_cassette.py
+
+No ANSIBLE_HCS_CASSETTE_MODE is set, so every task decides on its own
+whether it records or replays.
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+from mock_server import MockServer
+from run_modules import run_module
+from scenarios import _configuration_args, _group_args, _policy_args
+
+# the tasks of the play, each with the args builder of its module
+PLAY = [
+    ("hcs_as_configuration", _configuration_args),
+    ("hcs_as_group", _group_args),
+    ("hcs_as_policy", _policy_args),
+]
+
+
+def run_play(server, python, tasks):
+    """run the tasks in order and return their results"""
+    server.reset_counts()
+    results = []
+    for module, args in tasks:
+        result, _, _ = run_module(python, module, args)
+        results.append(result)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--python", default=sys.executable,
+                        help="interpreter running the hcs_as_* modules")
+    args = parser.parse_args()
+
+    cassettes = tempfile.mkdtemp(prefix="hcs-cassettes-")
+    os.environ["ANSIBLE_HCS_CASSETTE"] = cassettes
+    os.environ.pop("ANSIBLE_HCS_CASSETTE_MODE", None)
+
+    server = MockServer().start()
+    errors = []
+    try:
+        # the args are built once, the seeded ids are a part of the params
+        tasks = [(m, build(server)) for m, build in PLAY]
+
+        recorded = run_play(server, args.python, tasks)
+        for (module, _), r in zip(tasks, recorded):
+            if r.get("failed"):
+                errors.append("record %s: %s" % (module, r.get("msg")))
+        if not server.counts:
+            errors.append("record: no request reached the mock server")
+
+        # every later pass starts over from the first recorded run
+        for n in range(1, 3):
+            replayed = run_play(server, args.python, tasks)
+            if server.counts:
+                errors.append("replay %d: %d requests reached the mock "
+                              "server" % (n, sum(server.counts.values())))
+            for (module, _), r, o in zip(tasks, replayed, recorded):
+                if r != o:
+                    errors.append("replay %d %s: %s, recorded %s" % (
+                        n, module, r, o))
+    finally:
+        server.stop()
+        shutil.rmtree(cassettes, ignore_errors=True)
+
+    for i in errors:
+        print("FAIL %s" % i)
+    if errors:
+        return 1
+
+    print("ok   %d tasks recorded and replayed twice" % len(PLAY))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
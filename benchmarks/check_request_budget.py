@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+# Copyright (C) 2019 Huawei
+# GNU General Public License v3.0+ (see COPYING or
+# https://www.gnu.org/licenses/gpl-3.0.txt)
+
+"""
+Check the HTTP requests every module makes in each scenario against the
+budgets in request_budgets.json, and exit non-zero on any difference.
+
+Extra round trips are the usual performance regression of the modules: one
+more find, one more wait poll, one more page. A budget lists the exact
+number of requests per ``METHOD path``, with the ids in the path replaced by
+``{id}``; ``max_requests`` optionally caps the total instead, for scenarios
+whose request count is not deterministic.
+
+After an intended change of the requests, rewrite the budgets with:
+
+    python check_request_budget.py --write
+
+and review the diff of request_budgets.json.
+"""
+
+import argparse
+import collections
+import json
+import os
+import sys
+
+from mock_server import MockServer, PROJECT_ID
+from run_modules import run_scenario
+from scenarios import OPENSTACK_MODULES, SCENARIOS, needs_openstack
+
+BUDGETS = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                       "request_budgets.json")
+
+# a path segment following one of these is the id or name of a resource
+COLLECTIONS = ("scaling_group", "scaling_configuration", "scaling_policy",
+               "scaling_group_instance", "loadbalancers", "listeners",
+               "pools", "members", "subnets", "networks", "floatingips",
+               "ports")
+
+
+def path_template(key):
+    method, path = key.split(" ", 1)
+    parts = path.replace(PROJECT_ID, "{project_id}").split("/")
+    for i in range(1, len(parts)):
+        if parts[i - 1] in COLLECTIONS and parts[i] != "list":
+            parts[i] = "{id}"
+    return "%s %s" % (method, "/".join(parts))
+
+
+def recorded_requests(counts):
+    r = collections.Counter()
+    for k, v in counts.items():
+        # auth.* are the token scopes, which are counted twice
+        if k.startswith("auth.") or k.startswith("GET /_mock"):
+            continue
+        r[path_template(k)] += v
+    return dict(r)
+
+
+def compare(budget, requests):
+    """return the differences between the budget and the requests"""
+    errors = []
+    total = sum(requests.values())
+    if "max_requests" in budget:
+        if total > budget["max_requests"]:
+            errors.append("%d requests, the budget is %d" % (
+                total, budget["max_requests"]))
+        return errors
+
+    expected = budget.get("requests", {})
+    for k in sorted(set(expected) | set(requests)):
+        n, m = requests.get(k, 0), expected.get(k, 0)
+        if n != m:
+            errors.append("%s: %d requests, the budget is %d" % (k, n, m))
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--python", default=sys.executable,
+                        help="interpreter running the hcs_as_* modules")
+    parser.add_argument("--openstack-python",
+                        help="interpreter running the hcs_lb_* modules")
+    parser.add_argument("--module", action="append",
+                        help="only check these modules")
+    parser.add_argument("--write", action="store_true",
+                        help="record the current requests as the budgets")
+    args = parser.parse_args()
+
+    with open(BUDGETS) as f:
+        budgets = json.load(f)
+
+    server = MockServer().start()
+    failed = False
+    try:
+        for s in SCENARIOS:
+            if args.module and s.module not in args.module:
+                continue
+
+            if needs_openstack(s) and not args.openstack_python:
+                print("SKIP %s %s: no --openstack-python" % (
+                    s.module, s.name))
+                continue
+
+            python = args.python
+            if s.module in OPENSTACK_MODULES:
+                python = args.openstack_python
+
+            name = "%s %s" % (s.module, s.name)
+            r = run_scenario(server, python, s, 1, args.openstack_python)
+            if "error" in r:
+                failed = True
+                print("FAIL %s: %s" % (name, r["error"].strip()))
+                continue
+
+            requests = recorded_requests(r["requests_by_path"])
+            if args.write:
+                budget = budgets.setdefault(name, {})
+                if "max_requests" not in budget:
+                    budget["requests"] = requests
+                print("WROTE %s: %d requests" % (name, r["requests"]))
+                continue
+
+            if name not in budgets:
+                failed = True
+                print("FAIL %s: no budget, record it with --write" % name)
+                continue
+
+            errors = compare(budgets[name], requests)
+            if errors:
+                failed = True
+                print("FAIL %s\n    %s" % (name, "\n    ".join(errors)))
+            else:
+                print("ok   %s: %d requests" % (name, r["requests"]))
+    finally:
+        server.stop()
+
+    if args.write:
+        with open(BUDGETS, "w") as f:
+            json.dump(budgets, f, indent=2, sort_keys=True)
+            f.write("\n")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
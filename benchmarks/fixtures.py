@@ -0,0 +1,149 @@
+# Copyright (C) 2019 Huawei
+# GNU General Public License v3.0+ (see COPYING or
+# https://www.gnu.org/licenses/gpl-3.0.txt)
+
+"""
+Synthetic resources shaped like the responses of the autoscaling API.
+The sizes can be tuned to build realistic or extreme payloads.
+"""
+
+import base64
+import uuid
+
+
+def _id(prefix, i):
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, "%s-%d" % (prefix, i)))
+
+
+def scaling_configuration(i, user_data_size=2048, metadata_keys=8, disks=2):
+    user_data = base64.b64encode(
+        (("#!/bin/bash\necho config-%d\n" % i) * user_data_size)[
+            :user_data_size].encode()).decode()
+
+    return {
+        "scaling_configuration_id": _id("configuration", i),
+        "scaling_configuration_name": "as-config-%05d" % i,
+        "create_time": "2019-06-01T08:00:00Z",
+        "instance_config": {
+            "instance_id": None,
+            "flavorRef": "s3.large.2",
+            "imageRef": _id("image", i % 7),
+            "disk": [{
+                "size": 40 + 10 * j,
+                "volume_type": "SATA",
+                "disk_type": "SYS" if j == 0 else "DATA",
+            } for j in range(disks)],
+            "key_name": "ansible_key",
+            "adminPass": None,
+            "user_data": user_data,
+            "metadata": dict(
+                ("key-%03d" % j, "value-%d-%d" % (i, j))
+                for j in range(metadata_keys)),
+            "public_ip": {
+                "eip": {
+                    "ip_type": "5_bgp",
+                    "bandwidth": {"size": 10, "share_type": "PER",
+                                  "charge_mode": "traffic"},
+                },
+            },
+        },
+    }
+
+
+def scaling_configurations_page(n, **kwargs):
+    return {
+        "total_number": n,
+        "start_number": 0,
+        "limit": n,
+        "scaling_configurations": [
+            scaling_configuration(i, **kwargs) for i in range(n)],
+    }
+
+
+def scaling_group(i, networks=1):
+    return {
+        "scaling_group_id": _id("group", i),
+        "scaling_group_name": "as-group-%05d" % i,
+        "scaling_group_status": "INSERVICE",
+        "scaling_configuration_id": _id("configuration", i),
+        "desire_instance_number": 2,
+        "min_instance_number": 1,
+        "max_instance_number": 5,
+        "cool_down_time": 900,
+        "health_periodic_audit_method": "NOVA_AUDIT",
+        "health_periodic_audit_time": 5,
+        "available_zones": ["az1"],
+        "vpc_id": _id("vpc", 0),
+        "networks": [{"id": _id("network", j)} for j in range(networks)],
+        "security_groups": [{"id": _id("secgroup", 0)}],
+        "instance_terminate_policy": "OLD_CONFIG_OLD_INSTANCE",
+        "delete_publicip": True,
+        "create_time": "2019-06-01T08:00:00Z",
+    }
+
+
+def scaling_policy(i, group_id):
+    return {
+        "scaling_group_id": group_id,
+        "scaling_policy_id": _id("policy", i),
+        "scaling_policy_name": "as-policy-%05d" % i,
+        "scaling_policy_type": "RECURRENCE",
+        "policy_status": "INSERVICE",
+        "cool_down_time": 900,
+        "scheduled_policy": {
+            "launch_time": "00:00",
+            "recurrence_type": "Weekly",
+            "recurrence_value": "1,3,5",
+            "start_time": "2019-06-01T00:00Z",
+            "end_time": "2030-06-30T00:00Z",
+        },
+        "scaling_policy_action": {"operation": "ADD", "instance_number": 1},
+        "create_time": "2019-06-01T08:00:00Z",
+    }
+
+
+def scaling_configuration_params(i, user_data_size=2048, metadata_keys=8,
+                                 disks=2):
+    """the module params describing scaling_configuration(i, ...)"""
+    body = scaling_configuration(i, user_data_size, metadata_keys, disks)
+    config = body["instance_config"]
+
+    return {
+        "id": None,
+        "configuration_name": body["scaling_configuration_name"],
+        "instance_id": None,
+        "flavor_id": config["flavorRef"],
+        "image_id": config["imageRef"],
+        "disks": [dict(d) for d in config["disk"]],
+        "ssh_key_name": config["key_name"],
+        "admin_pass": None,
+        "user_data": config["user_data"],
+        "server_metadata": dict(config["metadata"]),
+        "public_ip": {
+            "type": "5_bgp",
+            "bandwidth": {"charge_mode": "traffic", "share": "PER",
+                          "size": 10},
+        },
+    }
+
+
+def scaling_group_params(i, networks=1):
+    """the module params describing scaling_group(i, ...)"""
+    body = scaling_group(i, networks)
+
+    return {
+        "id": None,
+        "group_name": body["scaling_group_name"],
+        "configuration_id": body["scaling_configuration_id"],
+        "desire_instance_number": body["desire_instance_number"],
+        "min_instance_number": body["min_instance_number"],
+        "max_instance_number": body["max_instance_number"],
+        "cool_down_time": body["cool_down_time"],
+        "health_periodic_audit_time": body["health_periodic_audit_time"],
+        "available_zones": list(body["available_zones"]),
+        "vpc_id": body["vpc_id"],
+        "networks": [n["id"] for n in body["networks"]],
+        "security_group": body["security_groups"][0]["id"],
+        "instance_terminate_policy": body["instance_terminate_policy"],
+        "delete_publicip": body["delete_publicip"],
+    }
@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+# Copyright (C) 2019 Huawei
+# GNU General Public License v3.0+ (see COPYING or
+# https://www.gnu.org/licenses/gpl-3.0.txt)
+
+"""
+Start many hcs_as_group module processes at once against the mock server,
+the way a playbook with many hosts and a high ``forks`` setting does, and
+report the throughput, the latency percentiles of the tasks, the auth calls
+per task and the server side request rate over time.
+
+    python fork_storm.py --tasks 400 --forks 100 --groups 50 --latency 0.02
+
+Every task looks up one of ``--groups`` seeded groups by name, so the name
+filter matches several groups and the search pages, then finds nothing to
+change. With ``--mode create`` every task creates a new group instead.
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+
+from mock_server import MockServer
+from run_modules import run_module
+from scenarios import hcs_auth
+
+
+def group_args(server, name):
+    return dict(hcs_auth(server), group_name=name, vpc_id="vpc-1",
+                networks=["subnet-1"], min_instance_number=0,
+                max_instance_number=2, cool_down_time=300)
+
+
+def seed_groups(server, n):
+    for i in range(n):
+        server.add_group(scaling_group_name="storm-group-%d" % i,
+                         vpc_id="vpc-1", networks=[{"id": "subnet-1"}],
+                         min_instance_number=0, max_instance_number=2,
+                         cool_down_time=300)
+
+
+def percentile(values, p):
+    if not values:
+        return 0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100.0 * len(values))))]
+
+
+def rate_over_time(log, start, bucket):
+    """the number of requests per bucket seconds since start"""
+    counts = {}
+    for t in log:
+        k = int((t - start) // bucket)
+        counts[k] = counts.get(k, 0) + 1
+    if not counts:
+        return []
+    return [counts.get(k, 0) for k in range(max(counts) + 1)]
+
+
+def storm(server, python, tasks, forks, mode, groups):
+    pending = list(range(tasks))
+    lock = threading.Lock()
+    results = []
+
+    def _worker():
+        while True:
+            with lock:
+                if not pending:
+                    return
+                i = pending.pop(0)
+
+            if mode == "create":
+                name = "storm-new-%d" % i
+            else:
+                name = "storm-group-%d" % (i % groups)
+            args = group_args(server, name)
+
+            start = time.time()
+            result, wall, rss = run_module(python, "hcs_as_group", args)
+            with lock:
+                results.append({"start": start, "wall": wall, "rss_kib": rss,
+                                "failed": bool(result.get("failed")),
+                                "msg": result.get("msg")})
+
+    threads = [threading.Thread(target=_worker) for _ in range(forks)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--python", default=sys.executable,
+                        help="interpreter running the module")
+    parser.add_argument("--tasks", type=int, default=200,
+                        help="module runs in total")
+    parser.add_argument("--forks", type=int, default=50,
+                        help="module runs at the same time")
+    parser.add_argument("--groups", type=int, default=50,
+                        help="groups seeded on the server")
+    parser.add_argument("--mode", choices=["noop", "create"], default="noop")
+    parser.add_argument("--latency", type=float, default=0,
+                        help="seconds added to every API response")
+    parser.add_argument("--jitter", type=float, default=0,
+                        help="max random seconds added to the latency")
+    parser.add_argument("--error-rate", type=float, default=0,
+                        help="share of API calls answered with 503")
+    parser.add_argument("--bucket", type=float, default=1,
+                        help="seconds per bucket of the request rate")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    server = MockServer(latency=args.latency, jitter=args.jitter,
+                        error_rate=args.error_rate).start()
+    seed_groups(server, args.groups)
+
+    start = time.time()
+    try:
+        results = storm(server, args.python, args.tasks, args.forks,
+                        args.mode, args.groups)
+        elapsed = time.time() - start
+        with server._lock:
+            counts = dict(server.counts)
+            log = list(server.log)
+    finally:
+        server.stop()
+
+    walls = [r["wall"] for r in results]
+    failed = [r for r in results if r["failed"]]
+    requests = sum(v for k, v in counts.items() if not k.startswith("auth."))
+    auths = counts.get("POST /identity/v3/auth/tokens", 0)
+    rate = rate_over_time(log, start, args.bucket)
+
+    summary = {
+        "tasks": len(results),
+        "forks": args.forks,
+        "failed": len(failed),
+        "elapsed": elapsed,
+        "throughput": len(results) / elapsed,
+        "latency": dict(("p%d" % p, percentile(walls, p))
+                        for p in (50, 90, 95, 99, 100)),
+        "requests": requests,
+        "requests_per_task": requests / float(len(results)),
+        "auths_per_task": auths / float(len(results)),
+        "peak_rss_kib": max(r["rss_kib"] for r in results),
+        "request_rate": rate,
+        "counts": counts,
+    }
+
+    print("tasks: %d (%d failed), forks: %d, elapsed: %.2fs" % (
+        summary["tasks"], summary["failed"], args.forks, elapsed))
+    print("throughput: %.1f tasks/s" % summary["throughput"])
+    print("task latency: %s" % ", ".join(
+        "%s %.0fms" % (p, summary["latency"][p] * 1000)
+        for p in ("p50", "p90", "p95", "p99", "p100")))
+    print("requests per task: %.2f, auths per task: %.2f" % (
+        summary["requests_per_task"], summary["auths_per_task"]))
+    print("peak RSS of a task: %.1f MiB" % (summary["peak_rss_kib"] / 1024.0))
+    print("server requests per %gs: %s" % (
+        args.bucket, " ".join(str(i) for i in rate)))
+    if failed:
+        print("first failure: %s" % (failed[0]["msg"] or "").strip()[-500:])
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2, sort_keys=True)
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+# Copyright (C) 2019 Huawei
+# GNU General Public License v3.0+ (see COPYING or
+# https://www.gnu.org/licenses/gpl-3.0.txt)
+
+"""
+Helpers shared by the benchmark scripts.
+
+The modules import their utils as ``ansible.module_utils.hcs_utils``, so the
+module_utils directory of this repository is appended to the search path of
+``ansible.module_utils`` before anything is imported from it.
+"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULE_UTILS = os.path.join(ROOT, "module_utils")
+LIBRARY = os.path.join(ROOT, "library")
+
+
+def load_module_utils():
+    import ansible.module_utils
+
+    if MODULE_UTILS not in ansible.module_utils.__path__:
+        ansible.module_utils.__path__.append(MODULE_UTILS)
+
+    from ansible.module_utils import hcs_utils
+    return hcs_utils
+
+
+class FakeModule(object):
+    """The minimal part of AnsibleModule which Config relies on."""
+
+    def __init__(self, auth_url, **params):
+        self.params = {
+            "auth": {
+                "auth_url": auth_url,
+                "username": "bench",
+                "password": "bench",
+                "domain_name": "bench",
+                "project_name": "region-1_bench",
+            },
+            "region": "region-1",
+            "id": None,
+            "api_stats": True,
+        }
+        self.params.update(params)
+        self.check_mode = False
+
+    def fail_json(self, **kwargs):
+        raise Exception(kwargs.get("msg"))
+
+
+if sys.version_info < (3, 6):
+    raise SystemExit("the benchmarks require python 3.6 or newer")
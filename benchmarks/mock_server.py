@@ -0,0 +1,842 @@
+#!/usr/bin/env python
+# Copyright (C) 2019 Huawei
+# GNU General Public License v3.0+ (see COPYING or
+# https://www.gnu.org/licenses/gpl-3.0.txt)
+
+"""
+A self-contained stand-in of Huawei Cloud Stack for reproducible benchmarks.
+
+It serves:
+  - keystone v3 password auth, version discovery and a catalog
+  - the autoscaling scaling_group, scaling_configuration, scaling_policy and
+    scaling_group_instance APIs, with start_number/limit pagination, and the
+    batch actions on the policies, configurations and instances
+  - the neutron LBaaS v2 resources used by the hcs_lb_* modules, with the
+    subnets, networks and floating IPs they look up
+
+The latency, error injection and the time of the provisioning state
+transitions are configurable. Run it standalone with:
+
+    python benchmarks/mock_server.py --port 8999 --latency 0.02
+
+``GET /_mock/stats`` returns the request counters and ``POST /_mock/reset``
+clears them.
+"""
+
+import argparse
+import copy
+import random
+import re
+import threading
+import time
+import uuid
+
+from stub_server import PROJECT_ID, StubServer
+
+try:
+    from urllib.parse import parse_qsl
+except ImportError:
+    from urlparse import parse_qsl
+
+
+AS_PREFIX = "/autoscaling-api/v1/%s/" % PROJECT_ID
+NETWORK_PREFIX = "/network/v2.0/"
+# the max number of IDs in a call of the batch actions
+AS_BATCH_MAX = 50
+AS_INSTANCE_BATCH_MAX = 10
+
+# the singular names of the neutron collections
+NEUTRON_RESOURCES = {
+    "lbaas/loadbalancers": "loadbalancer",
+    "lbaas/listeners": "listener",
+    "lbaas/pools": "pool",
+    "members": "member",
+    "subnets": "subnet",
+    "networks": "network",
+    "floatingips": "floatingip",
+    "ports": "port",
+}
+
+
+def _now():
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+
+def _new_id():
+    return str(uuid.uuid4())
+
+
+class _ErrorRule(object):
+    def __init__(self, method, path, code, times):
+        self.method = method
+        self.path = re.compile(path)
+        self.code = code
+        self.times = times
+
+    def match(self, method, path):
+        if self.times == 0:
+            return False
+
+        if self.method not in ("*", method) or not self.path.search(path):
+            return False
+
+        self.times -= 1
+        return True
+
+
+class MockServer(StubServer):
+    """
+    :param latency: seconds added to every API response
+    :param jitter: max random seconds added on top of latency
+    :param error_rate: probability of answering an API call with 503
+    :param transition: seconds a resource stays in a PENDING_* or DELETING
+        status before it becomes ACTIVE or disappears
+
+    ``regions`` maps the names of more regions to other mock servers, whose
+    autoscaling endpoints are added to the catalog of this one, so that one
+    token reaches the resources of all of them.
+    """
+
+    def __init__(self, port=0, latency=0, jitter=0, error_rate=0,
+                 transition=0, seed=None):
+        StubServer.__init__(self, port)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.transition = transition
+        self.error_rules = []
+        self.regions = {}
+        self.log = []
+        self._random = random.Random(seed)
+        self._data_lock = threading.RLock()
+        self.reset_data()
+
+    # ------------------------------------------------------------------
+    # state
+    # ------------------------------------------------------------------
+
+    def reset_data(self):
+        with self._data_lock:
+            self.groups = {}
+            self.configurations = {}
+            self.policies = {}
+            self.instances = {}
+            self.neutron = dict((k, {}) for k in NEUTRON_RESOURCES)
+
+            net = self.add_neutron("networks", name="public",
+                                   **{"router:external": True})
+            self.add_neutron("subnets", name="test_subnet",
+                             network_id=net["id"], cidr="192.168.2.0/24")
+            self.add_neutron("subnets", name="webserver_subnet",
+                             network_id=net["id"], cidr="192.168.3.0/24")
+
+    def reset_counts(self):
+        with self._lock:
+            self.counts.clear()
+            del self.log[:]
+
+    def fail(self, path, code=500, method="*", times=1):
+        """make the next `times` calls matching path fail with code"""
+        self.error_rules.append(_ErrorRule(method, path, code, times))
+
+    def add_group(self, **kwargs):
+        g = {
+            "scaling_group_id": _new_id(),
+            "scaling_group_name": "as-group",
+            "scaling_group_status": "INSERVICE",
+            "scaling_configuration_id": None,
+            "desire_instance_number": 0,
+            "min_instance_number": 0,
+            "max_instance_number": 0,
+            "cool_down_time": 900,
+            "health_periodic_audit_method": "NOVA_AUDIT",
+            "health_periodic_audit_time": 5,
+            "available_zones": ["az1"],
+            "vpc_id": None,
+            "networks": [],
+            "security_groups": [],
+            "instance_terminate_policy": "OLD_CONFIG_OLD_INSTANCE",
+            "delete_publicip": False,
+            "create_time": _now(),
+        }
+        g.update(kwargs)
+        with self._data_lock:
+            self.groups[g["scaling_group_id"]] = g
+        return g
+
+    def add_configuration(self, **kwargs):
+        instance_config = kwargs.pop("instance_config", {})
+        c = {
+            "scaling_configuration_id": _new_id(),
+            "scaling_configuration_name": "as-config",
+            "create_time": _now(),
+            "instance_config": dict({
+                "instance_id": None, "flavorRef": None, "imageRef": None,
+                "disk": [], "key_name": None, "adminPass": None,
+                "user_data": None, "metadata": None, "public_ip": None,
+            }, **instance_config),
+        }
+        c.update(kwargs)
+        with self._data_lock:
+            self.configurations[c["scaling_configuration_id"]] = c
+        return c
+
+    def add_policy(self, **kwargs):
+        p = {
+            "scaling_policy_id": _new_id(),
+            "scaling_policy_name": "as-policy",
+            "scaling_group_id": None,
+            "scaling_policy_type": "RECURRENCE",
+            "policy_status": "INSERVICE",
+            "alarm_id": None,
+            "scheduled_policy": None,
+            "scaling_policy_action": None,
+            "cool_down_time": 900,
+            "create_time": _now(),
+        }
+        p.update(kwargs)
+        with self._data_lock:
+            self.policies[p["scaling_policy_id"]] = p
+        return p
+
+    def add_instance(self, group_id, **kwargs):
+        i = {
+            "instance_id": _new_id(),
+            "instance_name": "as-instance",
+            "scaling_group_id": group_id,
+            "scaling_configuration_id": None,
+            "life_cycle_state": "INSERVICE",
+            "health_status": "NORMAL",
+            "protect_from_scaling_down": False,
+            "create_time": _now(),
+        }
+        i.update(kwargs)
+        with self._data_lock:
+            self.instances[i["instance_id"]] = i
+        return i
+
+    def add_neutron(self, collection, **kwargs):
+        r = {"id": _new_id(), "name": "", "tenant_id": PROJECT_ID,
+             "project_id": PROJECT_ID}
+        r.update(kwargs)
+        with self._data_lock:
+            self.neutron[collection][r["id"]] = r
+        return r
+
+    # ------------------------------------------------------------------
+    # routing
+    # ------------------------------------------------------------------
+
+    def catalog(self):
+        region = "region-1"
+        return [
+            {
+                "type": "identity", "name": "keystone",
+                "endpoints": [{
+                    "interface": "public", "region": region,
+                    "region_id": region,
+                    "url": "%s/identity/v3" % self.url}],
+            },
+            {
+                "type": "autoscaling", "name": "as",
+                "endpoints": [{
+                    "interface": "public", "region": region,
+                    "region_id": region,
+                    "url": "%s/autoscaling-api/v1/%s" % (
+                        self.url, PROJECT_ID)}],
+            },
+            {
+                "type": "network", "name": "neutron",
+                "endpoints": [{
+                    "interface": "public", "region": region,
+                    "region_id": region,
+                    "url": "%s/network" % self.url}],
+            },
+        ] + [
+            {
+                "type": "autoscaling", "name": "as",
+                "endpoints": [{
+                    "interface": "public", "region": name,
+                    "region_id": name,
+                    "url": "%s/autoscaling-api/v1/%s" % (
+                        server.url, PROJECT_ID)}],
+            }
+            for name, server in sorted(self.regions.items())
+        ]
+
+    def route(self, method, path, body):
+        if path.startswith("/_mock/"):
+            return self._route_mock(method, path)
+
+        with self._lock:
+            self.log.append(time.time())
+
+        delay = self.latency
+        if self.jitter:
+            delay += self._random.uniform(0, self.jitter)
+        if delay:
+            time.sleep(delay)
+
+        path, _, query = path.partition("?")
+        query = dict(parse_qsl(query, keep_blank_values=True))
+
+        if path.rstrip("/") == "/identity/v3":
+            return 200, self._identity_version()
+
+        for rule in self.error_rules:
+            if rule.match(method, path):
+                return rule.code, {"error": {"message": "injected error"}}
+
+        if self.error_rate and self._random.random() < self.error_rate:
+            return 503, {"error": {"message": "injected error"}}
+
+        with self._data_lock:
+            if path.startswith(AS_PREFIX):
+                return self._route_as(
+                    method, path[len(AS_PREFIX):], query, body)
+
+            if path.rstrip("/") == "/network":
+                return 200, self._network_versions()
+
+            if path.startswith(NETWORK_PREFIX):
+                return self._route_neutron(
+                    method, path[len(NETWORK_PREFIX):], query, body)
+
+        return StubServer.route(self, method, path, body)
+
+    def _route_mock(self, method, path):
+        if path == "/_mock/stats":
+            with self._lock:
+                return 200, {"counts": dict(self.counts),
+                             "log": list(self.log)}
+
+        if path == "/_mock/reset" and method == "POST":
+            self.reset_counts()
+            return 204, None
+
+        return 404, {"error": {"message": "unknown mock api"}}
+
+    def _identity_version(self):
+        return {"version": {
+            "id": "v3.14", "status": "stable",
+            "links": [{"rel": "self",
+                       "href": "%s/identity/v3/" % self.url}],
+            "media-types": [{
+                "base": "application/json",
+                "type": "application/vnd.openstack.identity-v3+json"}],
+        }}
+
+    def _network_versions(self):
+        return {"versions": [{
+            "id": "v2.0", "status": "CURRENT",
+            "links": [{"rel": "self",
+                       "href": "%s/network/v2.0/" % self.url}],
+        }]}
+
+    # ------------------------------------------------------------------
+    # autoscaling
+    # ------------------------------------------------------------------
+
+    def _route_as(self, method, path, query, body):
+        parts = path.strip("/").split("/")
+        kind = parts[0]
+
+        if method == "POST" and parts == ["scaling_policies", "action"]:
+            return self._policies_action(body or {})
+
+        if method == "POST" and parts == ["scaling_configurations"]:
+            return self._configurations_delete(body or {})
+
+        if method == "POST" and kind == "scaling_policy" and \
+                len(parts) == 3 and parts[2] == "action":
+            return self._policies_action(dict(
+                body or {}, scaling_policy_id=[parts[1]]))
+
+        if kind == "scaling_group_instance":
+            return self._route_instances(method, parts[1:], query, body)
+
+        if kind == "scaling_group":
+            return self._as_crud(
+                method, parts[1:], query, body, self.groups,
+                "scaling_group", "scaling_groups", self._create_group,
+                self._refresh_group,
+                [("scaling_group_name", "scaling_group_name", True),
+                 ("scaling_configuration_id", "scaling_configuration_id",
+                  False),
+                 ("scaling_group_status", "scaling_group_status", False)])
+
+        if kind == "scaling_configuration":
+            return self._as_crud(
+                method, parts[1:], query, body, self.configurations,
+                "scaling_configuration", "scaling_configurations",
+                self._create_configuration, None,
+                [("scaling_configuration_name", "scaling_configuration_name",
+                  True),
+                 ("image_id", "instance_config.imageRef", False)])
+
+        if kind == "scaling_policy":
+            if len(parts) == 3 and parts[2] == "list" and method == "GET":
+                items = [i for i in self.policies.values()
+                         if i["scaling_group_id"] == parts[1]]
+                return 200, self._as_page(
+                    items, query, "scaling_policies",
+                    [("scaling_policy_name", "scaling_policy_name", True),
+                     ("scaling_policy_type", "scaling_policy_type", False)])
+
+            return self._as_crud(
+                method, parts[1:], query, body, self.policies,
+                "scaling_policy", None, self._create_policy, None, [])
+
+        return 404, {"error": {"message": "unknown api %s" % path}}
+
+    def _as_crud(self, method, parts, query, body, store, key, list_key,
+                 create, refresh, filters):
+        if not parts:
+            if method == "GET" and list_key:
+                items = list(store.values())
+                if refresh:
+                    items = [i for i in items if refresh(i)]
+                return 200, self._as_page(items, query, list_key, filters)
+
+            if method == "POST":
+                r = create(body or {})
+                if r is None:
+                    return 400, {"error": {"message": "invalid request"}}
+                return 200, {key + "_id": r[key + "_id"]}
+
+            return 405, {"error": {"message": "method not allowed"}}
+
+        r = store.get(parts[0])
+        if r is not None and refresh and not refresh(r):
+            r = None
+        if r is None:
+            return 404, {"error": {"message": "%s %s is not found" % (
+                key, parts[0])}}
+
+        if method == "GET":
+            return 200, {key: copy.deepcopy(r)}
+
+        if method == "PUT":
+            for k, v in (body or {}).items():
+                if k in r:
+                    r[k] = v
+            r["update_time"] = _now()
+            return 200, {key + "_id": parts[0]}
+
+        if method == "DELETE":
+            if key == "scaling_configuration" and parts[0] in set(
+                    g.get("scaling_configuration_id")
+                    for g in self.groups.values()):
+                return 400, {"error": {"message": (
+                    "scaling_configuration %s is used by a group" %
+                    parts[0])}}
+
+            if key == "scaling_group" and self.transition:
+                r["scaling_group_status"] = "DELETING"
+                r["_deleted_at"] = time.time()
+            else:
+                store.pop(parts[0])
+            return 204, None
+
+        return 405, {"error": {"message": "method not allowed"}}
+
+    def _as_page(self, items, query, list_key, filters):
+        for q, field, fuzzy in filters:
+            v = query.get(q)
+            if v is None:
+                continue
+
+            def _value(i, field=field):
+                for k in field.split("."):
+                    i = (i or {}).get(k)
+                return i
+
+            if fuzzy:
+                items = [i for i in items if v in (_value(i) or "")]
+            else:
+                items = [i for i in items if str(_value(i)) == v]
+
+        items.sort(key=lambda i: i.get("create_time", ""), reverse=True)
+        start = int(query.get("start_number", 0))
+        limit = int(query.get("limit", 20))
+        page = [dict((k, v) for k, v in i.items() if not k.startswith("_"))
+                for i in items[start:start + limit]]
+
+        return {"total_number": len(items), "start_number": start,
+                "limit": limit, list_key: copy.deepcopy(page)}
+
+    def _refresh_group(self, g):
+        # returns False when the group is gone
+        t = g.get("_deleted_at")
+        if t is not None and time.time() - t >= self.transition:
+            self.groups.pop(g["scaling_group_id"], None)
+            return False
+        return True
+
+    def _create_group(self, body):
+        if not body.get("scaling_group_name") or not body.get("vpc_id"):
+            return None
+
+        return self.add_group(**body)
+
+    def _create_configuration(self, body):
+        if not body.get("scaling_configuration_name"):
+            return None
+
+        return self.add_configuration(**body)
+
+    def _policies_action(self, body):
+        # a batch either succeeds or changes nothing
+        ids = body.get("scaling_policy_id") or []
+        action = body.get("action")
+        if action not in ("delete", "pause", "resume") or \
+                len(ids) > AS_BATCH_MAX:
+            return 400, {"error": {"message": "invalid request"}}
+
+        for i in ids:
+            if i not in self.policies:
+                return 404, {"error": {"message": (
+                    "scaling_policy %s is not found" % i)}}
+
+        for i in ids:
+            if action == "delete":
+                self.policies.pop(i)
+            else:
+                self.policies[i]["policy_status"] = \
+                    "PAUSED" if action == "pause" else "INSERVICE"
+        return 204, None
+
+    def _configurations_delete(self, body):
+        ids = body.get("scaling_configuration_id") or []
+        if len(ids) > AS_BATCH_MAX:
+            return 400, {"error": {"message": "invalid request"}}
+
+        used = set(g.get("scaling_configuration_id")
+                   for g in self.groups.values())
+        for i in ids:
+            if i not in self.configurations:
+                return 404, {"error": {"message": (
+                    "scaling_configuration %s is not found" % i)}}
+            if i in used:
+                return 400, {"error": {"message": (
+                    "scaling_configuration %s is used by a group" % i)}}
+
+        for i in ids:
+            self.configurations.pop(i)
+        return 204, None
+
+    def _route_instances(self, method, parts, query, body):
+        if method == "GET" and len(parts) == 2 and parts[1] == "list":
+            items = [i for i in list(self.instances.values())
+                     if i["scaling_group_id"] == parts[0] and
+                     self._refresh_instance(i)]
+            return 200, self._as_page(
+                items, query, "scaling_group_instances",
+                [("life_cycle_state", "life_cycle_state", False),
+                 ("health_status", "health_status", False)])
+
+        if method == "POST" and len(parts) == 2 and parts[1] == "action":
+            return self._instances_action(parts[0], body or {})
+
+        if method == "DELETE" and len(parts) == 1:
+            i = self.instances.get(parts[0])
+            if i is None or not self._refresh_instance(i):
+                return 404, {"error": {"message": (
+                    "instance %s is not found" % parts[0])}}
+            return self._instances_action(i["scaling_group_id"], {
+                "action": "REMOVE", "instances_id": [parts[0]],
+                "instance_delete": query.get("instance_delete", "no")})
+
+        return 404, {"error": {"message": "unknown api"}}
+
+    def _instances_action(self, group_id, body):
+        # a batch either succeeds or changes nothing
+        ids = body.get("instances_id") or []
+        action = body.get("action")
+        group = self.groups.get(group_id)
+        if group is None:
+            return 404, {"error": {"message": (
+                "scaling_group %s is not found" % group_id)}}
+        if action not in ("REMOVE", "PROTECT", "UNPROTECT") or not ids or \
+                len(ids) > AS_INSTANCE_BATCH_MAX:
+            return 400, {"error": {"message": "invalid request"}}
+
+        for i in ids:
+            r = self.instances.get(i)
+            if r is None or r["scaling_group_id"] != group_id or \
+                    not self._refresh_instance(r):
+                return 404, {"error": {"message": (
+                    "instance %s is not found" % i)}}
+            if r["life_cycle_state"] != "INSERVICE":
+                return 400, {"error": {"message": (
+                    "instance %s is not in service" % i)}}
+
+        if action == "REMOVE":
+            n = len([i for i in self.instances.values()
+                     if i["scaling_group_id"] == group_id and
+                     i["life_cycle_state"] == "INSERVICE"])
+            if n - len(ids) < group.get("min_instance_number", 0):
+                return 400, {"error": {"message": (
+                    "the instances of scaling_group %s would be fewer than "
+                    "min_instance_number" % group_id)}}
+
+        for i in ids:
+            if action != "REMOVE":
+                self.instances[i]["protect_from_scaling_down"] = \
+                    action == "PROTECT"
+            elif self.transition:
+                self.instances[i]["life_cycle_state"] = "REMOVING"
+                self.instances[i]["_deleted_at"] = time.time()
+            else:
+                self.instances.pop(i)
+
+        if action == "REMOVE":
+            group["desire_instance_number"] = max(
+                0, group.get("desire_instance_number", 0) - len(ids))
+        return 204, None
+
+    def _refresh_instance(self, i):
+        # returns False when the instance is removed
+        t = i.get("_deleted_at")
+        if t is not None and time.time() - t >= self.transition:
+            self.instances.pop(i["instance_id"], None)
+            return False
+        return True
+
+    def _create_policy(self, body):
+        if not body.get("scaling_group_id") or \
+                body["scaling_group_id"] not in self.groups:
+            return None
+
+        return self.add_policy(**body)
+
+    # ------------------------------------------------------------------
+    # neutron LBaaS v2
+    # ------------------------------------------------------------------
+
+    def _route_neutron(self, method, path, query, body):
+        path = path.strip("/")
+        if path.endswith(".json"):
+            path = path[:-5]
+
+        # pools/{pool_id}/members[/{member_id}]
+        m = re.match(r"^lbaas/pools/([^/]+)/members(?:/([^/]+))?$", path)
+        if m:
+            return self._neutron_crud(
+                method, "members", m.group(2), query, body,
+                {"pool_id": m.group(1)})
+
+        for collection in NEUTRON_RESOURCES:
+            if path == collection:
+                return self._neutron_crud(method, collection, None, query,
+                                          body, {})
+            if path.startswith(collection + "/"):
+                return self._neutron_crud(
+                    method, collection, path[len(collection) + 1:], query,
+                    body, {})
+
+        return 404, {"NeutronError": {"message": "unknown api %s" % path}}
+
+    def _neutron_crud(self, method, collection, rid, query, body, parent):
+        name = NEUTRON_RESOURCES[collection]
+        plural = collection.split("/")[-1]
+        store = self.neutron[collection]
+
+        for r in list(store.values()):
+            self._refresh_neutron(collection, r)
+
+        if rid is None:
+            if method == "GET":
+                items = [i for i in store.values()
+                         if all(i.get(k) == v for k, v in parent.items())]
+                for k, v in query.items():
+                    if k in ("limit", "marker", "fields", "sort_key",
+                             "sort_dir"):
+                        continue
+                    items = [i for i in items
+                             if str(i.get(k) if i.get(k) is not None
+                                    else "") == v]
+                return 200, {plural: copy.deepcopy(items)}
+
+            if method == "POST":
+                attrs = dict((body or {}).get(name) or {})
+                attrs.update(parent)
+                r = self._create_neutron(collection, attrs)
+                if r is None:
+                    return 400, {"NeutronError": {
+                        "message": "invalid %s" % name}}
+                return 201, {name: copy.deepcopy(self._public(r))}
+
+            return 405, {"NeutronError": {"message": "method not allowed"}}
+
+        r = store.get(rid)
+        if r is None:
+            return 404, {"NeutronError": {"message": "%s %s not found" % (
+                name, rid)}}
+
+        if method == "GET":
+            return 200, {name: copy.deepcopy(self._public(r))}
+
+        if method == "PUT":
+            r.update((body or {}).get(name) or {})
+            self._touch_loadbalancer(r)
+            return 200, {name: copy.deepcopy(self._public(r))}
+
+        if method == "DELETE":
+            if collection == "lbaas/loadbalancers" and self.transition:
+                r["provisioning_status"] = "PENDING_DELETE"
+                r["_deleted_at"] = time.time()
+            else:
+                store.pop(rid)
+                self._unlink(collection, r)
+                self._touch_loadbalancer(r)
+            return 204, None
+
+        return 405, {"NeutronError": {"message": "method not allowed"}}
+
+    def _public(self, r):
+        return dict((k, v) for k, v in r.items() if not k.startswith("_"))
+
+    def _pending(self, r, status):
+        if self.transition:
+            r["provisioning_status"] = status
+            r["_ready_at"] = time.time() + self.transition
+        else:
+            r["provisioning_status"] = "ACTIVE"
+
+    def _refresh_neutron(self, collection, r):
+        if r.get("_deleted_at") is not None:
+            if time.time() - r["_deleted_at"] >= self.transition:
+                self.neutron[collection].pop(r["id"], None)
+            return
+
+        ready = r.get("_ready_at")
+        if ready is not None and time.time() >= ready:
+            r["provisioning_status"] = "ACTIVE"
+            r.pop("_ready_at")
+
+    def _lb_of(self, r):
+        lbs = self.neutron["lbaas/loadbalancers"]
+        if r.get("loadbalancer_id"):
+            return lbs.get(r["loadbalancer_id"])
+        if r.get("listener_id"):
+            listener = self.neutron["lbaas/listeners"].get(r["listener_id"])
+            return self._lb_of(listener) if listener else None
+        if r.get("pool_id"):
+            pool = self.neutron["lbaas/pools"].get(r["pool_id"])
+            return self._lb_of(pool) if pool else None
+        return None
+
+    def _touch_loadbalancer(self, r):
+        lb = self._lb_of(r)
+        if lb is not None and lb is not r:
+            self._pending(lb, "PENDING_UPDATE")
+
+    def _create_neutron(self, collection, attrs):
+        if collection == "lbaas/loadbalancers":
+            if not attrs.get("vip_subnet_id"):
+                return None
+            port = self.add_neutron("ports", name="vip-port")
+            r = self.add_neutron(
+                collection, vip_address=attrs.get("vip_address") or
+                "192.168.2.%d" % (len(self.neutron[collection]) + 10),
+                vip_port_id=port["id"], operating_status="ONLINE",
+                admin_state_up=True, listeners=[], pools=[],
+                provider="vlb", description="", **dict(
+                    (k, v) for k, v in attrs.items()
+                    if k not in ("vip_address",)))
+            self._pending(r, "PENDING_CREATE")
+            return r
+
+        if collection == "lbaas/listeners":
+            lb = self.neutron["lbaas/loadbalancers"].get(
+                attrs.get("loadbalancer_id"))
+            if lb is None:
+                return None
+            r = self.add_neutron(
+                collection, provisioning_status="ACTIVE",
+                operating_status="ONLINE", admin_state_up=True,
+                default_pool_id=None, connection_limit=-1,
+                loadbalancers=[{"id": lb["id"]}], **attrs)
+            lb["listeners"].append({"id": r["id"]})
+            self._touch_loadbalancer(r)
+            return r
+
+        if collection == "lbaas/pools":
+            listener = self.neutron["lbaas/listeners"].get(
+                attrs.get("listener_id"))
+            if listener is None and not attrs.get("loadbalancer_id"):
+                return None
+            r = self.add_neutron(
+                collection, provisioning_status="ACTIVE",
+                operating_status="ONLINE", admin_state_up=True,
+                members=[], healthmonitor_id=None,
+                listeners=[{"id": listener["id"]}] if listener else [],
+                **attrs)
+            lb = self._lb_of(r)
+            if lb is not None:
+                lb["pools"].append({"id": r["id"]})
+            if listener is not None:
+                listener["default_pool_id"] = r["id"]
+            self._touch_loadbalancer(r)
+            return r
+
+        if collection == "members":
+            pool = self.neutron["lbaas/pools"].get(attrs.get("pool_id"))
+            if pool is None or not attrs.get("address"):
+                return None
+            r = self.add_neutron(
+                collection, provisioning_status="ACTIVE",
+                operating_status="ONLINE", admin_state_up=True, weight=1,
+                **attrs)
+            pool["members"].append({"id": r["id"]})
+            self._touch_loadbalancer(r)
+            return r
+
+        if collection == "floatingips":
+            return self.add_neutron(
+                collection, floating_ip_address="10.17.8.%d" % (
+                    len(self.neutron[collection]) + 10),
+                port_id=None, fixed_ip_address=None, status="DOWN",
+                **attrs)
+
+        return self.add_neutron(collection, **attrs)
+
+    def _unlink(self, collection, r):
+        key = {"lbaas/listeners": "listeners",
+               "lbaas/pools": "pools"}.get(collection)
+        lb = self._lb_of(r)
+        if key and lb is not None:
+            lb[key] = [i for i in lb[key] if i["id"] != r["id"]]
+
+        if collection == "members":
+            pool = self.neutron["lbaas/pools"].get(r.get("pool_id"))
+            if pool is not None:
+                pool["members"] = [i for i in pool["members"]
+                                   if i["id"] != r["id"]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--port", type=int, default=8999)
+    parser.add_argument("--latency", type=float, default=0)
+    parser.add_argument("--jitter", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--transition", type=float, default=0)
+    args = parser.parse_args()
+
+    server = MockServer(args.port, latency=args.latency, jitter=args.jitter,
+                        error_rate=args.error_rate,
+                        transition=args.transition)
+    print("mock server is listening on %s, auth url: %s" % (
+        server.url, server.auth_url))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
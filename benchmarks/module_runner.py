@@ -0,0 +1,35 @@
+# Copyright (C) 2019 Huawei
+# GNU General Public License v3.0+ (see COPYING or
+# https://www.gnu.org/licenses/gpl-3.0.txt)
+
+"""
+Run one module of library/ the way ansible runs it on the target, with the
+module_utils of this repository:
+
+    python module_runner.py hcs_as_group args.json
+
+args.json holds ``{"ANSIBLE_MODULE_ARGS": {...}}``. The module result is
+written to stdout.
+"""
+
+import os
+import runpy
+import sys
+
+import hcs_env
+
+
+def main():
+    if len(sys.argv) != 3:
+        raise SystemExit("usage: %s MODULE ARGS_FILE" % sys.argv[0])
+
+    hcs_env.load_module_utils()
+    path = os.path.join(hcs_env.LIBRARY, sys.argv[1] + ".py")
+
+    # the modules read their args from the file passed as the first argument
+    sys.argv = [path, sys.argv[2]]
+    runpy.run_path(path, run_name="__main__")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+# Copyright (C) 2019 Huawei
+# GNU General Public License v3.0+ (see COPYING or
+# https://www.gnu.org/licenses/gpl-3.0.txt)
+
+"""
+Run every module of library/ against the mock server and report the wall time,
+the number of HTTP requests and the peak RSS of each run.
+
+Each run is a fresh process, as it is under ansible. The hcs_lb_* modules
+need openstacksdk and an ansible release which still ships
+module_utils/openstack.py (2.9); point --openstack-python at an interpreter
+which has them, otherwise those modules are skipped.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from mock_server import MockServer
+from scenarios import OPENSTACK_MODULES, SCENARIOS, needs_openstack
+
+RUNNER = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                      "module_runner.py")
+
+
+def run_module(python, module, args):
+    """
+    run the module in a child process
+    :return: (module result, wall seconds, peak RSS in KiB)
+    """
+    with tempfile.NamedTemporaryFile("w", suffix=".json") as f, \
+            tempfile.TemporaryFile() as out:
+        json.dump({"ANSIBLE_MODULE_ARGS": dict(
+            args, _ansible_module_name=module)}, f)
+        f.flush()
+
+        start = time.time()
+        p = subprocess.Popen([python, RUNNER, module, f.name], stdout=out,
+                             stderr=subprocess.STDOUT)
+        # wait4 returns the resource usage of this child only
+        _, status, usage = os.wait4(p.pid, 0)
+        wall = time.time() - start
+        p.returncode = status
+
+        out.seek(0)
+        data = out.read().decode("utf-8", "replace")
+
+    # the module prints its result as the last line
+    try:
+        result = json.loads(data.strip().splitlines()[-1])
+    except (ValueError, IndexError):
+        result = {"failed": True, "msg": data[-2000:]}
+
+    return result, wall, usage.ru_maxrss
+
+
+def run_scenario(server, python, scenario, repeat, openstack_python=None):
+    samples = []
+    for _ in range(repeat):
+        server.reset_data()
+        args = scenario.args(server)
+        result = None
+        if scenario.warmup:
+            module, warmup_args, warmup_python = scenario.module, args, python
+            if isinstance(scenario.warmup, tuple):
+                module, build = scenario.warmup
+                warmup_args = build(server)
+                if module in OPENSTACK_MODULES:
+                    warmup_python = openstack_python
+
+            result, _, _ = run_module(warmup_python, module, warmup_args)
+            if result.get("failed"):
+                return {"error": "warmup: %s" % result.get("msg")}
+
+        server.reset_counts()
+        params = scenario.params
+        if callable(params):
+            params = params(result)
+        args = dict(args, **params)
+        result, wall, rss = run_module(python, scenario.module, args)
+        if result.get("failed"):
+            return {"error": result.get("msg")}
+
+        samples.append({
+            "wall": wall,
+            "rss_kib": rss,
+            "requests": sum(v for k, v in server.counts.items()
+                            if not k.startswith(("auth.", "GET /_mock"))),
+            "changed": result.get("changed"),
+        })
+
+    samples.sort(key=lambda i: i["wall"])
+    r = samples[len(samples) // 2]
+    r["wall_min"] = samples[0]["wall"]
+    r["wall_max"] = samples[-1]["wall"]
+    r["requests_by_path"] = dict(server.counts)
+    return r
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--python", default=sys.executable,
+                        help="interpreter running the hcs_as_* modules")
+    parser.add_argument("--openstack-python",
+                        help="interpreter running the hcs_lb_* modules")
+    parser.add_argument("--module", action="append",
+                        help="only run these modules")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="runs per scenario, the median is reported")
+    parser.add_argument("--latency", type=float, default=0,
+                        help="seconds added to every API response")
+    parser.add_argument("--transition", type=float, default=0,
+                        help="seconds a resource stays in PENDING_*")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    server = MockServer(latency=args.latency,
+                        transition=args.transition).start()
+
+    results = []
+    print("%-22s %-10s %9s %9s %9s %9s  %s" % (
+        "module", "case", "wall(ms)", "min(ms)", "requests", "rss(MiB)",
+        "changed"))
+    try:
+        for s in SCENARIOS:
+            if args.module and s.module not in args.module:
+                continue
+
+            if needs_openstack(s) and not args.openstack_python:
+                continue
+
+            python = args.python
+            if s.module in OPENSTACK_MODULES:
+                python = args.openstack_python
+
+            r = run_scenario(server, python, s, args.repeat,
+                             args.openstack_python)
+            r.update(module=s.module, scenario=s.name)
+            results.append(r)
+
+            if "error" in r:
+                print("%-22s %-10s failed: %s" % (
+                    s.module, s.name, r["error"].strip().splitlines()[-1]))
+                continue
+
+            print("%-22s %-10s %9.1f %9.1f %9d %9.1f  %s" % (
+                s.module, s.name, r["wall"] * 1000, r["wall_min"] * 1000,
+                r["requests"], r["rss_kib"] / 1024.0, r["changed"]))
+    finally:
+        server.stop()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"latency": args.latency, "results": results}, f,
+                      indent=2, sort_keys=True)
+
+    if any("error" in r for r in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
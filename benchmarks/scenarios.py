@@ -0,0 +1,348 @@
+# Copyright (C) 2019 Huawei
+# GNU General Public License v3.0+ (see COPYING or
+# https://www.gnu.org/licenses/gpl-3.0.txt)
+
+"""
+The module invocations run by run_modules.py against the mock server.
+
+Every scenario builds the module args for a running MockServer, seeding the
+parent resources it needs. ``warmup`` scenarios first run the module once,
+unmeasured, with ``state: present``, so that the measured run finds the
+resource, e.g. a no-op run or a delete right after a create. ``params`` are
+merged into the args of the measured run; a callable gets the result of the
+warmup run and returns them. ``warmup`` may also be a (module, args) pair,
+which runs another module first, e.g. the one whose job the measured run
+waits for.
+"""
+
+import collections
+import os
+import tempfile
+
+from stub_server import PROJECT_ID
+
+Scenario = collections.namedtuple(
+    "Scenario", ["name", "module", "args", "params", "warmup"])
+
+# the args of the update scenarios; the modules look a resource up by all of
+# its options, so an update goes by id
+UPDATES = {
+    "hcs_as_group": {"max_instance_number": 3},
+    "hcs_as_policy": {"cool_down_time": 600},
+}
+
+# the modules which talk to the cloud through openstacksdk
+OPENSTACK_MODULES = ("hcs_lb_loadbalancer", "hcs_lb_listener",
+                     "hcs_lb_pool", "hcs_lb_member")
+
+
+def needs_openstack(scenario):
+    """return whether any module run by the scenario is an openstack one"""
+    if scenario.module in OPENSTACK_MODULES:
+        return True
+
+    return (isinstance(scenario.warmup, tuple) and
+            scenario.warmup[0] in OPENSTACK_MODULES)
+
+
+def hcs_auth(server):
+    return {
+        "auth": {
+            "auth_url": server.auth_url,
+            "username": "bench",
+            "password": "bench-password",
+            "domain_name": "bench",
+            "project_name": "region-1_bench",
+        },
+        "region": "region-1",
+    }
+
+
+def openstack_auth(server):
+    return {
+        "auth": {
+            "auth_url": server.auth_url,
+            "username": "bench",
+            "password": "bench-password",
+            "project_name": "region-1_bench",
+            "user_domain_name": "bench",
+            "project_domain_name": "bench",
+        },
+        "region_name": "region-1",
+        "timeout": 60,
+    }
+
+
+def _group_args(server):
+    return dict(hcs_auth(server), group_name="bench-group", vpc_id="vpc-1",
+                networks=["subnet-1"], min_instance_number=0,
+                max_instance_number=2, cool_down_time=300)
+
+
+def _configuration_args(server):
+    return dict(hcs_auth(server), configuration_name="bench-config",
+                flavor_id="s3.small.1", image_id="image-1",
+                ssh_key_name="bench-key",
+                disks=[{"disk_type": "SYS", "volume_type": "SATA",
+                        "size": 40}])
+
+
+def _policy_args(server):
+    return dict(hcs_auth(server), group_id=_seed_group(server),
+                policy_name="bench-policy", policy_type="RECURRENCE",
+                scheduled_policy={"launch_time": "00:00",
+                                  "recurrence_type": "Daily",
+                                  "start_time": "2019-01-01T00:00Z",
+                                  "end_time": "2029-01-01T00:00Z"},
+                policy_action={"operation": "ADD", "instance_number": 1})
+
+
+def _bench_policies(n):
+    return [{"policy_name": "bench-policy-%d" % i,
+             "scheduled_policy": {"launch_time": "%02d:00" % (i % 24),
+                                  "recurrence_type": "Daily"},
+             "policy_action": {"operation": "ADD", "instance_number": 1}}
+            for i in range(n)]
+
+
+def _policies_args(server):
+    # 20 policies of one group in one run of hcs_as_policy
+    return dict(hcs_auth(server), group_id=_seed_group(server),
+                policy_type="RECURRENCE", policies=_bench_policies(20))
+
+
+def _group_info_args(server):
+    # 250 groups, 3 pages of the info module, one in ten is PAUSED
+    for i in range(250):
+        server.add_group(scaling_group_name="bench-info-%d" % i,
+                         vpc_id="vpc-1", scaling_group_status="PAUSED"
+                         if i % 10 == 0 else "INSERVICE")
+    return hcs_auth(server)
+
+
+def _policy_batch_args(server):
+    # 120 policies, 3 calls of the batch action API, and 5 unknown IDs
+    group_id = _seed_group(server)
+    ids = [server.add_policy(scaling_policy_name="bench-batch-%d" % i,
+                             scaling_group_id=group_id)["scaling_policy_id"]
+           for i in range(120)]
+    return dict(hcs_auth(server), group_id=group_id, action="pause",
+                policy_ids=ids + ["missing-%d" % i for i in range(5)])
+
+
+def _configuration_batch_args(server):
+    ids = [server.add_configuration(
+        scaling_configuration_name="bench-batch-%d" % i
+    )["scaling_configuration_id"] for i in range(120)]
+    return dict(hcs_auth(server),
+                configuration_ids=ids + ["missing-%d" % i for i in range(5)])
+
+
+def _instance_args(server):
+    # 250 instances of a group, 3 pages of the list, one in five unhealthy
+    group_id = server.add_group(scaling_group_name="bench-instance-group",
+                                vpc_id="vpc-1")["scaling_group_id"]
+    for i in range(250):
+        server.add_instance(group_id, instance_name="bench-instance-%d" % i,
+                            health_status="ERROR" if i % 5 == 0
+                            else "NORMAL")
+    return dict(hcs_auth(server), group_id=group_id)
+
+
+def _wait_args(server):
+    # the jobs of 50 groups and a load balancer, polled by one list each
+    endpoint = "%s/autoscaling-api/v1/%s/" % (server.url, PROJECT_ID)
+    jobs = [{"type": "as_group", "id": server.add_group(
+        scaling_group_name="bench-wait-%d" % i,
+        vpc_id="vpc-1")["scaling_group_id"],
+        "target": ["INSERVICE", "PAUSED"], "endpoint": endpoint}
+        for i in range(50)]
+    jobs.append({"type": "lb_loadbalancer",
+                 "id": _seed_loadbalancer(server)["id"],
+                 "target": ["ACTIVE"],
+                 "endpoint": "%s/network/v2.0/" % server.url})
+    return dict(hcs_auth(server), jobs=jobs)
+
+
+def _lb_job_args(server):
+    return hcs_auth(server)
+
+
+def _lb_job(result):
+    # the handle returned by the load balancer created without waiting
+    return {"jobs": [result["job"]]}
+
+
+def _stack_args(server):
+    # a configuration, a group using it and 10 policies of the group
+    auth = hcs_auth(server)
+    configuration = _configuration_args(server)
+    group = _group_args(server)
+    policies = [dict(p, policy_type="RECURRENCE") for p in _bench_policies(10)]
+    return dict(auth, policies=policies,
+                configuration=dict((k, v) for k, v in configuration.items()
+                                   if k not in auth),
+                group=dict((k, v) for k, v in group.items() if k not in auth))
+
+
+def _reconcile_exclusive(result):
+    # keep the first 15 of the 20 policies
+    return {"exclusive": True, "policies": _bench_policies(15)}
+
+
+def _group_info_stream(result):
+    return {"output_file": os.path.join(tempfile.gettempdir(),
+                                        "bench_hcs_as_group_info.jsonl")}
+
+
+def _seed_group(server):
+    for g in server.groups.values():
+        if g["scaling_group_name"] == "bench-seed-group":
+            return g["scaling_group_id"]
+
+    return server.add_group(scaling_group_name="bench-seed-group",
+                            vpc_id="vpc-1")["scaling_group_id"]
+
+
+def _seed_loadbalancer(server):
+    subnet = [i for i in server.neutron["subnets"].values()
+              if i["name"] == "test_subnet"][0]
+    lb = server.add_neutron("lbaas/loadbalancers", name="bench-seed-lb",
+                            vip_subnet_id=subnet["id"],
+                            vip_address="192.168.2.5",
+                            provisioning_status="ACTIVE",
+                            operating_status="ONLINE", listeners=[],
+                            pools=[])
+    return lb
+
+
+def _seed_listener(server):
+    lb = _seed_loadbalancer(server)
+    listener = server.add_neutron(
+        "lbaas/listeners", name="bench-seed-listener",
+        loadbalancer_id=lb["id"], protocol="HTTP", protocol_port=80,
+        provisioning_status="ACTIVE", loadbalancers=[{"id": lb["id"]}])
+    lb["listeners"].append({"id": listener["id"]})
+    return listener
+
+
+def _seed_pool(server):
+    listener = _seed_listener(server)
+    pool = server.add_neutron(
+        "lbaas/pools", name="bench-seed-pool", listener_id=listener["id"],
+        loadbalancer_id=listener["loadbalancer_id"], protocol="HTTP",
+        lb_algorithm="ROUND_ROBIN", provisioning_status="ACTIVE",
+        members=[], listeners=[{"id": listener["id"]}])
+    return pool
+
+
+def _loadbalancer_args(server):
+    return dict(openstack_auth(server), name="bench-lb",
+                vip_subnet="test_subnet")
+
+
+def _listener_args(server):
+    return dict(openstack_auth(server), name="bench-listener",
+                loadbalancer=_seed_loadbalancer(server)["id"],
+                protocol="HTTP", protocol_port=8080)
+
+
+def _pool_args(server):
+    return dict(openstack_auth(server), name="bench-pool",
+                listener=_seed_listener(server)["id"], protocol="HTTP",
+                lb_algorithm="ROUND_ROBIN")
+
+
+def _loadbalancer_nowait_args(server):
+    return dict(_loadbalancer_args(server), wait=False)
+
+
+def _member_args(server):
+    return dict(openstack_auth(server), name="bench-member",
+                pool=_seed_pool(server)["id"], address="192.168.2.100",
+                protocol_port=8080, subnet="test_subnet")
+
+
+def _by_id(result):
+    return {"id": result["id"]}
+
+
+def _update(params):
+    def _params(result):
+        return dict(params, id=result["id"])
+    return _params
+
+
+def _scenarios():
+    builders = [
+        ("hcs_as_group", _group_args),
+        ("hcs_as_configuration", _configuration_args),
+        ("hcs_as_policy", _policy_args),
+        ("hcs_lb_loadbalancer", _loadbalancer_args),
+        ("hcs_lb_listener", _listener_args),
+        ("hcs_lb_pool", _pool_args),
+        ("hcs_lb_member", _member_args),
+    ]
+
+    r = []
+    for module, build in builders:
+        r.append(Scenario("create", module, build, {}, False))
+        r.append(Scenario("noop", module, build, {}, True))
+        if module not in OPENSTACK_MODULES:
+            r.append(Scenario("noop_by_id", module, build, _by_id, True))
+        if module in UPDATES:
+            r.append(Scenario("update", module, build,
+                              _update(UPDATES[module]), True))
+        r.append(Scenario("check", module, build,
+                          {"_ansible_check_mode": True}, False))
+        r.append(Scenario("delete", module, build, {"state": "absent"},
+                          True))
+
+    r.append(Scenario("bulk", "hcs_as_policy", _policies_args, {},
+                      False))
+    r.append(Scenario("bulk_noop", "hcs_as_policy", _policies_args, {},
+                      True))
+    r.append(Scenario("bulk_excl", "hcs_as_policy",
+                      _policies_args, _reconcile_exclusive, True))
+
+    r.append(Scenario("pause", "hcs_as_policy_batch", _policy_batch_args,
+                      {}, False))
+    r.append(Scenario("delete", "hcs_as_policy_batch", _policy_batch_args,
+                      {"action": "delete"}, False))
+    r.append(Scenario("delete", "hcs_as_configuration_batch",
+                      _configuration_batch_args, {}, False))
+    r.append(Scenario("check", "hcs_as_configuration_batch",
+                      _configuration_batch_args,
+                      {"_ansible_check_mode": True}, False))
+
+    r.append(Scenario("list", "hcs_as_group_instance", _instance_args, {},
+                      False))
+    r.append(Scenario("remove", "hcs_as_group_instance", _instance_args,
+                      {"health_status": "ERROR", "action": "remove"},
+                      False))
+    r.append(Scenario("protect", "hcs_as_group_instance", _instance_args,
+                      {"action": "protect"}, False))
+
+    r.append(Scenario("jobs", "hcs_wait", _wait_args, {}, False))
+    r.append(Scenario("lb_job", "hcs_wait", _lb_job_args, _lb_job,
+                      ("hcs_lb_loadbalancer", _loadbalancer_nowait_args)))
+
+    r.append(Scenario("create", "hcs_as_stack", _stack_args, {}, False))
+    r.append(Scenario("noop", "hcs_as_stack", _stack_args, {}, True))
+    r.append(Scenario("check", "hcs_as_stack", _stack_args,
+                      {"_ansible_check_mode": True}, False))
+    r.append(Scenario("delete", "hcs_as_stack", _stack_args,
+                      {"state": "absent"}, True))
+
+    r.append(Scenario("list", "hcs_as_group_info", _group_info_args, {},
+                      False))
+    r.append(Scenario("list_filter", "hcs_as_group_info", _group_info_args,
+                      {"status": "PAUSED",
+                       "fields": ["scaling_group_id", "scaling_group_name"]},
+                      False))
+    r.append(Scenario("list_stream", "hcs_as_group_info", _group_info_args,
+                      _group_info_stream, False))
+    return r
+
+
+SCENARIOS = _scenarios()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# Copyright (C) 2019 Huawei
+# GNU General Public License v3.0+ (see COPYING or
+# https://www.gnu.org/licenses/gpl-3.0.txt)
+
+"""
+Stress one Config shared by many threads against the local stub server.
+
+Every thread asks the Config for a service client and issues a GET, so the
+run checks that the keystone session, the connection pool and the endpoint
+cache are shared, and that no request is lost or mixed up with another.
+
+    python benchmarks/stress_service_client.py --calls 5000 --threads 64
+"""
+
+import argparse
+import sys
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+from hcs_env import FakeModule, load_module_utils
+from stub_server import StubServer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--calls", type=int, default=5000)
+    parser.add_argument("--threads", type=int, default=64)
+    args = parser.parse_args()
+
+    hcs_utils = load_module_utils()
+    server = StubServer().start()
+    try:
+        config = hcs_utils.Config(FakeModule(server.auth_url), "as")
+
+        def call(i):
+            client = config.client("region-1", "autoscaling", "project")
+            header = {"X-Request-Index": str(i)}
+            r = client.get("scaling_group/group-%d" % i, header=header)
+            if r["scaling_group"]["scaling_group_id"] != "group-%d" % i:
+                raise Exception("mismatched response for call %d" % i)
+            if header != {"X-Request-Index": str(i)}:
+                raise Exception("the header of call %d is changed" % i)
+
+        start = time.time()
+        with ThreadPoolExecutor(max_workers=args.threads) as pool:
+            list(pool.map(call, range(args.calls)))
+        elapsed = time.time() - start
+
+    finally:
+        server.stop()
+
+    auths = server.counts["auth.project"]
+    served = sum(v for k, v in server.counts.items()
+                 if k.startswith("GET "))
+    print("calls: %d, threads: %d, elapsed: %.3fs, %.0f calls/s" % (
+        args.calls, args.threads, elapsed, args.calls / elapsed))
+    print("project auths: %d, GET served: %d" % (auths, served))
+
+    if auths != 1 or served != args.calls:
+        print("FAILED: expected 1 project auth and %d GETs" % args.calls)
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+# Copyright (C) 2019 Huawei
+# GNU General Public License v3.0+ (see COPYING or
+# https://www.gnu.org/licenses/gpl-3.0.txt)
+
+"""
+A tiny HCS stand-in which serves keystone v3 password auth and a catalog
+pointing back to itself. Every request is counted by ``METHOD path``.
+"""
+
+import collections
+import gzip
+import json
+import threading
+import time
+import uuid
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PROJECT_ID = "0123456789abcdef0123456789abcdef"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def _read_body(self):
+        n = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(n)) if n else None
+
+    def _send(self, code, body=None, headers=None):
+        if isinstance(body, bytes):
+            data = body
+        else:
+            data = json.dumps(body).encode() if body is not None else b""
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        accept = self.headers.get("Accept-Encoding") or ""
+        if self.server.compress and data and "gzip" in accept:
+            data = gzip.compress(data, 6)
+            self.send_header("Content-Encoding", "gzip")
+        if self.server.bandwidth:
+            time.sleep(len(data) / float(self.server.bandwidth))
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _handle(self, method):
+        path = self.path.split("?")[0]
+        self.server.count("%s %s" % (method, path))
+        body = self._read_body()
+
+        if method == "POST" and path == "/identity/v3/auth/tokens":
+            return self._auth(body)
+
+        code, resp = self.server.route(method, self.path, body)
+        self._send(code, resp)
+
+    def _auth(self, body):
+        scope = body["auth"].get("scope")
+        token = {
+            "methods": ["password"],
+            "expires_at": "2099-01-01T00:00:00.000000Z",
+            "user": {"id": "u1", "name": "bench",
+                     "domain": {"id": "d1", "name": "bench"}},
+        }
+        if scope:
+            self.server.count("auth.project")
+            token["project"] = {"id": PROJECT_ID, "name": "region-1_bench",
+                                "domain": {"id": "d1", "name": "bench"}}
+            token["catalog"] = self.server.catalog()
+        else:
+            self.server.count("auth.domain")
+
+        self._send(201, {"token": token},
+                   {"X-Subject-Token": uuid.uuid4().hex})
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PUT(self):
+        self._handle("PUT")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 512
+
+    # gzip the response bodies when the client accepts it
+    compress = False
+
+    # simulate a slow link, in bytes per second, 0 means unlimited
+    bandwidth = 0
+
+    def __init__(self, port=0, handler=StubHandler):
+        ThreadingHTTPServer.__init__(self, ("127.0.0.1", port), handler)
+        self.counts = collections.Counter()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self):
+        return "http://127.0.0.1:%d" % self.server_address[1]
+
+    @property
+    def auth_url(self):
+        return self.url + "/identity/v3"
+
+    def count(self, key):
+        with self._lock:
+            self.counts[key] += 1
+
+    def catalog(self):
+        return [{
+            "type": "autoscaling",
+            "name": "as",
+            "endpoints": [{
+                "interface": "public",
+                "region": "region-1",
+                "region_id": "region-1",
+                "url": "%s/autoscaling-api/v1/%s" % (self.url, PROJECT_ID),
+            }],
+        }]
+
+    def route(self, method, path, body):
+        if method == "GET" and "/scaling_group/" in path:
+            group_id = path.split("?")[0].rsplit("/", 1)[-1]
+            return 200, {"scaling_group": {"scaling_group_id": group_id}}
+
+        return 404, {"error": {"message": "%s %s is not found" % (
+            method, path)}}
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
@@ -1,6 +1,6 @@
 #!/bin/bash
 
-mkdir -p ~/.ansible/plugins/modules ~/.ansible/plugins/module_utils ~/.ansible/plugins/doc_fragments
+mkdir -p ~/.ansible/plugins/modules ~/.ansible/plugins/module_utils ~/.ansible/plugins/doc_fragments ~/.ansible/plugins/action ~/.ansible/plugins/connection ~/.ansible/plugins/inventory
 if [ $? -ne 0 ]; then
     echo -e "\033[31m ========== install hcs modules failed! ========== \033[0m"
     exit 1
@@ -8,8 +8,13 @@ fi
 
 # copy files
 cp ./library/*.py ~/.ansible/plugins/modules
-cp ./module_utils/hcs_utils.py ~/.ansible/plugins/module_utils
+cp ./module_utils/hcs_utils.py ./module_utils/hcs_as_utils.py ~/.ansible/plugins/module_utils
 cp ./plugins/doc_fragments/hcs.py ~/.ansible/plugins/doc_fragments
+cp ./plugins/connection/hcs.py ~/.ansible/plugins/connection
+cp ./plugins/inventory/hcs_as.py ~/.ansible/plugins/inventory
+for m in hcs_as_group hcs_as_policy hcs_as_configuration; do
+    cp ./plugins/action/hcs_as_batch.py ~/.ansible/plugins/action/$m.py
+done
 
 echo -e "\033[32m ========== HCS modules has installed locally, enjoy it!!! ========== \033[0m"
 
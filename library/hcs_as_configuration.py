@@ -183,9 +183,13 @@ RETURN = '''
 
 from ansible.module_utils.hwc_utils import (
     HwcClientException, are_different_dicts, build_path, get_region,
-    is_empty_value, navigate_value, wait_to_finish)
+    navigate_value, wait_to_finish)
 from ansible.module_utils.hcs_utils import (
-    Config, HcsModule)
+    Config, HcsModule, run_module)
+from ansible.module_utils.hcs_as_utils import (
+    build_configuration_create_parameters,
+    build_configuration_identity_object, build_configuration_query_link,
+    fill_configuration_resp_body)
 
 
 def build_module():
@@ -225,76 +229,91 @@ def main():
     module = build_module()
     config = Config(module, "as", verify=False)
 
-    try:
-        resource = dict()
-        if module.params.get('id'):
-            # read as configuration resource by id
-            resource = read_resource(config)
-        else:
-            # search as configuration resource by name
-            v = search_resource(config)
-            n = len(v)
-            if n > 1:
-                raise Exception("Found more than one resource(%s)" % ", ".join([
-                    navigate_value(i, ["id"])
-                    for i in v
-                ]))
-
-            if n == 1:
-                module.params['id'] = navigate_value(v[0], ["id"])
-                resource = v[0]
-
-        changed = False
-        result = dict()
-        if module.params['state'] == 'present':
-            if not resource:
-                if not module.check_mode:
-                    result['action'] = 'create'
+    run_module(config, run)
+
+
+def run(config):
+    """run the module once, return its result"""
+
+    module = config.module
+    plans = config.plan_cache
+    # a run given the id reads the resource by it, a plan saves nothing
+    plan_key = None
+    if plans and not module.params.get('id'):
+        plan_key = plans.key(module)
+
+    plan = None
+    if plan_key and not module.check_mode:
+        # the plan of the check mode run replaces the search
+        client = config.client(get_region(module), "autoscaling", "project")
+        plan = plans.resource(
+            config, client, plan_key, "scaling_configuration/%s", "scaling_configuration",
+            fill_configuration_resp_body)
+
+    resource = dict()
+    if plan:
+        module.params['id'] = plan["id"]
+        resource = plan["resource"]
+    elif module.params.get('id'):
+        # read as configuration resource by id
+        resource = read_resource(config)
+    else:
+        # search as configuration resource by name
+        v = search_resource(config)
+        n = len(v)
+        if n > 1:
+            raise Exception("Found more than one resource(%s)" % ", ".join([
+                navigate_value(i, ["id"])
+                for i in v
+            ]))
+
+        if n == 1:
+            module.params['id'] = navigate_value(v[0], ["id"])
+            resource = v[0]
+
+    changed = False
+    result = dict()
+    if module.params['state'] == 'present':
+        if not resource:
+            if not module.check_mode:
+                result['action'] = 'create'
+                with config.tracer.span("create"):
                     create(config)
-                changed = True
-            else:
-                obj = build_identity_object(module)
-                if are_different_dicts(obj, resource):
-                    raise Exception(
-                        "Cannot change option for an existing auto-scaling configuration(%s)."
-                        % module.params.get('id'))
+            changed = True
         else:
-            if resource:
-                if not module.check_mode:
-                    result['action'] = 'delete'
+            obj = build_identity_object(module)
+            with config.tracer.span("compare"):
+                different = are_different_dicts(obj, resource)
+            if different:
+                raise Exception(
+                    "Cannot change option for an existing auto-scaling configuration(%s)."
+                    % module.params.get('id'))
+    else:
+        if resource:
+            if not module.check_mode:
+                result['action'] = 'delete'
+                with config.tracer.span("delete"):
                     delete(config)
-                changed = True
+            changed = True
 
-    except Exception as ex:
-        module.fail_json(msg=str(ex))
+    result['changed'] = changed
+    result['id'] = module.params['id']
 
-    else:
-        result['changed'] = changed
-        result['id'] = module.params['id']
-        module.exit_json(**result)
+    if plan_key and module.check_mode:
+        plans.save(plan_key, module, resource)
+
+    return result
 
 
 def build_identity_object(module):
-    return {
-        "id": module.params.get("id"),
-        "configuration_name": module.params.get("configuration_name"),
-        "instance_id": module.params.get("instance_id"),
-        "flavor_id": module.params.get("flavor_id"),
-        "image_id": module.params.get("image_id"),
-        "disks": module.params.get("disks"),
-        "public_ip": module.params.get("public_ip"),
-        "ssh_key_name": module.params.get("ssh_key_name"),
-        "admin_pass": module.params.get("admin_pass"),
-        "user_data": module.params.get("user_data"),
-        "server_metadata": module.params.get("server_metadata"),
-    }
+    return build_configuration_identity_object(module.params)
 
 
 def create(config):
     module = config.module
     client = config.client(get_region(module), "autoscaling", "project")
 
-    params = build_create_parameters(module.params)
+    params = build_configuration_create_parameters(module.params)
     r = send_create_request(module, params, client)
     module.params['id'] = navigate_value(r, ["scaling_configuration_id"])
 
@@ -311,7 +330,7 @@ def read_resource(config):
     client = config.client(get_region(module), "autoscaling", "project")
 
     r = send_read_request(module, client)
-    res = fill_read_resp_body(r)
+    res = fill_configuration_resp_body(r)
 
     return res
 
@@ -321,22 +340,24 @@ def search_resource(config):
     client = config.client(get_region(module), "autoscaling", "project")
 
     identity_obj = build_identity_object(module)
-    query_link = build_query_link(module.params)
+    query_link = build_configuration_query_link(module.params)
     link = "scaling_configuration" + query_link
 
     result = []
     p = {'start_number': 0}
     while True:
         url = link.format(**p)
-        r = send_list_request(module, client, url)
-        if not r:
+        n = 0
+        with config.tracer.span("search page %d" % (p['start_number'] // 10 + 1)):
+            for item in send_list_request(module, client, url):
+                n += 1
+                item = fill_configuration_resp_body(item)
+                if not are_different_dicts(identity_obj, item):
+                    result.append(item)
+
+        if not n:
             break
 
-        for item in r:
-            item = fill_read_resp_body(item)
-            if not are_different_dicts(identity_obj, item):
-                result.append(item)
-
         if len(result) > 1:
             break
 
@@ -345,136 +366,6 @@ def search_resource(config):
     return result
 
 
-def build_create_parameters(opts):
-    """
-    - change the input parameters with required name or value format of create API
-    - ignore empty parameter
-    """
-
-    params = dict()
-    instance_config = dict()
-
-    v = navigate_value(opts, ["configuration_name"], None)
-    if not is_empty_value(v):
-        params["scaling_configuration_name"] = v
-
-    v = navigate_value(opts, ["instance_id"], None)
-    if not is_empty_value(v):
-        instance_config["instance_id"] = v
-
-    v = navigate_value(opts, ["flavor_id"], None)
-    if not is_empty_value(v):
-        instance_config["flavorRef"] = v
-
-    v = navigate_value(opts, ["image_id"], None)
-    if not is_empty_value(v):
-        instance_config["imageRef"] = v
-
-    v = expand_create_disks_param(opts, None)
-    if not is_empty_value(v):
-        instance_config["disk"] = v
-
-    v = navigate_value(opts, ["ssh_key_name"], None)
-    if not is_empty_value(v):
-        instance_config["key_name"] = v
-
-    v = navigate_value(opts, ["admin_pass"], None)
-    if not is_empty_value(v):
-        instance_config["adminPass"] = v
-
-    v = navigate_value(opts, ["user_data"], None)
-    if not is_empty_value(v):
-        instance_config["user_data"] = v
-
-    v = navigate_value(opts, ["server_metadata"], None)
-    if not is_empty_value(v):
-        instance_config["metadata"] = v
-
-    v = expand_create_publicip(opts, None)
-    if not is_empty_value(v):
-        instance_config["public_ip"] = v
-
-    if instance_config:
-        params["instance_config"] = instance_config
-
-    if not params:
-        return None
-
-    return params
-
-
-def expand_create_disks_param(d, array_index):
-    disks = []
-    new_ai = dict()
-    if array_index:
-        new_ai.update(array_index)
-
-    v = navigate_value(d, ["disks"], new_ai)
-    if not v:
-        return disks
-
-    n = len(v)
-    for i in range(n):
-        new_ai["disks"] = i
-        transformed = dict()
-
-        v = navigate_value(d, ["disks", "disk_type"], new_ai)
-        if not is_empty_value(v):
-            transformed["disk_type"] = v
-
-        v = navigate_value(d, ["disks", "volume_type"], new_ai)
-        if not is_empty_value(v):
-            transformed["volume_type"] = v
-
-        v = navigate_value(d, ["disks", "size"], new_ai)
-        if not is_empty_value(v):
-            transformed["size"] = v
-
-        if transformed:
-            disks.append(transformed)
-
-    return disks
-
-
-def expand_create_publicip(d, array_index):
-    r = dict()
-
-    v = expand_create_publicip_bandwidth(d)
-    if not is_empty_value(v):
-        r["bandwidth"] = v
-
-    v = navigate_value(d, ["public_ip", "type"], array_index)
-    if not is_empty_value(v):
-        r["ip_type"] = v
-
-    if not r:
-        return None
-
-    return {"eip": r}
-
-
-def expand_create_publicip_bandwidth(d):
-    bandwidth = dict()
-
-    raw = navigate_value(d, ["public_ip", "bandwidth"])
-    if is_empty_value(raw):
-        return bandwidth
-
-    v = navigate_value(raw, ["charge_mode"])
-    if not is_empty_value(v):
-        bandwidth["charge_mode"] = v
-
-    v = navigate_value(raw, ["share"])
-    if not is_empty_value(v):
-        bandwidth["share"] = v
-
-    v = navigate_value(raw, ["size"])
-    if not is_empty_value(v):
-        bandwidth["size"] = v
-
-    return bandwidth
-
-
 def send_create_request(module, params, client):
     # the endpoint: https://as-api.xxx.com/autoscaling-api/v1/{{project_id}}
     url = "scaling_configuration"
@@ -492,7 +383,7 @@ def send_delete_request(module, params, client):
     url = build_path(module, "scaling_configuration/{id}")
 
     try:
-        r = client.delete(url, params)
+        r = client.delete(url, params, with_body=False)
     except HwcClientException as ex:
         msg = ("module(hcs_as_configuration): error running "
                "api(delete), error: %s" % str(ex))
@@ -516,79 +407,16 @@ def send_read_request(module, client):
 
 
 def send_list_request(module, client, url):
-    r = None
+    # the items may be parsed while they are iterated, which raises
+    # the errors of the response then
     try:
-        r = client.get(url)
+        for item in client.list_items(url, "scaling_configurations"):
+            yield item
     except HwcClientException as ex:
         msg = ("module(hcs_as_configuration): error running "
                "api(list), error: %s" % str(ex))
         module.fail_json(msg=msg)
 
-    return navigate_value(r, ["scaling_configurations"], None)
-
-
-def fill_read_resp_body(body):
-    """build resource from response body"""
-
-    result = dict()
-
-    result["id"] = body.get("scaling_configuration_id")
-    result["configuration_name"] = body.get("scaling_configuration_name")
-
-    config_body = body.get("instance_config")
-    if not config_body:
-        raise Exception("instance_config is missing in response body")
-
-    result["instance_id"] = config_body.get("instance_id")
-    result["flavor_id"] = config_body.get("flavorRef")
-    result["image_id"] = config_body.get("imageRef")
-    result["ssh_key_name"] = config_body.get("key_name")
-    result["admin_pass"] = config_body.get("adminPass")
-    result["user_data"] = config_body.get("user_data")
-    result["server_metadata"] = config_body.get("metadata")
-    result["public_ip"] = config_body.get("public_ip")
-
-    v = fill_read_resp_disks(config_body.get("disk"))
-    result["disks"] = v
-
-    return result
-
-
-def fill_read_resp_disks(value):
-    if not value:
-        return None
-
-    disks = []
-    for item in value:
-        disk = {
-            "disk_type": item.get("disk_type"),
-            "volume_type": item.get("volume_type"),
-            "size": item.get("size"),
-        }
-        disks.append(disk)
-
-    return disks
-
-
-def build_query_link(opts):
-    query_params = []
-
-    v = navigate_value(opts, ["configuration_name"])
-    if v or v in [False, 0]:
-        query_params.append(
-            "scaling_configuration_name=" + (str(v) if v else str(v).lower()))
-
-    v = navigate_value(opts, ["image_id"])
-    if v or v in [False, 0]:
-        query_params.append(
-            "image_id=" + (str(v) if v else str(v).lower()))
-
-    query_link = "?limit=10&start_number={start_number}"
-    if query_params:
-        query_link += "&" + "&".join(query_params)
-
-    return query_link
-
 
 if __name__ == '__main__':
     main()
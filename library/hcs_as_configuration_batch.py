@@ -0,0 +1,201 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019 Huawei
+# GNU General Public License v3.0+ (see COPYING or
+# https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+###############################################################################
+# Documentation
+###############################################################################
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ["preview"],
+                    'supported_by': 'community'}
+
+DOCUMENTATION = '''
+---
+module: hcs_as_configuration_batch
+description:
+    - Deletes many auto-scaling configurations by the batch delete API.
+    - The configurations are listed once, and the missing ones are skipped. The others
+      are sent in chunks of the max batch size of the API. When a chunk fails, for
+      example as one of its configurations is used by a group, its configurations are
+      sent one by one, so that the result tells which of them failed.
+short_description: Deletes auto-scaling configurations in batches in Huawei Cloud Stack
+version_added: '2.10'
+author: Huawei Inc. (@huaweicloud)
+requirements:
+    - keystoneauth1 >= 3.6.0
+options:
+    configuration_ids:
+        description:
+            - Specifies the IDs of the AS configurations.
+        type: list
+        elements: str
+        required: true
+    action:
+        description:
+            - Specifies the action to run on the AS configurations.
+        type: str
+        choices: ['delete']
+        default: 'delete'
+extends_documentation_fragment: hcs
+'''
+
+EXAMPLES = '''
+# delete the auto-scaling configurations of the old images
+- name: delete the stale auto-scaling configurations
+  hcs_as_configuration_batch:
+    configuration_ids: "{{ stale_configuration_ids }}"
+'''
+
+RETURN = '''
+    results:
+        description:
+            - The id and status of every AS configuration. The status is deleted when
+              it is deleted, absent when it is missing, and failed, with the error in
+              msg, when the deletion failed.
+        type: list
+        returned: always
+'''
+
+from ansible.module_utils.hwc_utils import (
+    HwcClientException, HwcClientException404, get_region, navigate_value)
+from ansible.module_utils.hcs_utils import (
+    Config, HcsModule, batch_action, run_module)
+
+# the max number of IDs in a call of the batch action API
+BATCH_SIZE = 50
+
+# the max number of items in a page of the list API
+LIST_PAGE_SIZE = 100
+
+DONE = {"delete": "deleted"}
+
+
+def build_module():
+    return HcsModule(
+        argument_spec=dict(
+            configuration_ids=dict(type='list', elements='str',
+                                   required=True),
+            action=dict(type='str', default='delete', choices=['delete']),
+        ),
+        supports_check_mode=True,
+    )
+
+
+def main():
+    """Main function"""
+
+    module = build_module()
+    config = Config(module, "as", verify=False)
+
+    run_module(config, run)
+
+
+def run(config):
+    """run the module once, return its result"""
+
+    module = config.module
+    action = module.params['action']
+
+    # keep the order, drop the repeated IDs
+    ids = []
+    seen = set()
+    for i in module.params['configuration_ids']:
+        if i not in seen:
+            seen.add(i)
+            ids.append(i)
+
+    with config.tracer.span("list"):
+        existing = set(navigate_value(i, ["scaling_configuration_id"])
+                       for i in list_resources(config))
+    status = dict((i, "absent") for i in ids if i not in existing)
+
+    todo = [i for i in ids if i not in status]
+    errors = dict()
+    if todo and not module.check_mode:
+        client = config.client(get_region(module), "autoscaling", "project")
+
+        def _send_one(i):
+            try:
+                send_delete_request(client, i)
+            except HwcClientException404:
+                status[i] = "absent"
+
+        with config.tracer.span(action):
+            errors = batch_action(
+                todo, BATCH_SIZE,
+                lambda chunk: send_batch_delete_request(client, chunk),
+                _send_one)
+
+    results = []
+    for i in ids:
+        r = {"id": i, "status": status.get(i, DONE[action])}
+        if i in errors:
+            r.update(status="failed", msg=errors[i])
+        results.append(r)
+
+    result = {"changed": any(r["status"] == DONE[action] for r in results),
+              "results": results}
+    if errors:
+        result.update(failed=True, msg=(
+            "module(hcs_as_configuration_batch): %d of the configurations "
+            "failed" % len(errors)))
+
+    return result
+
+
+def list_resources(config):
+    """yield every configuration, page by page"""
+    module = config.module
+    client = config.client(get_region(module), "autoscaling", "project")
+
+    link = "scaling_configuration" + \
+        "?limit=%d&start_number={start_number}" % LIST_PAGE_SIZE
+
+    p = {'start_number': 0}
+    while True:
+        url = link.format(**p)
+        n = 0
+        for item in send_list_request(module, client, url):
+            n += 1
+            yield item
+
+        # a short page is the last one
+        if n < LIST_PAGE_SIZE:
+            break
+
+        p['start_number'] += LIST_PAGE_SIZE
+
+
+def send_batch_delete_request(client, ids):
+    # the endpoint: https://as-api.xxx.com/autoscaling-api/v1/{{project_id}}
+    url = "scaling_configurations"
+    return client.post(url, {"scaling_configuration_id": ids},
+                       with_body=False)
+
+
+def send_delete_request(client, configuration_id):
+    url = "scaling_configuration/%s" % configuration_id
+    return client.delete(url, None, with_body=False)
+
+
+def send_list_request(module, client, url):
+    # the items may be parsed while they are iterated, which raises
+    # the errors of the response then
+    try:
+        for item in client.list_items(url, "scaling_configurations"):
+            yield item
+    except HwcClientException as ex:
+        msg = ("module(hcs_as_configuration_batch): error running api(list), "
+               "url: %s%s, error: %s" % (client.endpoint, url, str(ex)))
+        module.fail_json(msg=msg)
+
+
+if __name__ == '__main__':
+    main()
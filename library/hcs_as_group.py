@@ -103,6 +103,19 @@ options:
               when deleting the instances.
         type: bool
         required: false
+    wait:
+        description:
+            - Whether to wait until the AS group is in service or paused after it is
+              created or updated, or gone after it is deleted. When it is false, the
+              handle of the job is returned as job, and can be waited for by hcs_wait
+              together with the jobs of other tasks.
+        type: bool
+        default: false
+    wait_timeout:
+        description:
+            - The seconds to wait for.
+        type: int
+        default: 600
 extends_documentation_fragment: hcs
 '''
 
@@ -128,13 +141,23 @@ RETURN = '''
             - Specifies the ID of the AS group.
         type: str
         returned: success
+    job:
+        description:
+            - The handle of the job of the change, with the resource type, ID, target
+              status and endpoint, for hcs_wait.
+        type: dict
+        returned: when the AS group is changed and wait is false
 '''
 
 from ansible.module_utils.hwc_utils import (
-    HwcClientException, are_different_dicts, build_path, get_region,
-    is_empty_value, navigate_value, wait_to_finish)
+    HwcClientException, HwcClientException404, HwcModuleException,
+    are_different_dicts, build_path, get_region, navigate_value)
 from ansible.module_utils.hcs_utils import (
-    Config, HcsModule)
+    Config, HcsModule, job_handle, run_module, wait_to_finish)
+from ansible.module_utils.hcs_as_utils import (
+    build_group_create_parameters, build_group_identity_object,
+    build_group_query_link, build_group_update_parameters,
+    fill_group_resp_body)
 
 
 def build_module():
@@ -156,6 +179,8 @@ def build_module():
                 'OLD_CONFIG_OLD_INSTANCE', 'OLD_CONFIG_NEW_INSTANCE', 'OLD_INSTANCE', 'NEW_INSTANCE']
             ),
             delete_publicip=dict(type='bool'),
+            wait=dict(type='bool', default=False),
+            wait_timeout=dict(type='int', default=600),
         ),
         supports_check_mode=True,
     )
@@ -167,88 +192,138 @@ def main():
     module = build_module()
     config = Config(module, "as", verify=False)
 
-    try:
-        resource = dict()
-        if module.params.get('id'):
-            # read as group resource by id
-            resource = read_resource(config)
-        else:
-            # search as group resource by name
-            v = search_resource(config)
-            n = len(v)
-            if n > 1:
-                raise Exception("Found more than one resource(%s)" % ", ".join([
-                    navigate_value(i, ["scaling_group_id"])
-                    for i in v
-                ]))
-
-            if n == 1:
-                module.params['id'] = navigate_value(v[0], ["scaling_group_id"])
-                resource = v[0]
-
-        changed = False
-        result = dict()
-        if module.params['state'] == 'present':
-            if not resource:
-                if not module.check_mode:
-                    result['action'] = "create"
+    run_module(config, run)
+
+
+def run(config):
+    """run the module once, return its result"""
+
+    module = config.module
+    plans = config.plan_cache
+    # a run given the id reads the resource by it, a plan saves nothing
+    plan_key = None
+    if plans and not module.params.get('id'):
+        plan_key = plans.key(module)
+
+    plan = None
+    if plan_key and not module.check_mode:
+        # the plan of the check mode run replaces the search
+        client = config.client(get_region(module), "autoscaling", "project")
+        plan = plans.resource(
+            config, client, plan_key, "scaling_group/%s", "scaling_group",
+            fill_group_resp_body)
+
+    resource = dict()
+    if plan:
+        module.params['id'] = plan["id"]
+        resource = plan["resource"]
+    elif module.params.get('id'):
+        # read as group resource by id
+        resource = read_resource(config)
+    else:
+        # search as group resource by name
+        v = search_resource(config)
+        n = len(v)
+        if n > 1:
+            raise Exception("Found more than one resource(%s)" % ", ".join([
+                navigate_value(i, ["scaling_group_id"])
+                for i in v
+            ]))
+
+        if n == 1:
+            module.params['id'] = navigate_value(v[0], ["scaling_group_id"])
+            resource = v[0]
+
+    changed = False
+    result = dict()
+    if module.params['state'] == 'present':
+        if not resource:
+            if not module.check_mode:
+                result['action'] = "create"
+                with config.tracer.span("create"):
                     create(config)
-                changed = True
-            else:
-                obj = build_identity_object(module)
-                if are_different_dicts(obj, resource):
-                    if not module.check_mode:
-                        result['action'] = "update"
-                        update(config)
-                    changed = True
+            changed = True
         else:
-            if resource:
+            obj = build_identity_object(module)
+            with config.tracer.span("compare"):
+                different = are_different_dicts(obj, resource)
+            if different:
                 if not module.check_mode:
-                    result['action'] = "delete"
-                    delete(config)
+                    result['action'] = "update"
+                    with config.tracer.span("update"):
+                        update(config)
                 changed = True
+    else:
+        if resource:
+            if not module.check_mode:
+                result['action'] = "delete"
+                with config.tracer.span("delete"):
+                    delete(config)
+            changed = True
+
+    result['changed'] = changed
+    result['id'] = module.params['id']
+
+    if plan_key and module.check_mode:
+        plans.save(plan_key, module, resource)
+
+    if result.get('action') and not module.params['wait']:
+        client = config.client(get_region(module), "autoscaling", "project")
+        result['job'] = job_handle(
+            "as_group", module.params['id'],
+            "absent" if result['action'] == "delete"
+            else ["INSERVICE", "PAUSED"], client.endpoint)
+    elif result.get('action'):
+        try:
+            with config.tracer.span("wait"):
+                async_wait(config, result['action'])
+        except HwcModuleException as ex:
+            module.fail_json(msg="module(hcs_as_group): error waiting for "
+                                 "the group to be %sd, error: %s" % (
+                                     result['action'], str(ex)))
 
-    except Exception as ex:
-        module.fail_json(msg=str(ex))
+    return result
 
-    else:
-        result['changed'] = changed
-        result['id'] = module.params['id']
-        module.exit_json(**result)
+
+def async_wait(config, action):
+    """poll the group until it is in service or paused, or gone"""
+    module = config.module
+    client = config.client(get_region(module), "autoscaling", "project")
+    url = build_path(module, "scaling_group/{id}")
+
+    def _refresh():
+        try:
+            r = client.get(url)
+        except HwcClientException404:
+            return (True, "absent") if action == "delete" else (None, "")
+        except HwcClientException:
+            return None, ""
+
+        status = navigate_value(r, ["scaling_group", "scaling_group_status"],
+                                None)
+        if status == "ERROR":
+            raise HwcModuleException("the group is in status ERROR")
+
+        return r, status
+
+    if action == "delete":
+        return wait_to_finish(config, ["absent"],
+                              ["INSERVICE", "PAUSED", "DELETING"], _refresh,
+                              module.params['wait_timeout'])
+
+    return wait_to_finish(config, ["INSERVICE", "PAUSED"], None, _refresh,
+                          module.params['wait_timeout'])
 
 
 def build_identity_object(module):
-    """
-    build resource from input module params
-    :param module: input module
-    :return: resource object in read response format, missing params equal None
-    """
-    networks = expand_create_networks(module.params)
-    security_groups = expand_create_security_groups(module.params)
-    return {
-        "scaling_group_id": module.params.get("id"),
-        "scaling_group_name": module.params.get("group_name"),
-        "scaling_group_status": None,
-        "scaling_configuration_id": module.params.get("configuration_id"),
-        "desire_instance_number": module.params.get("desire_instance_number"),
-        "min_instance_number": module.params.get("min_instance_number"),
-        "max_instance_number": module.params.get("max_instance_number"),
-        "cool_down_time": module.params.get("cool_down_time"),
-        "health_periodic_audit_time": module.params.get("health_periodic_audit_time"),
-        "available_zones": module.params.get("available_zones"),
-        "vpc_id": module.params.get("vpc_id"),
-        "networks": networks,
-        "security_groups": security_groups,
-        "instance_terminate_policy": module.params.get("instance_terminate_policy"),
-        "delete_publicip": module.params.get("delete_publicip"),
-    }
+    return build_group_identity_object(module.params)
 
 
 def create(config):
     module = config.module
     client = config.client(get_region(module), "autoscaling", "project")
 
-    params = build_create_parameters(module.params)
+    params = build_group_create_parameters(module.params)
     r = send_create_request(module, params, client)
     module.params['id'] = navigate_value(r, ["scaling_group_id"])
 
@@ -257,7 +332,7 @@ def update(config):
     module = config.module
     client = config.client(get_region(module), "autoscaling", "project")
 
-    params = build_update_parameters(module.params)
+    params = build_group_update_parameters(module.params)
     r = send_update_request(module, params, client)
     module.params['id'] = navigate_value(r, ["scaling_group_id"])
 
@@ -274,7 +349,7 @@ def read_resource(config):
     client = config.client(get_region(module), "autoscaling", "project")
 
     r = send_read_request(module, client)
-    res = fill_read_resp_body(r)
+    res = fill_group_resp_body(r)
 
     return res
 
@@ -284,22 +359,24 @@ def search_resource(config):
     client = config.client(get_region(module), "autoscaling", "project")
 
     identity_obj = build_identity_object(module)
-    query_link = build_query_link(module.params)
+    query_link = build_group_query_link(module.params)
     link = "scaling_group" + query_link
 
     result = []
     p = {'start_number': 0}
     while True:
         url = link.format(**p)
-        r = send_list_request(module, client, url)
-        if not r:
+        n = 0
+        with config.tracer.span("search page %d" % (p['start_number'] // 10 + 1)):
+            for item in send_list_request(module, client, url):
+                n += 1
+                item = fill_group_resp_body(item)
+                if not are_different_dicts(identity_obj, item):
+                    result.append(item)
+
+        if not n:
             break
 
-        for item in r:
-            item = fill_read_resp_body(item)
-            if not are_different_dicts(identity_obj, item):
-                result.append(item)
-
         if len(result) > 1:
             break
 
@@ -308,95 +385,6 @@ def search_resource(config):
     return result
 
 
-def build_create_parameters(opts):
-    """
-    - change the input parameters with required name or value format of create API
-    - ignore empty parameter
-    """
-
-    params = dict()
-
-    v = navigate_value(opts, ["group_name"])
-    if not is_empty_value(v):
-        params["scaling_group_name"] = v
-
-    v = navigate_value(opts, ["configuration_id"])
-    if not is_empty_value(v):
-        params["scaling_configuration_id"] = v
-
-    v = navigate_value(opts, ["desire_instance_number"])
-    if not is_empty_value(v):
-        params["desire_instance_number"] = v
-
-    v = navigate_value(opts, ["min_instance_number"])
-    if not is_empty_value(v):
-        params["min_instance_number"] = v
-
-    v = navigate_value(opts, ["max_instance_number"])
-    if not is_empty_value(v):
-        params["max_instance_number"] = v
-
-    v = navigate_value(opts, ["cool_down_time"])
-    if not is_empty_value(v):
-        params["cool_down_time"] = v
-
-    v = navigate_value(opts, ["health_periodic_audit_time"])
-    if not is_empty_value(v):
-        params["health_periodic_audit_time"] = v
-        params["health_periodic_audit_method"] = "NOVA_AUDIT"
-
-    v = navigate_value(opts, ["available_zones"])
-    if not is_empty_value(v):
-        params["available_zones"] = v
-
-    v = navigate_value(opts, ["vpc_id"])
-    if not is_empty_value(v):
-        params["vpc_id"] = v
-
-    v = expand_create_networks(opts)
-    if not is_empty_value(v):
-        params["networks"] = v
-
-    v = expand_create_security_groups(opts)
-    if not is_empty_value(v):
-        params["security_groups"] = v
-
-    v = navigate_value(opts, ["instance_terminate_policy"])
-    if not is_empty_value(v):
-        params["instance_terminate_policy"] = v
-
-    v = navigate_value(opts, ["delete_publicip"])
-    if not is_empty_value(v):
-        params["delete_publicip"] = v
-
-    return params
-
-
-def expand_create_networks(d):
-    v = d.get("networks")
-    if not v:
-        return None
-
-    return [{"id": i} for i in v]
-
-
-def expand_create_security_groups(d):
-    v = d.get("security_group")
-    if not v:
-        return None
-
-    return [{"id": v}]
-
-
-def build_update_parameters(opts):
-    # all params can be updated except on vpc_id
-    update_opts = build_create_parameters(opts)
-    if update_opts.has_key("vpc_id"):
-        update_opts.pop("vpc_id")
-
-    return update_opts
-
-
 def send_create_request(module, params, client):
     # the endpoint: https://as-api.xxx.com/autoscaling-api/v1/{{project_id}}
     url = "scaling_group"
@@ -428,7 +416,7 @@ def send_delete_request(module, params, client):
     url = build_path(module, "scaling_group/{id}")
 
     try:
-        r = client.delete(url, params)
+        r = client.delete(url, params, with_body=False)
     except HwcClientException as ex:
         msg = ("module(hcs_as_group): error running "
                "api(delete), error: %s" % str(ex))
@@ -452,62 +440,16 @@ def send_read_request(module, client):
 
 
 def send_list_request(module, client, url):
-    r = None
+    # the items may be parsed while they are iterated, which raises
+    # the errors of the response then
     try:
-        r = client.get(url)
+        for item in client.list_items(url, "scaling_groups"):
+            yield item
     except HwcClientException as ex:
         msg = ("module(hcs_as_group): error running api(list), "
                "url: %s%s, error: %s" % (client.endpoint, url, str(ex)))
         module.fail_json(msg=msg)
 
-    return navigate_value(r, ["scaling_groups"], None)
-
-
-def fill_read_resp_body(body):
-    """
-    build resource from response body
-    :param body: response body from List or Read
-    :return: resource object in read response format
-    """
-
-    return {
-        "scaling_group_id": body.get("scaling_group_id"),
-        "scaling_group_status": body.get("scaling_group_status"),
-        "scaling_group_name": body.get("scaling_group_name"),
-        "scaling_configuration_id": body.get("scaling_configuration_id"),
-        "desire_instance_number": body.get("desire_instance_number"),
-        "min_instance_number": body.get("min_instance_number"),
-        "max_instance_number": body.get("max_instance_number"),
-        "cool_down_time": body.get("cool_down_time"),
-        "health_periodic_audit_time": body.get("health_periodic_audit_time"),
-        "available_zones": body.get("available_zones"),
-        "vpc_id": body.get("vpc_id"),
-        "networks": body.get("networks"),
-        "security_groups": body.get("security_groups"),
-        "instance_terminate_policy": body.get("instance_terminate_policy"),
-        "delete_publicip": body.get("delete_publicip"),
-    }
-
-
-def build_query_link(opts):
-    query_params = []
-
-    v = navigate_value(opts, ["group_name"])
-    if v or v in [False, 0]:
-        query_params.append(
-            "scaling_group_name=" + (str(v) if v else str(v).lower()))
-
-    v = navigate_value(opts, ["configuration_id"])
-    if v or v in [False, 0]:
-        query_params.append(
-            "scaling_configuration_id=" + (str(v) if v else str(v).lower()))
-
-    query_link = "?limit=10&start_number={start_number}"
-    if query_params:
-        query_link += "&" + "&".join(query_params)
-
-    return query_link
-
 
 if __name__ == '__main__':
     main()
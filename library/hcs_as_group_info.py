@@ -0,0 +1,313 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019 Huawei
+# GNU General Public License v3.0+ (see COPYING or
+# https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+###############################################################################
+# Documentation
+###############################################################################
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ["preview"],
+                    'supported_by': 'community'}
+
+DOCUMENTATION = '''
+---
+module: hcs_as_group_info
+description:
+    - Lists the auto-scaling groups, without changing them.
+short_description: Gathers information about the auto-scaling groups in Huawei Cloud Stack
+version_added: '2.10'
+author: Huawei Inc. (@huaweicloud)
+requirements:
+    - keystoneauth1 >= 3.6.0
+options:
+    group_name:
+        description:
+            - Only list the AS groups of which the name contains this value.
+        type: str
+        required: false
+    configuration_id:
+        description:
+            - Only list the AS groups using this configuration.
+        type: str
+        required: false
+    status:
+        description:
+            - Only list the AS groups in this status.
+        type: str
+        choices: ['INSERVICE', 'PAUSED', 'ERROR', 'DELETING']
+        required: false
+    fields:
+        description:
+            - Only return these fields of every AS group, all of them by default.
+        type: list
+        elements: str
+        choices: ['scaling_group_id', 'scaling_group_status', 'scaling_group_name',
+                  'scaling_configuration_id', 'desire_instance_number', 'min_instance_number',
+                  'max_instance_number', 'cool_down_time', 'health_periodic_audit_time',
+                  'available_zones', 'vpc_id', 'networks', 'security_groups',
+                  'instance_terminate_policy', 'delete_publicip']
+        required: false
+    output_file:
+        description:
+            - Write the AS groups to this local file, one JSON object per line, instead of
+              returning them. Only one page of the list is held in memory, so use it for
+              very many groups. The file is replaced when the listing has finished, in
+              check mode too.
+            - Can not be used with C(regions).
+        type: path
+        required: false
+extends_documentation_fragment: hcs
+'''
+
+EXAMPLES = '''
+# list the auto-scaling groups in service
+- name: list the auto-scaling groups
+  hcs_as_group_info:
+    status: "INSERVICE"
+    fields: ["scaling_group_id", "scaling_group_name", "desire_instance_number"]
+  register: groups
+
+# write all auto-scaling groups to a JSON Lines file
+- name: export the auto-scaling groups
+  hcs_as_group_info:
+    output_file: "/tmp/as_groups.jsonl"
+'''
+
+RETURN = '''
+    groups:
+        description:
+            - The AS groups, with the fields selected by fields.
+        type: list
+        returned: success, when output_file is not set
+    count:
+        description:
+            - The number of the AS groups listed.
+        type: int
+        returned: success
+    output_file:
+        description:
+            - The file the AS groups are written to.
+        type: str
+        returned: success, when output_file is set
+'''
+
+import json
+import os
+import tempfile
+
+from ansible.module_utils.hwc_utils import (
+    HwcClientException, build_path, get_region, navigate_value)
+from ansible.module_utils.hcs_utils import (
+    Config, HcsModule, run_module)
+
+# the max number of items in a page of the list API
+PAGE_SIZE = 100
+
+FIELDS = [
+    'scaling_group_id', 'scaling_group_status', 'scaling_group_name',
+    'scaling_configuration_id', 'desire_instance_number',
+    'min_instance_number', 'max_instance_number', 'cool_down_time',
+    'health_periodic_audit_time', 'available_zones', 'vpc_id', 'networks',
+    'security_groups', 'instance_terminate_policy', 'delete_publicip',
+]
+
+
+def build_module():
+    return HcsModule(
+        argument_spec=dict(
+            group_name=dict(type='str'),
+            configuration_id=dict(type='str'),
+            status=dict(type='str', choices=[
+                'INSERVICE', 'PAUSED', 'ERROR', 'DELETING']),
+            fields=dict(type='list', elements='str', choices=FIELDS),
+            output_file=dict(type='path'),
+        ),
+        # the regions would all replace the same file
+        mutually_exclusive=[['regions', 'output_file']],
+        supports_check_mode=True,
+    )
+
+
+def main():
+    """Main function"""
+
+    module = build_module()
+    config = Config(module, "as", verify=False)
+
+    run_module(config, run)
+
+
+def run(config):
+    """run the module once, return its result"""
+
+    module = config.module
+    fields = module.params.get('fields')
+
+    if module.params.get('id'):
+        groups = [read_resource(config)]
+    else:
+        groups = search_resource(config)
+
+    groups = (project(i, fields) for i in groups)
+
+    path = module.params.get('output_file')
+    if not path:
+        groups = list(groups)
+        return {'changed': False, 'groups': groups, 'count': len(groups)}
+
+    count = write_json_lines(module, path, groups)
+    return {'changed': False, 'output_file': path, 'count': count}
+
+
+def read_resource(config):
+    module = config.module
+    client = config.client(get_region(module), "autoscaling", "project")
+
+    r = send_read_request(module, client)
+    res = fill_read_resp_body(r)
+
+    return res
+
+
+def search_resource(config):
+    """yield every AS group matching the filters, page by page"""
+    module = config.module
+    client = config.client(get_region(module), "autoscaling", "project")
+
+    link = "scaling_group" + build_query_link(module.params)
+
+    p = {'start_number': 0}
+    while True:
+        url = link.format(**p)
+        n = 0
+        with config.tracer.span("list page %d" % (
+                p['start_number'] // PAGE_SIZE + 1)):
+            for item in send_list_request(module, client, url):
+                n += 1
+                yield fill_read_resp_body(item)
+
+        # a short page is the last one
+        if n < PAGE_SIZE:
+            break
+
+        p['start_number'] += PAGE_SIZE
+
+
+def project(group, fields):
+    if not fields:
+        return group
+
+    return dict((k, group.get(k)) for k in fields)
+
+
+def write_json_lines(module, path, groups):
+    """
+    write groups to path, one per line, and return the number of them.
+    The file is replaced at the end, so a failed listing keeps the old one.
+    """
+    d = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=d, prefix=".hcs_as_group_info.")
+    count = 0
+    moved = False
+    try:
+        with os.fdopen(fd, "w") as o:
+            for i in groups:
+                o.write(json.dumps(i, sort_keys=True, separators=(",", ":")))
+                o.write("\n")
+                count += 1
+
+        module.atomic_move(tmp, path)
+        moved = True
+    finally:
+        # fail_json exits by SystemExit, which must not leave the file
+        if not moved and os.path.exists(tmp):
+            os.remove(tmp)
+
+    return count
+
+
+def send_read_request(module, client):
+    url = build_path(module, "scaling_group/{id}")
+
+    r = None
+    try:
+        r = client.get(url)
+    except HwcClientException as ex:
+        msg = ("module(hcs_as_group_info): error running api(read), "
+               "url: %s%s, error: %s" % (client.endpoint, url, str(ex)))
+        module.fail_json(msg=msg)
+
+    return navigate_value(r, ["scaling_group"], None)
+
+
+def send_list_request(module, client, url):
+    # the items may be parsed while they are iterated, which raises
+    # the errors of the response then
+    try:
+        for item in client.list_items(url, "scaling_groups"):
+            yield item
+    except HwcClientException as ex:
+        msg = ("module(hcs_as_group_info): error running api(list), "
+               "url: %s%s, error: %s" % (client.endpoint, url, str(ex)))
+        module.fail_json(msg=msg)
+
+
+def fill_read_resp_body(body):
+    """
+    build resource from response body
+    :param body: response body from List or Read
+    :return: resource object in read response format
+    """
+
+    return {
+        "scaling_group_id": body.get("scaling_group_id"),
+        "scaling_group_status": body.get("scaling_group_status"),
+        "scaling_group_name": body.get("scaling_group_name"),
+        "scaling_configuration_id": body.get("scaling_configuration_id"),
+        "desire_instance_number": body.get("desire_instance_number"),
+        "min_instance_number": body.get("min_instance_number"),
+        "max_instance_number": body.get("max_instance_number"),
+        "cool_down_time": body.get("cool_down_time"),
+        "health_periodic_audit_time": body.get("health_periodic_audit_time"),
+        "available_zones": body.get("available_zones"),
+        "vpc_id": body.get("vpc_id"),
+        "networks": body.get("networks"),
+        "security_groups": body.get("security_groups"),
+        "instance_terminate_policy": body.get("instance_terminate_policy"),
+        "delete_publicip": body.get("delete_publicip"),
+    }
+
+
+def build_query_link(opts):
+    query_params = []
+
+    v = navigate_value(opts, ["group_name"])
+    if v or v in [False, 0]:
+        query_params.append(
+            "scaling_group_name=" + (str(v) if v else str(v).lower()))
+
+    v = navigate_value(opts, ["configuration_id"])
+    if v or v in [False, 0]:
+        query_params.append(
+            "scaling_configuration_id=" + (str(v) if v else str(v).lower()))
+
+    v = navigate_value(opts, ["status"])
+    if v:
+        query_params.append("scaling_group_status=" + str(v))
+
+    query_link = "?limit=%d&start_number={start_number}" % PAGE_SIZE
+    if query_params:
+        query_link += "&" + "&".join(query_params)
+
+    return query_link
+
+
+if __name__ == '__main__':
+    main()
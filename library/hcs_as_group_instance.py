@@ -0,0 +1,402 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019 Huawei
+# GNU General Public License v3.0+ (see COPYING or
+# https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+###############################################################################
+# Documentation
+###############################################################################
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ["preview"],
+                    'supported_by': 'community'}
+
+DOCUMENTATION = '''
+---
+module: hcs_as_group_instance
+description:
+    - Lists the instances of an auto-scaling group, and removes, protects or
+      unprotects the selected ones by the batch instance action API.
+    - The instances are sent in chunks of the max batch size of the API. When a
+      chunk fails, its instances are sent one by one, so that the result tells
+      which of them failed.
+short_description: Manages the instances of an auto-scaling group in Huawei Cloud Stack
+version_added: '2.10'
+author: Huawei Inc. (@huaweicloud)
+requirements:
+    - keystoneauth1 >= 3.6.0
+options:
+    group_id:
+        description:
+            - Specifies the AS group ID.
+        type: str
+        required: true
+    instance_ids:
+        description:
+            - Only select the instances with these IDs.
+        type: list
+        elements: str
+        required: false
+    life_cycle_state:
+        description:
+            - Only select the instances in this life cycle status.
+        type: str
+        choices: ['INSERVICE', 'PENDING', 'REMOVING', 'PENDING_WAIT',
+                  'REMOVING_WAIT']
+        required: false
+    health_status:
+        description:
+            - Only select the instances in this health status.
+        type: str
+        choices: ['INITIALIZING', 'NORMAL', 'ERROR']
+        required: false
+    min_age:
+        description:
+            - Only select the instances created at least this many minutes ago.
+        type: int
+        required: false
+    action:
+        description:
+            - Specifies the action to run on the selected instances. The instances
+              are only listed when it is not set.
+            - The instances being removed are skipped by remove, and the instances
+              already protected or unprotected are skipped by protect and unprotect.
+        type: str
+        choices: ['remove', 'protect', 'unprotect']
+        required: false
+    instance_delete:
+        description:
+            - Whether to delete the instances removed from the group.
+        type: bool
+        default: false
+    wait:
+        description:
+            - Whether to wait until the removed instances have left the group, or
+              the protection of the instances has changed. The instances of the
+              group are listed once per poll.
+        type: bool
+        default: false
+    wait_timeout:
+        description:
+            - The seconds to wait for.
+        type: int
+        default: 600
+extends_documentation_fragment: hcs
+'''
+
+EXAMPLES = '''
+# remove the unhealthy instances of a group
+- name: remove the unhealthy instances
+  hcs_as_group_instance:
+    group_id: "{{ group.id }}"
+    life_cycle_state: "INSERVICE"
+    health_status: "ERROR"
+    action: "remove"
+    instance_delete: true
+    wait: true
+
+# protect the instances older than a day from scaling in
+- name: protect the old instances
+  hcs_as_group_instance:
+    group_id: "{{ group.id }}"
+    min_age: 1440
+    action: "protect"
+'''
+
+RETURN = '''
+    instances:
+        description:
+            - The selected instances, as listed before the action.
+        type: list
+        returned: success
+    results:
+        description:
+            - The id and status of every selected instance, and of every ID of
+              instance_ids not selected. The status is removed, protected or
+              unprotected when the action is run on it, absent when it is not in
+              the group or not selected by the other options, unchanged when it is
+              skipped, and failed, with the error in msg, when the action failed.
+        type: list
+        returned: when action is set
+'''
+
+import datetime
+
+from ansible.module_utils.hwc_utils import (
+    HwcClientException, HwcClientException404, HwcModuleException,
+    build_path, get_region, navigate_value)
+from ansible.module_utils.hcs_utils import (
+    Config, HcsModule, batch_action, run_module, wait_to_finish)
+
+# the max number of IDs in a call of the batch instance action API
+BATCH_SIZE = 10
+
+# the max number of items in a page of the list API
+LIST_PAGE_SIZE = 100
+
+DONE = {"remove": "removed", "protect": "protected",
+        "unprotect": "unprotected"}
+
+
+def build_module():
+    return HcsModule(
+        argument_spec=dict(
+            group_id=dict(type='str', required=True),
+            instance_ids=dict(type='list', elements='str'),
+            life_cycle_state=dict(type='str', choices=[
+                'INSERVICE', 'PENDING', 'REMOVING', 'PENDING_WAIT',
+                'REMOVING_WAIT']),
+            health_status=dict(type='str', choices=[
+                'INITIALIZING', 'NORMAL', 'ERROR']),
+            min_age=dict(type='int'),
+            action=dict(type='str', choices=['remove', 'protect',
+                                             'unprotect']),
+            instance_delete=dict(type='bool', default=False),
+            wait=dict(type='bool', default=False),
+            wait_timeout=dict(type='int', default=600),
+        ),
+        supports_check_mode=True,
+    )
+
+
+def main():
+    """Main function"""
+
+    module = build_module()
+    config = Config(module, "as", verify=False)
+
+    run_module(config, run)
+
+
+def run(config):
+    """run the module once, return its result"""
+
+    module = config.module
+    action = module.params['action']
+
+    with config.tracer.span("list"):
+        instances = select(module, list_resources(config))
+
+    result = {"changed": False, "instances": instances}
+    if not action:
+        return result
+
+    status = dict()
+    ids = []
+    for i in instances:
+        ids.append(i["instance_id"])
+        if skip(i, action):
+            status[i["instance_id"]] = "unchanged"
+
+    seen = set(ids)
+    for i in module.params.get('instance_ids') or []:
+        if i not in seen:
+            seen.add(i)
+            ids.append(i)
+            status[i] = "absent"
+
+    todo = [i for i in ids if i not in status]
+    errors = dict()
+    wait_error = None
+    if todo and not module.check_mode:
+        client = config.client(get_region(module), "autoscaling", "project")
+
+        def _send_one(i):
+            try:
+                if action == "remove":
+                    send_remove_request(module, client, i)
+                else:
+                    send_batch_action_request(module, client, [i], action)
+            except HwcClientException404:
+                status[i] = "absent"
+
+        with config.tracer.span(action):
+            errors = batch_action(
+                todo, BATCH_SIZE,
+                lambda chunk: send_batch_action_request(
+                    module, client, chunk, action),
+                _send_one)
+
+        done = [i for i in todo if i not in errors and i not in status]
+        if done and module.params['wait']:
+            try:
+                with config.tracer.span("wait"):
+                    async_wait(config, done, action)
+            except HwcModuleException as ex:
+                wait_error = str(ex)
+
+    results = []
+    for i in ids:
+        r = {"id": i, "status": status.get(i, DONE[action])}
+        if i in errors:
+            r.update(status="failed", msg=errors[i])
+        results.append(r)
+
+    result.update(
+        changed=any(r["status"] == DONE[action] for r in results),
+        results=results)
+    if errors:
+        result.update(failed=True, msg=(
+            "module(hcs_as_group_instance): %d of the instances failed" %
+            len(errors)))
+    elif wait_error:
+        result.update(failed=True, msg=(
+            "module(hcs_as_group_instance): error waiting for the "
+            "instances, error: %s" % wait_error))
+
+    return result
+
+
+def select(module, instances):
+    """return the instances matching instance_ids and min_age"""
+    ids = module.params.get('instance_ids')
+    if ids is not None:
+        ids = set(ids)
+
+    min_age = module.params.get('min_age')
+    now = datetime.datetime.now(datetime.timezone.utc)
+
+    r = []
+    for i in instances:
+        if ids is not None and i["instance_id"] not in ids:
+            continue
+
+        if min_age is not None:
+            created = parse_time(i.get("create_time"))
+            # an instance of unknown age is never old enough
+            if created is None or \
+                    now - created < datetime.timedelta(minutes=min_age):
+                continue
+
+        r.append(i)
+
+    return r
+
+
+def skip(instance, action):
+    if action == "remove":
+        return (instance.get("life_cycle_state") or "").startswith(
+            "REMOVING")
+
+    return bool(instance.get("protect_from_scaling_down")) == (
+        action == "protect")
+
+
+def parse_time(v):
+    try:
+        return datetime.datetime.strptime(v, "%Y-%m-%dT%H:%M:%SZ").replace(
+            tzinfo=datetime.timezone.utc)
+    except (TypeError, ValueError):
+        return None
+
+
+def async_wait(config, ids, action):
+    """poll the instance list of the group until the action is done"""
+    module = config.module
+
+    def _refresh():
+        instances = dict((i["instance_id"], i)
+                         for i in list_resources(config, filters=False))
+
+        if action == "remove":
+            left = [i for i in ids if i in instances]
+        else:
+            left = [i for i in ids
+                    if i in instances and not skip(instances[i], action)]
+
+        return instances, "done" if not left else "pending"
+
+    return wait_to_finish(config, ["done"], ["pending"], _refresh,
+                          module.params['wait_timeout'])
+
+
+def list_resources(config, filters=True):
+    """yield every instance of the group, page by page"""
+    module = config.module
+    client = config.client(get_region(module), "autoscaling", "project")
+
+    link = build_path(module, "scaling_group_instance/{group_id}/list") + \
+        build_query_link(module.params, filters)
+
+    p = {'start_number': 0}
+    while True:
+        url = link.format(**p)
+        n = 0
+        for item in send_list_request(module, client, url):
+            n += 1
+            yield fill_list_resp_body(item)
+
+        # a short page is the last one
+        if n < LIST_PAGE_SIZE:
+            break
+
+        p['start_number'] += LIST_PAGE_SIZE
+
+
+def send_batch_action_request(module, client, ids, action):
+    # the endpoint: https://as-api.xxx.com/autoscaling-api/v1/{{project_id}}
+    url = build_path(module, "scaling_group_instance/{group_id}/action")
+
+    body = {"instances_id": ids, "action": action.upper()}
+    if action == "remove":
+        body["instance_delete"] = \
+            "yes" if module.params['instance_delete'] else "no"
+
+    return client.post(url, body, with_body=False)
+
+
+def send_remove_request(module, client, instance_id):
+    url = "scaling_group_instance/%s?instance_delete=%s" % (
+        instance_id, "yes" if module.params['instance_delete'] else "no")
+    return client.delete(url, None, with_body=False)
+
+
+def send_list_request(module, client, url):
+    # the items may be parsed while they are iterated, which raises
+    # the errors of the response then
+    try:
+        for item in client.list_items(url, "scaling_group_instances"):
+            yield item
+    except HwcClientException as ex:
+        msg = ("module(hcs_as_group_instance): error running api(list), "
+               "url: %s%s, error: %s" % (client.endpoint, url, str(ex)))
+        module.fail_json(msg=msg)
+
+
+def fill_list_resp_body(body):
+    return {
+        "instance_id": body.get("instance_id"),
+        "instance_name": body.get("instance_name"),
+        "scaling_configuration_id": body.get("scaling_configuration_id"),
+        "life_cycle_state": body.get("life_cycle_state"),
+        "health_status": body.get("health_status"),
+        "protect_from_scaling_down": body.get("protect_from_scaling_down"),
+        "create_time": body.get("create_time"),
+    }
+
+
+def build_query_link(opts, filters=True):
+    query_params = []
+
+    v = navigate_value(opts, ["life_cycle_state"]) if filters else None
+    if v:
+        query_params.append("life_cycle_state=" + str(v))
+
+    v = navigate_value(opts, ["health_status"]) if filters else None
+    if v:
+        query_params.append("health_status=" + str(v))
+
+    query_link = "?limit=%d&start_number={start_number}" % LIST_PAGE_SIZE
+    if query_params:
+        query_link += "&" + "&".join(query_params)
+
+    return query_link
+
+
+if __name__ == '__main__':
+    main()
@@ -42,13 +42,16 @@ options:
         description:
             - Specifies the name of the AS policy. Value requirements consists of 1 to 64
               characters, including letters, digits, underscores(_), and hyphens(-).
+            - It is required unless policies is set.
         type: str
-        required: true
+        required: false
     policy_type:
         description:
             - Specifies the type of the AS policy.
+            - It is required with policy_name. With policies it is the type of the
+              policies which do not set one.
         type: str
-        required: true
+        required: false
         choices: ['ALARM', 'SCHEDULED', 'RECURRENCE']
     alarm_id:
         description:
@@ -113,6 +116,24 @@ options:
             - Specifies the cooling duration (in seconds). The value ranges from 0 to 86400.
         type: int
         default: 900
+    policies:
+        description:
+            - The complete set of the AS policies of the group, each a dict of policy_name,
+              policy_type, alarm_id, scheduled_policy, policy_action and cool_down_time,
+              as the options of the same names. The options of the task are the defaults
+              of the policies.
+            - The policies of the group are listed once, matched by name and compared with
+              the desired ones, and only the missing ones are created, the different ones
+              updated, or with state absent, the listed ones deleted.
+        type: list
+        elements: dict
+        required: false
+    exclusive:
+        description:
+            - With policies and state present, also delete the policies of the group
+              which are not listed.
+        type: bool
+        default: false
 extends_documentation_fragment: hcs
 '''
 
@@ -146,6 +167,48 @@ EXAMPLES = '''
     policy_action:
       operation: "ADD"
       instance_number: 1
+# create several auto-scaling policies in one module run
+- name: create auto-scaling policies
+  hcs_as_policy:
+    group_id: "{{ group.id }}"
+    policy_type: "RECURRENCE"
+    cool_down_time: 600
+    batch:
+      - policy_name: "ansible_as_policy_out"
+        scheduled_policy:
+          launch_time: "07:00"
+          recurrence_type: "Daily"
+        policy_action:
+          operation: "ADD"
+          instance_number: 1
+      - policy_name: "ansible_as_policy_in"
+        scheduled_policy:
+          launch_time: "22:00"
+          recurrence_type: "Daily"
+        policy_action:
+          operation: "REMOVE"
+          instance_number: 1
+# make the listed policies the only policies of the group
+- name: reconcile the auto-scaling policies of the group
+  hcs_as_policy:
+    group_id: "{{ group.id }}"
+    policy_type: "RECURRENCE"
+    exclusive: true
+    policies:
+      - policy_name: "ansible_as_policy_out"
+        scheduled_policy:
+          launch_time: "07:00"
+          recurrence_type: "Daily"
+        policy_action:
+          operation: "ADD"
+          instance_number: 1
+      - policy_name: "ansible_as_policy_in"
+        scheduled_policy:
+          launch_time: "22:00"
+          recurrence_type: "Daily"
+        policy_action:
+          operation: "REMOVE"
+          instance_number: 1
 '''
 
 RETURN = '''
@@ -154,36 +217,74 @@ RETURN = '''
             - Specifies the ID of the AS policy.
         type: str
         returned: success
+    results:
+        description:
+            - The result of every item when batch is set, with the item in
+              item.
+        type: list
+        returned: when batch is set
+    policies:
+        description:
+            - The policy_name, id and action of every policy when policies is set. The
+              action is create, update, delete or null when the policy is not changed.
+        type: list
+        returned: when policies is set
 '''
 
+import collections
+
 from ansible.module_utils.hwc_utils import (
     HwcClientException, are_different_dicts, build_path, get_region,
-    is_empty_value, navigate_value, wait_to_finish)
+    navigate_value, wait_to_finish)
 from ansible.module_utils.hcs_utils import (
-    Config, HcsModule)
+    Config, HcsModule, run_module)
+from ansible.module_utils.hcs_as_utils import (
+    build_policy_create_parameters, build_policy_identity_object,
+    build_policy_query_link, build_policy_update_parameters,
+    fill_policy_resp_body)
+
+# the max number of items in a page of the list API
+LIST_PAGE_SIZE = 100
+
+
+def build_policy_spec():
+    """the options of one policy"""
+    return dict(
+        policy_name=dict(type='str'),
+        policy_type=dict(type='str', choices=['ALARM', 'SCHEDULED', 'RECURRENCE']),
+        alarm_id=dict(type='str'),
+        scheduled_policy=dict(type='dict', options=dict(
+            launch_time=dict(type='str', required=True),
+            recurrence_type=dict(type='str', choices=['Daily', 'Weekly', 'Monthly']),
+            recurrence_value=dict(type='str'),
+            start_time=dict(type='str'),
+            end_time=dict(type='str'),
+        )),
+        policy_action=dict(type='dict', options=dict(
+            operation=dict(type='str', choices=['ADD', 'REMOVE', 'SET']),
+            instance_number=dict(type='int', default=1),
+        )),
+        cool_down_time=dict(type='int'),
+    )
 
 
 def build_module():
+    policy_spec = build_policy_spec()
+    policy_spec['policy_name']['required'] = True
+
+    argument_spec = build_policy_spec()
+    argument_spec.update(
+        state=dict(type='str', default='present', choices=['present', 'absent']),
+        group_id=dict(type='str', required=True),
+        policies=dict(type='list', elements='dict', options=policy_spec),
+        exclusive=dict(type='bool', default=False),
+    )
+
     return HcsModule(
-        argument_spec=dict(
-            state=dict(type='str', default='present', choices=['present', 'absent']),
-            group_id=dict(type='str', required=True),
-            policy_name=dict(type='str', required=True),
-            policy_type=dict(type='str', required=True, choices=['ALARM', 'SCHEDULED', 'RECURRENCE']),
-            alarm_id=dict(type='str'),
-            scheduled_policy=dict(type='dict', options=dict(
-                launch_time=dict(type='str', required=True),
-                recurrence_type=dict(type='str', choices=['Daily', 'Weekly', 'Monthly']),
-                recurrence_value=dict(type='str'),
-                start_time=dict(type='str'),
-                end_time=dict(type='str'),
-            )),
-            policy_action=dict(type='dict', options=dict(
-                operation=dict(type='str', choices=['ADD', 'REMOVE', 'SET']),
-                instance_number=dict(type='int', default=1),
-            )),
-            cool_down_time=dict(type='int'),
-        ),
+        argument_spec=argument_spec,
+        required_one_of=[['policy_name', 'policies']],
+        mutually_exclusive=[['policy_name', 'policies'], ['policies', 'id'],
+                            ['policies', 'batch']],
         supports_check_mode=True,
     )
 
@@ -194,80 +295,187 @@ def main():
     module = build_module()
     config = Config(module, "as", verify=False)
 
-    try:
-        resource = dict()
-        if module.params.get('id'):
-            # read as policy resource by id
-            resource = read_resource(config)
-        else:
-            # search as policy resource by name
-            v = search_resource(config)
-            n = len(v)
-            if n > 1:
-                raise Exception("Found more than one resource(%s)" % ", ".join([
-                    navigate_value(i, ["scaling_policy_id"])
-                    for i in v
-                ]))
-
-            if n == 1:
-                module.params['id'] = navigate_value(v[0], ["scaling_policy_id"])
-                resource = v[0]
-
-        changed = False
-        result = dict()
-        if module.params['state'] == 'present':
-            if not resource:
-                if not module.check_mode:
-                    result['action'] = "create"
+    run_module(config, run)
+
+
+def run(config):
+    """run the module once, return its result"""
+
+    module = config.module
+    if module.params.get('policies') is not None:
+        return reconcile(config)
+
+    if not module.params.get('policy_type'):
+        raise Exception("missing required arguments: policy_type")
+
+    plans = config.plan_cache
+    # a run given the id reads the resource by it, a plan saves nothing
+    plan_key = None
+    if plans and not module.params.get('id'):
+        plan_key = plans.key(module)
+
+    plan = None
+    if plan_key and not module.check_mode:
+        # the plan of the check mode run replaces the search
+        client = config.client(get_region(module), "autoscaling", "project")
+        plan = plans.resource(
+            config, client, plan_key, "scaling_policy/%s", "scaling_policy",
+            fill_policy_resp_body)
+
+    resource = dict()
+    if plan:
+        module.params['id'] = plan["id"]
+        resource = plan["resource"]
+    elif module.params.get('id'):
+        # read as policy resource by id
+        resource = read_resource(config)
+    else:
+        # search as policy resource by name
+        v = search_resource(config)
+        n = len(v)
+        if n > 1:
+            raise Exception("Found more than one resource(%s)" % ", ".join([
+                navigate_value(i, ["scaling_policy_id"])
+                for i in v
+            ]))
+
+        if n == 1:
+            module.params['id'] = navigate_value(v[0], ["scaling_policy_id"])
+            resource = v[0]
+
+    changed = False
+    result = dict()
+    if module.params['state'] == 'present':
+        if not resource:
+            if not module.check_mode:
+                result['action'] = "create"
+                with config.tracer.span("create"):
                     create(config)
-                changed = True
-            else:
-                obj = build_identity_object(module)
-                if are_different_dicts(obj, resource):
-                    if not module.check_mode:
-                        result['action'] = "update"
-                        update(config)
-                    changed = True
+            changed = True
         else:
-            if resource:
+            obj = build_identity_object(module)
+            with config.tracer.span("compare"):
+                different = are_different_dicts(obj, resource)
+            if different:
                 if not module.check_mode:
-                    result['action'] = "delete"
-                    delete(config)
+                    result['action'] = "update"
+                    with config.tracer.span("update"):
+                        update(config)
                 changed = True
+    else:
+        if resource:
+            if not module.check_mode:
+                result['action'] = "delete"
+                with config.tracer.span("delete"):
+                    delete(config)
+            changed = True
 
-    except Exception as ex:
-        module.fail_json(msg=str(ex))
+    result['changed'] = changed
+    result['id'] = module.params['id']
 
-    else:
-        result['changed'] = changed
-        result['id'] = module.params['id']
-        module.exit_json(**result)
+    if plan_key and module.check_mode:
+        plans.save(plan_key, module, resource)
 
+    return result
 
-def build_identity_object(module):
+
+def reconcile(config):
     """
-    build resource from input module params
-    :param module: input module
-    :return: resource object in read response format, missing params equal None
+    bring the policies of the group to the set given by the option
+    policies, with one list of the policies of the group
     """
+    module = config.module
+    params = module.params
+
+    desired = []
+    for i in params['policies']:
+        p = dict(params, policies=None)
+        p.update((k, v) for k, v in i.items() if v is not None)
+        if not p.get('policy_type'):
+            raise Exception("policy_type is required for the policy %s" % (
+                p['policy_name']))
+        desired.append(p)
+
+    names = collections.Counter(p['policy_name'] for p in desired)
+    dup = sorted(k for k, n in names.items() if n > 1)
+    if dup:
+        raise Exception("Found duplicate policy names(%s)" % ", ".join(dup))
+
+    existing = dict()
+    with config.tracer.span("list"):
+        for item in list_resources(config):
+            existing.setdefault(
+                item["scaling_policy_name"], []).append(item)
+
+    for p in desired:
+        v = existing.get(p['policy_name'], [])
+        if len(v) > 1:
+            raise Exception("Found more than one resource(%s)" % ", ".join([
+                navigate_value(i, ["scaling_policy_id"])
+                for i in v
+            ]))
+
+    actions = {"create": create, "update": update, "delete": delete}
+    changed = False
+    result = []
+    try:
+        for p in desired:
+            v = existing.pop(p['policy_name'], None)
+            resource = v[0] if v else None
+            module.params = p
+            p['id'] = navigate_value(resource, ["scaling_policy_id"]) \
+                if resource else None
+
+            action = None
+            if p['state'] == 'present':
+                if not resource:
+                    action = "create"
+                else:
+                    obj = build_identity_object(module)
+                    with config.tracer.span("compare"):
+                        if are_different_dicts(obj, resource):
+                            action = "update"
+            elif resource:
+                action = "delete"
+
+            if action:
+                changed = True
+                if not module.check_mode:
+                    with config.tracer.span(action):
+                        actions[action](config)
+
+            result.append({"policy_name": p['policy_name'], "id": p['id'],
+                           "action": action})
+
+        if params['exclusive'] and params['state'] == 'present':
+            for v in existing.values():
+                for resource in v:
+                    module.params = dict(
+                        params, id=resource["scaling_policy_id"])
+                    changed = True
+                    if not module.check_mode:
+                        with config.tracer.span("delete"):
+                            delete(config)
+
+                    result.append({
+                        "policy_name": resource["scaling_policy_name"],
+                        "id": resource["scaling_policy_id"],
+                        "action": "delete"})
+    finally:
+        module.params = params
+
+    return {"changed": changed, "policies": result}
+
 
-    return {
-        "scaling_group_id": module.params.get("group_id"),
-        "scaling_policy_id": module.params.get("id"),
-        "scaling_policy_name": module.params.get("policy_name"),
-        "scaling_policy_type": module.params.get("policy_type"),
-        "scaling_policy_action": module.params.get("policy_action"),
-        "alarm_id": module.params.get("alarm_id"),
-        "scheduled_policy": module.params.get("scheduled_policy"),
-        "cool_down_time": module.params.get("cool_down_time"),
-    }
+def build_identity_object(module):
+    return build_policy_identity_object(module.params)
 
 
 def create(config):
     module = config.module
     client = config.client(get_region(module), "autoscaling", "project")
 
-    params = build_create_parameters(module.params)
+    params = build_policy_create_parameters(module.params)
     r = send_create_request(module, params, client)
     module.params['id'] = navigate_value(r, ["scaling_policy_id"])
 
@@ -276,7 +484,7 @@ def update(config):
     module = config.module
     client = config.client(get_region(module), "autoscaling", "project")
 
-    params = build_update_parameters(module.params)
+    params = build_policy_update_parameters(module.params)
     r = send_update_request(module, params, client)
     module.params['id'] = navigate_value(r, ["scaling_policy_id"])
 
@@ -293,33 +501,65 @@ def read_resource(config):
     client = config.client(get_region(module), "autoscaling", "project")
 
     r = send_read_request(module, client)
-    res = fill_read_resp_body(r)
+    res = fill_policy_resp_body(r)
 
     return res
 
 
+def list_resources(config):
+    """yield every policy of the group, page by page"""
+    module = config.module
+    client = config.client(get_region(module), "autoscaling", "project")
+
+    path = build_path(module, "scaling_policy/{group_id}/list")
+    link = path + build_policy_query_link(module.params, filters=False,
+                                          limit=LIST_PAGE_SIZE)
+
+    p = {'start_number': 0}
+    while True:
+        url = link.format(**p)
+        n = 0
+        with config.tracer.span("list page %d" % (
+                p['start_number'] // LIST_PAGE_SIZE + 1)):
+            for item in send_list_request(module, client, url):
+                n += 1
+                yield fill_policy_resp_body(item)
+
+        # a short page is the last one
+        if n < LIST_PAGE_SIZE:
+            break
+
+        p['start_number'] += LIST_PAGE_SIZE
+
+
 def search_resource(config):
     module = config.module
     client = config.client(get_region(module), "autoscaling", "project")
 
     identity_obj = build_identity_object(module)
     path = build_path(module, "scaling_policy/{group_id}/list")
-    query_link = build_query_link(module.params)
+    # a batch run lists all policies of the group once until something is
+    # written, then every item picks its own from the cached list
+    cache = config.list_cache
+    query_link = build_policy_query_link(
+        module.params, filters=cache is None or cache.writes > 0)
     link = path + query_link
 
     result = []
     p = {'start_number': 0}
     while True:
         url = link.format(**p)
-        r = send_list_request(module, client, url)
-        if not r:
+        n = 0
+        with config.tracer.span("search page %d" % (p['start_number'] // 10 + 1)):
+            for item in send_list_request(module, client, url):
+                n += 1
+                item = fill_policy_resp_body(item)
+                if not are_different_dicts(identity_obj, item):
+                    result.append(item)
+
+        if not n:
             break
 
-        for item in r:
-            item = fill_read_resp_body(item)
-            if not are_different_dicts(identity_obj, item):
-                result.append(item)
-
         if len(result) > 1:
             break
 
@@ -328,102 +568,6 @@ def search_resource(config):
     return result
 
 
-def expand_scheduled_policy_opts(d):
-    opts = d.get("scheduled_policy")
-    if not opts:
-        return None
-
-    params = dict()
-
-    v = navigate_value(opts, ["launch_time"])
-    if not is_empty_value(v):
-        params["launch_time"] = v
-
-    v = navigate_value(opts, ["recurrence_type"])
-    if not is_empty_value(v):
-        params["recurrence_type"] = v
-
-    v = navigate_value(opts, ["recurrence_value"])
-    if not is_empty_value(v):
-        params["recurrence_value"] = v
-
-    v = navigate_value(opts, ["start_time"])
-    if not is_empty_value(v):
-        params["start_time"] = v
-
-    v = navigate_value(opts, ["end_time"])
-    if not is_empty_value(v):
-        params["end_time"] = v
-
-    return params
-
-
-def expand_policy_action_opts(d):
-    opts = d.get("policy_action")
-    if not opts:
-        return None
-
-    params = dict()
-
-    v = navigate_value(opts, ["operation"])
-    if not is_empty_value(v):
-        params["operation"] = v
-
-    v = navigate_value(opts, ["instance_number"])
-    if not is_empty_value(v):
-        params["instance_number"] = v
-
-    return params
-
-
-def build_create_parameters(opts):
-    """
-    - change the input parameters with required name or value format of create API
-    - ignore empty parameter
-    """
-
-    params = dict()
-
-    v = navigate_value(opts, ["group_id"])
-    if not is_empty_value(v):
-        params["scaling_group_id"] = v
-
-    v = navigate_value(opts, ["policy_name"])
-    if not is_empty_value(v):
-        params["scaling_policy_name"] = v
-
-    v = navigate_value(opts, ["policy_type"])
-    if not is_empty_value(v):
-        params["scaling_policy_type"] = v
-
-    v = navigate_value(opts, ["alarm_id"])
-    if not is_empty_value(v):
-        params["alarm_id"] = v
-
-    v = expand_scheduled_policy_opts(opts)
-    if not is_empty_value(v):
-        params["scheduled_policy"] = v
-
-    v = expand_policy_action_opts(opts)
-    if not is_empty_value(v):
-        params["scaling_policy_action"] = v
-
-    v = navigate_value(opts, ["cool_down_time"])
-    if not is_empty_value(v):
-        params["cool_down_time"] = v
-
-    return params
-
-
-def build_update_parameters(opts):
-    # all params can be updated except on group_id
-    update_opts = build_create_parameters(opts)
-    if update_opts.has_key("scaling_group_id"):
-        update_opts.pop("scaling_group_id")
-
-    return update_opts
-
-
 def send_create_request(module, params, client):
     # the endpoint: https://as-api.xxx.com/autoscaling-api/v1/{{project_id}}
     url = "scaling_policy"
@@ -455,7 +599,7 @@ def send_delete_request(module, params, client):
     url = build_path(module, "scaling_policy/{id}")
 
     try:
-        r = client.delete(url, params)
+        r = client.delete(url, params, with_body=False)
     except HwcClientException as ex:
         msg = ("module(hcs_as_policy): error running "
                "api(delete), error: %s" % str(ex))
@@ -479,73 +623,16 @@ def send_read_request(module, client):
 
 
 def send_list_request(module, client, url):
-    r = None
+    # the items may be parsed while they are iterated, which raises
+    # the errors of the response then
     try:
-        r = client.get(url)
+        for item in client.list_items(url, "scaling_policies"):
+            yield item
     except HwcClientException as ex:
         msg = ("module(hcs_as_policy): error running api(list), "
                "url: %s%s, error: %s" % (client.endpoint, url, str(ex)))
         module.fail_json(msg=msg)
 
-    return navigate_value(r, ["scaling_policies"], None)
-
-
-def fill_read_resp_body(body):
-    """
-    build resource from response body
-    :param body: response body from List or Read
-    :return: resource object in read response format
-    """
-    policy_action = None
-    v = body.get("scaling_policy_action")
-    if v:
-        policy_action = {
-            "operation": v.get("operation"),
-            "instance_number": v.get("instance_number")
-        }
-
-    scheduled_policy = None
-    v = body.get("scheduled_policy")
-    if v:
-        scheduled_policy = {
-            "launch_time": v.get("launch_time"),
-            "recurrence_type": v.get("recurrence_type"),
-            "recurrence_value": v.get("recurrence_value"),
-            "start_time": v.get("start_time"),
-            "end_time": v.get("end_time")
-        }
-
-    return {
-        "scaling_group_id": body.get("scaling_group_id"),
-        "scaling_policy_id": body.get("scaling_policy_id"),
-        "scaling_policy_name": body.get("scaling_policy_name"),
-        "scaling_policy_type": body.get("scaling_policy_type"),
-        "alarm_id": body.get("alarm_id"),
-        "cool_down_time": body.get("cool_down_time"),
-        "scaling_policy_action": policy_action,
-        "scheduled_policy": scheduled_policy
-    }
-
-
-def build_query_link(opts):
-    query_params = []
-
-    v = navigate_value(opts, ["policy_name"])
-    if v or v in [False, 0]:
-        query_params.append(
-            "scaling_policy_name=" + (str(v) if v else str(v).lower()))
-
-    v = navigate_value(opts, ["policy_type"])
-    if v or v in [False, 0]:
-        query_params.append(
-            "scaling_policy_type=" + (str(v) if v else str(v).lower()))
-
-    query_link = "?limit=10&start_number={start_number}"
-    if query_params:
-        query_link += "&" + "&".join(query_params)
-
-    return query_link
-
 
 if __name__ == '__main__':
     main()
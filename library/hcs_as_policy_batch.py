@@ -0,0 +1,230 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019 Huawei
+# GNU General Public License v3.0+ (see COPYING or
+# https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+###############################################################################
+# Documentation
+###############################################################################
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ["preview"],
+                    'supported_by': 'community'}
+
+DOCUMENTATION = '''
+---
+module: hcs_as_policy_batch
+description:
+    - Deletes, pauses or resumes many auto-scaling policies by the batch action API.
+    - The policies are sent in chunks of the max batch size of the API. When a chunk
+      fails, its policies are sent one by one, so that the result tells which of them
+      failed.
+short_description: Runs a batch action on auto-scaling policies in Huawei Cloud Stack
+version_added: '2.10'
+author: Huawei Inc. (@huaweicloud)
+requirements:
+    - keystoneauth1 >= 3.6.0
+options:
+    policy_ids:
+        description:
+            - Specifies the IDs of the AS policies.
+        type: list
+        elements: str
+        required: true
+    action:
+        description:
+            - Specifies the action to run on the AS policies.
+        type: str
+        choices: ['delete', 'pause', 'resume']
+        required: true
+    group_id:
+        description:
+            - Specifies the AS group ID of the policies. When it is set, the policies of
+              the group are listed once, and the policies which are missing or in the
+              status the action leads to are skipped, in check mode too.
+        type: str
+        required: false
+extends_documentation_fragment: hcs
+'''
+
+EXAMPLES = '''
+# pause the auto-scaling policies of a group
+- name: pause the auto-scaling policies
+  hcs_as_policy_batch:
+    group_id: "{{ group.id }}"
+    policy_ids: "{{ policies.policies | map(attribute='id') | list }}"
+    action: "pause"
+'''
+
+RETURN = '''
+    results:
+        description:
+            - The id and status of every AS policy. The status is deleted, paused or
+              resumed when the action is run on it, absent or unchanged when it is
+              skipped, and failed, with the error in msg, when the action failed.
+        type: list
+        returned: always
+'''
+
+from ansible.module_utils.hwc_utils import (
+    HwcClientException, HwcClientException404, build_path, get_region,
+    navigate_value)
+from ansible.module_utils.hcs_utils import (
+    Config, HcsModule, batch_action, run_module)
+
+# the max number of IDs in a call of the batch action API
+BATCH_SIZE = 50
+
+# the max number of items in a page of the list API
+LIST_PAGE_SIZE = 100
+
+# the status of a policy after the action
+STATUS = {"pause": "PAUSED", "resume": "INSERVICE"}
+
+DONE = {"delete": "deleted", "pause": "paused", "resume": "resumed"}
+
+
+def build_module():
+    return HcsModule(
+        argument_spec=dict(
+            policy_ids=dict(type='list', elements='str', required=True),
+            action=dict(type='str', required=True,
+                        choices=['delete', 'pause', 'resume']),
+            group_id=dict(type='str'),
+        ),
+        supports_check_mode=True,
+    )
+
+
+def main():
+    """Main function"""
+
+    module = build_module()
+    config = Config(module, "as", verify=False)
+
+    run_module(config, run)
+
+
+def run(config):
+    """run the module once, return its result"""
+
+    module = config.module
+    action = module.params['action']
+
+    # keep the order, drop the repeated IDs
+    ids = []
+    seen = set()
+    for i in module.params['policy_ids']:
+        if i not in seen:
+            seen.add(i)
+            ids.append(i)
+
+    status = dict()
+    if module.params.get('group_id'):
+        with config.tracer.span("list"):
+            existing = dict(
+                (navigate_value(i, ["scaling_policy_id"]),
+                 navigate_value(i, ["policy_status"]))
+                for i in list_resources(config))
+
+        for i in ids:
+            if i not in existing:
+                status[i] = "absent"
+            elif action != "delete" and existing[i] == STATUS[action]:
+                status[i] = "unchanged"
+
+    todo = [i for i in ids if i not in status]
+    errors = dict()
+    if todo and not module.check_mode:
+        client = config.client(get_region(module), "autoscaling", "project")
+
+        def _send_one(i):
+            try:
+                send_action_request(client, i, action)
+            except HwcClientException404:
+                if action != "delete":
+                    raise
+                status[i] = "absent"
+
+        with config.tracer.span(action):
+            errors = batch_action(
+                todo, BATCH_SIZE,
+                lambda chunk: send_batch_action_request(
+                    client, chunk, action),
+                _send_one)
+
+    results = []
+    for i in ids:
+        r = {"id": i, "status": status.get(i, DONE[action])}
+        if i in errors:
+            r.update(status="failed", msg=errors[i])
+        results.append(r)
+
+    result = {"changed": any(r["status"] == DONE[action] for r in results),
+              "results": results}
+    if errors:
+        result.update(failed=True, msg=(
+            "module(hcs_as_policy_batch): %d of the policies failed" % (
+                len(errors))))
+
+    return result
+
+
+def list_resources(config):
+    """yield every policy of the group, page by page"""
+    module = config.module
+    client = config.client(get_region(module), "autoscaling", "project")
+
+    link = build_path(module, "scaling_policy/{group_id}/list") + \
+        "?limit=%d&start_number={start_number}" % LIST_PAGE_SIZE
+
+    p = {'start_number': 0}
+    while True:
+        url = link.format(**p)
+        n = 0
+        for item in send_list_request(module, client, url):
+            n += 1
+            yield item
+
+        # a short page is the last one
+        if n < LIST_PAGE_SIZE:
+            break
+
+        p['start_number'] += LIST_PAGE_SIZE
+
+
+def send_batch_action_request(client, ids, action):
+    # the endpoint: https://as-api.xxx.com/autoscaling-api/v1/{{project_id}}
+    url = "scaling_policies/action"
+    return client.post(url, {"scaling_policy_id": ids, "action": action},
+                       with_body=False)
+
+
+def send_action_request(client, policy_id, action):
+    if action == "delete":
+        url = "scaling_policy/%s" % policy_id
+        return client.delete(url, None, with_body=False)
+
+    url = "scaling_policy/%s/action" % policy_id
+    return client.post(url, {"action": action}, with_body=False)
+
+
+def send_list_request(module, client, url):
+    # the items may be parsed while they are iterated, which raises
+    # the errors of the response then
+    try:
+        for item in client.list_items(url, "scaling_policies"):
+            yield item
+    except HwcClientException as ex:
+        msg = ("module(hcs_as_policy_batch): error running api(list), "
+               "url: %s%s, error: %s" % (client.endpoint, url, str(ex)))
+        module.fail_json(msg=msg)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,590 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019 Huawei
+# GNU General Public License v3.0+ (see COPYING or
+# https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+###############################################################################
+# Documentation
+###############################################################################
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ["preview"],
+                    'supported_by': 'community'}
+
+DOCUMENTATION = '''
+---
+module: hcs_as_stack
+description:
+    - Manages an auto-scaling configuration, the auto-scaling group using it and the
+      policies of the group, given as one nested spec.
+    - The reads and the writes are the nodes of a dependency graph, and every node
+      runs as soon as the nodes it depends on are done, at the same time as the other
+      ready ones. The configuration and the group are read together, the policies of
+      the group are listed once, and the policies are created, updated or deleted in
+      parallel.
+    - When a node fails, the nodes depending on it are skipped, and the others still
+      run. The result tells the plan and the outcome of every node.
+short_description: Manages an auto-scaling stack in Huawei Cloud Stack
+version_added: '2.10'
+author: Huawei Inc. (@huaweicloud)
+requirements:
+    - keystoneauth1 >= 3.6.0
+options:
+    state:
+        description:
+            - Whether the stack should exist in Huawei Cloud Stack. With absent the
+              policies are deleted first, then the group, and the configuration once
+              the group is gone.
+        type: str
+        choices: ['present', 'absent']
+        default: 'present'
+    configuration:
+        description:
+            - The AS configuration, a dict of configuration_name, instance_id, flavor_id,
+              image_id, disks, ssh_key_name, admin_pass, user_data, server_metadata and
+              public_ip, as the options of the same names of hcs_as_configuration.
+            - As with hcs_as_configuration, an existing configuration is used only when
+              it matches all the options set, otherwise a new one is created, and the
+              group is updated to use it.
+        type: dict
+        required: true
+    group:
+        description:
+            - The AS group, a dict of group_name, desire_instance_number,
+              min_instance_number, max_instance_number, cool_down_time,
+              health_periodic_audit_time, available_zones, vpc_id, networks,
+              security_group, instance_terminate_policy and delete_publicip, as the
+              options of the same names of hcs_as_group. vpc_id and networks are
+              required to create the group.
+            - The group is matched by group_name, and updated when it differs.
+        type: dict
+        required: true
+    policies:
+        description:
+            - The AS policies of the group, each a dict of policy_name, policy_type,
+              alarm_id, scheduled_policy, policy_action and cool_down_time, as the
+              options of the same names of hcs_as_policy.
+            - The policies are matched by policy_name. The policies of the group which
+              are not listed are left alone.
+        type: list
+        elements: dict
+        default: []
+    max_workers:
+        description:
+            - The max number of the nodes run at the same time.
+        type: int
+        default: 8
+    wait_timeout:
+        description:
+            - The seconds to wait for the group to be gone before its configuration is
+              deleted, with state absent.
+        type: int
+        default: 600
+extends_documentation_fragment: hcs
+'''
+
+EXAMPLES = '''
+# create an auto-scaling configuration, a group using it and its policies
+- name: create an auto-scaling stack
+  hcs_as_stack:
+    configuration:
+      configuration_name: "ansible_as_configuration_test"
+      flavor_id: "0c324e05-f9d6-431c-8010-a33fcd4708e9"
+      image_id: "ccb858d6-1aa8-433c-8cc3-4500a56cee2f"
+      disks:
+        - size: 40
+          volume_type: "SATA"
+          disk_type: "SYS"
+      ssh_key_name: "ansible_key"
+    group:
+      group_name: "ansible_as_group_test"
+      desire_instance_number: 2
+      min_instance_number: 1
+      max_instance_number: 5
+      vpc_id: "575f9799-e8d8-46e8-9bfd-17e48bb2a569"
+      networks: ["e5efc2c4-095f-4cb5-b6fc-bdeaeed8a08e"]
+    policies:
+      - policy_name: "ansible_as_policy_out"
+        policy_type: "RECURRENCE"
+        scheduled_policy:
+          launch_time: "07:00"
+          recurrence_type: "Daily"
+        policy_action:
+          operation: "ADD"
+          instance_number: 1
+      - policy_name: "ansible_as_policy_in"
+        policy_type: "RECURRENCE"
+        scheduled_policy:
+          launch_time: "22:00"
+          recurrence_type: "Daily"
+        policy_action:
+          operation: "REMOVE"
+          instance_number: 1
+'''
+
+RETURN = '''
+    configuration_id:
+        description:
+            - Specifies the ID of the AS configuration.
+        type: str
+        returned: success
+    group_id:
+        description:
+            - Specifies the ID of the AS group.
+        type: str
+        returned: success
+    nodes:
+        description:
+            - The node, id, action and status of every configuration, group and policy
+              node, and of every read node which did not succeed. The action is
+              create, update, delete or null when nothing is to be done. The status
+              is planned in check mode, applied or unchanged when the node is done,
+              failed, with the error in msg, or skipped when a node it depends on is
+              not done.
+        type: list
+        returned: always
+'''
+
+import collections
+
+from ansible.module_utils.hwc_utils import (
+    HwcClientException, HwcClientException404, are_different_dicts,
+    get_region, navigate_value)
+from ansible.module_utils.hcs_utils import (
+    Config, HcsModule, job_handle, run_graph, run_module, wait_for_jobs)
+from ansible.module_utils.hcs_as_utils import (
+    build_configuration_create_parameters,
+    build_configuration_identity_object, build_configuration_query_link,
+    build_group_create_parameters, build_group_identity_object,
+    build_group_query_link, build_group_update_parameters,
+    build_policy_create_parameters, build_policy_identity_object,
+    build_policy_query_link, build_policy_update_parameters,
+    fill_configuration_resp_body, fill_group_resp_body,
+    fill_policy_resp_body)
+
+# the max number of items in a page of the list APIs
+LIST_PAGE_SIZE = 100
+
+
+def build_configuration_spec():
+    return dict(
+        configuration_name=dict(type='str', required=True),
+        instance_id=dict(type='str'),
+        flavor_id=dict(type='str'),
+        image_id=dict(type='str'),
+        disks=dict(type='list', elements='dict', options=dict(
+            disk_type=dict(type='str', required=True, choices=['SYS', 'DATA']),
+            volume_type=dict(type='str', required=True),
+            size=dict(type='int', required=True),
+        )),
+        ssh_key_name=dict(type='str'),
+        admin_pass=dict(type='str', no_log=True),
+        user_data=dict(type='str'),
+        server_metadata=dict(type='dict'),
+        public_ip=dict(type='dict', options=dict(
+            type=dict(type='str', required=True),
+            bandwidth=dict(type='dict', options=dict(
+                charge_mode=dict(type='str', required=True, choices=['bandwidth', 'traffic']),
+                share=dict(type='str', required=True),
+                size=dict(type='int', required=True)
+            )),
+        )),
+    )
+
+
+def build_group_spec():
+    return dict(
+        group_name=dict(type='str', required=True),
+        desire_instance_number=dict(type='int'),
+        min_instance_number=dict(type='int'),
+        max_instance_number=dict(type='int'),
+        cool_down_time=dict(type='int'),
+        health_periodic_audit_time=dict(type='int', choices=[5, 15, 50, 180]),
+        available_zones=dict(type='list', elements='str'),
+        vpc_id=dict(type='str'),
+        networks=dict(type='list', elements='str'),
+        security_group=dict(type='str'),
+        instance_terminate_policy=dict(type='str', choices=[
+            'OLD_CONFIG_OLD_INSTANCE', 'OLD_CONFIG_NEW_INSTANCE', 'OLD_INSTANCE', 'NEW_INSTANCE']
+        ),
+        delete_publicip=dict(type='bool'),
+    )
+
+
+def build_policy_spec():
+    return dict(
+        policy_name=dict(type='str', required=True),
+        policy_type=dict(type='str', required=True,
+                         choices=['ALARM', 'SCHEDULED', 'RECURRENCE']),
+        alarm_id=dict(type='str'),
+        scheduled_policy=dict(type='dict', options=dict(
+            launch_time=dict(type='str', required=True),
+            recurrence_type=dict(type='str', choices=['Daily', 'Weekly', 'Monthly']),
+            recurrence_value=dict(type='str'),
+            start_time=dict(type='str'),
+            end_time=dict(type='str'),
+        )),
+        policy_action=dict(type='dict', options=dict(
+            operation=dict(type='str', choices=['ADD', 'REMOVE', 'SET']),
+            instance_number=dict(type='int', default=1),
+        )),
+        cool_down_time=dict(type='int'),
+    )
+
+
+def build_module():
+    return HcsModule(
+        argument_spec=dict(
+            state=dict(type='str', default='present', choices=['present', 'absent']),
+            configuration=dict(type='dict', required=True,
+                               options=build_configuration_spec()),
+            group=dict(type='dict', required=True,
+                       options=build_group_spec()),
+            policies=dict(type='list', elements='dict', default=[],
+                          options=build_policy_spec()),
+            max_workers=dict(type='int', default=8),
+            wait_timeout=dict(type='int', default=600),
+        ),
+        supports_check_mode=True,
+    )
+
+
+def main():
+    """Main function"""
+
+    module = build_module()
+    config = Config(module, "as", verify=False)
+
+    run_module(config, run)
+
+
+def run(config):
+    """run the module once, return its result"""
+
+    module = config.module
+
+    names = collections.Counter(
+        p['policy_name'] for p in module.params['policies'])
+    dup = sorted(k for k, n in names.items() if n > 1)
+    if dup:
+        raise Exception("Found duplicate policy names(%s)" % ", ".join(dup))
+
+    # the token and the endpoint are got here, so the nodes only share the
+    # connection pool
+    client = config.client(get_region(module), "autoscaling", "project")
+
+    nodes = build_graph(config, client)
+    with config.tracer.span("graph"):
+        states = run_graph(nodes, module.params['max_workers'])
+
+    result = {"changed": False, "nodes": []}
+    failed = 0
+    for name in nodes:
+        state, v = states[name]
+        read = name.endswith(":read")
+        if read and state == "done":
+            continue
+
+        r = {"node": name, "id": None, "action": None, "status": state}
+        if state == "failed":
+            failed += 1
+            r["msg"] = v
+        elif state == "done":
+            r.update(id=v["id"], action=v["action"])
+            if v["action"]:
+                result["changed"] = True
+                r["status"] = "planned" if module.check_mode else "applied"
+            else:
+                r["status"] = "unchanged"
+        result["nodes"].append(r)
+
+    for k in ("configuration", "group"):
+        state, v = states[k]
+        result[k + "_id"] = v["id"] if state == "done" else None
+
+    if failed:
+        result.update(failed=True, msg=(
+            "module(hcs_as_stack): %d of the nodes failed" % failed))
+
+    return result
+
+
+def build_graph(config, client):
+    """
+    return the nodes of the stack, an ordered dict of name to the names of
+    the nodes it depends on and the function running it
+    """
+    module = config.module
+    present = module.params['state'] == 'present'
+
+    def _node(name, f):
+        def _run(deps):
+            with config.tracer.span(name):
+                return f(config, client, deps)
+        return _run
+
+    nodes = collections.OrderedDict()
+    nodes["configuration:read"] = ([], _node(
+        "configuration:read", read_configuration))
+    nodes["group:read"] = ([], _node("group:read", read_group))
+    nodes["policies:read"] = (["group:read"], _node(
+        "policies:read", read_policies))
+
+    def _policies(deps):
+        r = []
+        for p in module.params['policies']:
+            def _apply(config, client, deps, p=p):
+                return apply_policy(config, client, deps, p)
+
+            r.append(("policy:" + p['policy_name'], (deps, _node(
+                "policy:" + p['policy_name'], _apply))))
+        return r
+
+    if present:
+        nodes["configuration"] = (["configuration:read"], _node(
+            "configuration", apply_configuration))
+        nodes["group"] = (["group:read", "configuration"], _node(
+            "group", apply_group))
+        nodes.update(_policies(["policies:read", "group"]))
+    else:
+        # the group deletes its remaining policies, and the configuration
+        # can only be deleted after the group is gone
+        policies = _policies(["policies:read"])
+        nodes.update(policies)
+        nodes["group"] = (["group:read"] + [k for k, _ in policies], _node(
+            "group", apply_group))
+        nodes["configuration"] = (["configuration:read", "group"], _node(
+            "configuration", apply_configuration))
+
+    return nodes
+
+
+def read_configuration(config, client, deps):
+    opts = config.module.params['configuration']
+    identity_obj = build_configuration_identity_object(opts)
+
+    link = "scaling_configuration" + build_configuration_query_link(
+        opts, limit=LIST_PAGE_SIZE)
+    result = []
+    for item in list_resources(client, link, "scaling_configurations"):
+        item = fill_configuration_resp_body(item)
+        if not are_different_dicts(identity_obj, item):
+            result.append(item)
+
+    if len(result) > 1:
+        raise Exception("Found more than one resource(%s)" % ", ".join([
+            navigate_value(i, ["id"])
+            for i in result
+        ]))
+
+    return result[0] if result else None
+
+
+def read_group(config, client, deps):
+    name = config.module.params['group']['group_name']
+
+    # the group may be changed to use another configuration
+    link = "scaling_group" + build_group_query_link(
+        {"group_name": name, "configuration_id": None},
+        limit=LIST_PAGE_SIZE)
+    result = [fill_group_resp_body(i)
+              for i in list_resources(client, link, "scaling_groups")
+              if i.get("scaling_group_name") == name]
+
+    if len(result) > 1:
+        raise Exception("Found more than one resource(%s)" % ", ".join([
+            navigate_value(i, ["scaling_group_id"])
+            for i in result
+        ]))
+
+    return result[0] if result else None
+
+
+def read_policies(config, client, deps):
+    """return the policies of the group by name"""
+    group = deps["group:read"]
+    if not group:
+        return {}
+
+    link = "scaling_policy/%s/list" % group["scaling_group_id"] + \
+        build_policy_query_link({"policy_name": None, "policy_type": None},
+                                filters=False, limit=LIST_PAGE_SIZE)
+    result = dict()
+    for item in list_resources(client, link, "scaling_policies"):
+        item = fill_policy_resp_body(item)
+        result.setdefault(item["scaling_policy_name"], []).append(item)
+
+    return result
+
+
+def apply_configuration(config, client, deps):
+    module = config.module
+    resource = deps["configuration:read"]
+    rid = navigate_value(resource, ["id"]) if resource else None
+
+    action = None
+    if module.params['state'] == 'present':
+        if not resource:
+            action = "create"
+            if not module.check_mode:
+                params = build_configuration_create_parameters(
+                    module.params['configuration'])
+                r = send_request(client, "create", "post",
+                                 "scaling_configuration", params)
+                rid = navigate_value(r, ["scaling_configuration_id"])
+
+    elif resource:
+        action = "delete"
+        if not module.check_mode:
+            group = deps["group"]
+            if group["action"] == "delete":
+                wait_for_group_deleted(config, client, group["id"])
+
+            delete_resource(client, "scaling_configuration/%s" % rid)
+
+    return {"id": rid, "action": action}
+
+
+def apply_group(config, client, deps):
+    module = config.module
+    resource = deps["group:read"]
+    rid = navigate_value(resource, ["scaling_group_id"]) if resource else None
+
+    action = None
+    if module.params['state'] == 'present':
+        configuration = deps["configuration"]
+        opts = dict(module.params['group'],
+                    configuration_id=configuration["id"])
+
+        if not resource:
+            if not (opts.get("vpc_id") and opts.get("networks")):
+                raise Exception(
+                    "vpc_id and networks are required to create the group")
+
+            action = "create"
+            if not module.check_mode:
+                params = build_group_create_parameters(opts)
+                r = send_request(client, "create", "post", "scaling_group",
+                                 params)
+                rid = navigate_value(r, ["scaling_group_id"])
+
+        else:
+            obj = build_group_identity_object(opts)
+            # in check mode the ID of a configuration to be created is not
+            # known, but the group will be changed to use it
+            if configuration["action"] == "create" or \
+                    are_different_dicts(obj, resource):
+                action = "update"
+                if not module.check_mode:
+                    params = build_group_update_parameters(opts)
+                    send_request(client, "update", "put",
+                                 "scaling_group/%s" % rid, params)
+
+    elif resource:
+        action = "delete"
+        if not module.check_mode:
+            delete_resource(client, "scaling_group/%s" % rid)
+
+    return {"id": rid, "action": action}
+
+
+def apply_policy(config, client, deps, opts):
+    module = config.module
+    v = deps["policies:read"].get(opts['policy_name'], [])
+    if len(v) > 1:
+        raise Exception("Found more than one resource(%s)" % ", ".join([
+            navigate_value(i, ["scaling_policy_id"])
+            for i in v
+        ]))
+
+    resource = v[0] if v else None
+    rid = navigate_value(resource, ["scaling_policy_id"]) if resource \
+        else None
+
+    action = None
+    if module.params['state'] == 'present':
+        opts = dict(opts, group_id=deps["group"]["id"])
+
+        if not resource:
+            action = "create"
+            if not module.check_mode:
+                params = build_policy_create_parameters(opts)
+                r = send_request(client, "create", "post", "scaling_policy",
+                                 params)
+                rid = navigate_value(r, ["scaling_policy_id"])
+
+        elif are_different_dicts(build_policy_identity_object(opts),
+                                 resource):
+            action = "update"
+            if not module.check_mode:
+                params = build_policy_update_parameters(opts)
+                send_request(client, "update", "put",
+                             "scaling_policy/%s" % rid, params)
+
+    elif resource:
+        action = "delete"
+        if not module.check_mode:
+            delete_resource(client, "scaling_policy/%s" % rid)
+
+    return {"id": rid, "action": action}
+
+
+def wait_for_group_deleted(config, client, group_id):
+    job = job_handle("as_group", group_id, "absent", client.endpoint)
+    states, error = wait_for_jobs(config, [job],
+                                  config.module.params['wait_timeout'])
+    if error or states[0]['state'] != "done":
+        raise Exception(
+            "module(hcs_as_stack): error waiting for the group(%s) to be "
+            "deleted, error: %s" % (group_id, error or states[0].get('msg')))
+
+
+def list_resources(client, link, key):
+    """yield every item of the list API, page by page"""
+    p = {'start_number': 0}
+    while True:
+        url = link.format(**p)
+        n = 0
+        try:
+            for item in client.list_items(url, key):
+                n += 1
+                yield item
+        except HwcClientException as ex:
+            # the items may be parsed while they are iterated
+            raise Exception(
+                "module(hcs_as_stack): error running api(list), url: %s%s, "
+                "error: %s" % (client.endpoint, url, str(ex)))
+
+        # a short page is the last one
+        if n < LIST_PAGE_SIZE:
+            break
+
+        p['start_number'] += LIST_PAGE_SIZE
+
+
+def delete_resource(client, url):
+    try:
+        send_request(client, "delete", "delete", url, None, with_body=False)
+    except HwcClientException404:
+        pass
+
+
+def send_request(client, api, method, url, *args, **kwargs):
+    # the endpoint: https://as-api.xxx.com/autoscaling-api/v1/{{project_id}}
+    try:
+        return getattr(client, method)(url, *args, **kwargs)
+    except HwcClientException404:
+        raise
+    except HwcClientException as ex:
+        raise Exception(
+            "module(hcs_as_stack): error running api(%s), url: %s%s, "
+            "error: %s" % (api, client.endpoint, url, str(ex)))
+
+
+if __name__ == '__main__':
+    main()
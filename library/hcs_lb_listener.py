@@ -47,7 +47,9 @@ options:
      default: 80
    wait:
      description:
-        - If the module should wait for the load balancer to be ACTIVE.
+        - If the module should wait for the load balancer to be ACTIVE. When
+          it does not wait, the handle of the job of the load balancer is
+          returned as job, and can be waited for by hcs_wait.
      type: bool
      default: 'yes'
    timeout:
@@ -105,6 +107,10 @@ listener:
             description: The maximum number of connections allowed for the Listener.
             type: int
             sample: -1
+job:
+    description: The handle of the job of the load balancer, for hcs_wait.
+    returned: When the listener is created or deleted and I(wait) is 'no'
+    type: dict
 '''
 
 EXAMPLES = '''
@@ -137,18 +143,26 @@ import time
 from ansible.module_utils.basic import AnsibleModule
 from ansible.module_utils.openstack import openstack_full_argument_spec, \
     openstack_module_kwargs, openstack_cloud_from_module
+from ansible.module_utils.hcs_utils import (
+    get_tracer, job_handle, openstack_cloud_from_connection, start_profiler)
 
 
 def _lb_wait_for_status(module, cloud, lb, status, failures, interval=5):
     """Wait for load balancer to be in a particular provisioning status."""
     timeout = module.params['timeout']
 
+    tracer = get_tracer(module)
+    polls = 0
+
     total_sleep = 0
     if failures is None:
         failures = []
 
     while total_sleep < timeout:
-        lb = cloud.network.get_load_balancer(lb.id)
+        polls += 1
+        with tracer.span("wait poll %d" % polls) as span:
+            lb = cloud.network.get_load_balancer(lb.id)
+            span.set("status", lb.provisioning_status)
         if lb.provisioning_status == status:
             return None
         if lb.provisioning_status in failures:
@@ -177,7 +191,10 @@ def main():
     )
     module_kwargs = openstack_module_kwargs()
     module = AnsibleModule(argument_spec, **module_kwargs)
-    sdk, cloud = openstack_cloud_from_module(module)
+    get_tracer(module)
+    start_profiler(module)
+    sdk, cloud = openstack_cloud_from_connection(module) or \
+        openstack_cloud_from_module(module)
     loadbalancer = module.params['loadbalancer']
 
     try:
@@ -204,7 +221,11 @@ def main():
                 if not module.params['wait']:
                     module.exit_json(changed=changed,
                                      listener=listener.to_dict(),
-                                     id=listener.id)
+                                     id=listener.id,
+                                     job=job_handle(
+                                         "lb_loadbalancer", loadbalancer_id,
+                                         ["ACTIVE"],
+                                         cloud.network.get_endpoint()))
 
             if module.params['wait']:
                 # Check in case the listener already exists.
@@ -233,6 +254,10 @@ def main():
                             msg='load balancer %s is not found' % loadbalancer
                         )
                     _lb_wait_for_status(module, cloud, lb, "ACTIVE", ["ERROR"])
+                elif listener.load_balancer_ids:
+                    module.exit_json(changed=changed, job=job_handle(
+                        "lb_loadbalancer", listener.load_balancer_ids[0],
+                        ["ACTIVE"], cloud.network.get_endpoint()))
 
             module.exit_json(changed=changed)
     except sdk.exceptions.OpenStackCloudException as e:
@@ -107,7 +107,8 @@ options:
   wait:
     description:
       - If the module should wait for the load balancer to be created or
-        deleted.
+        deleted. When it does not wait, the handle of the job is returned as
+        job, and can be waited for by hcs_wait.
     type: bool
     default: 'yes'
   timeout:
@@ -172,6 +173,10 @@ loadbalancer:
             description: The associated pool IDs, if any.
             type: list
             sample: [{"id": "27b78d92-cee1-4646-b831-e3b90a7fa714"}, {"id": "befc1fb5-1992-4697-bdb9-eee330989344"}]
+job:
+    description: The handle of the job of the load balancer, for hcs_wait.
+    returned: When the load balancer is created or deleted and C(wait=no)
+    type: dict
 '''
 
 EXAMPLES = '''
@@ -254,18 +259,26 @@ import time
 from ansible.module_utils.basic import AnsibleModule
 from ansible.module_utils.openstack import openstack_full_argument_spec, \
     openstack_module_kwargs, openstack_cloud_from_module
+from ansible.module_utils.hcs_utils import (
+    get_tracer, job_handle, openstack_cloud_from_connection, start_profiler)
 
 
 def _wait_for_lb(module, cloud, lb, status, failures, interval=5):
     """Wait for load balancer to be in a particular provisioning status."""
     timeout = module.params['timeout']
 
+    tracer = get_tracer(module)
+    polls = 0
+
     total_sleep = 0
     if failures is None:
         failures = []
 
     while total_sleep < timeout:
-        lb = cloud.network.find_load_balancer(lb.id)
+        polls += 1
+        with tracer.span("wait poll %d" % polls) as span:
+            lb = cloud.network.find_load_balancer(lb.id)
+            span.set("status", lb.provisioning_status if lb else None)
 
         if lb:
             if lb.provisioning_status == status:
@@ -306,7 +319,10 @@ def main():
     )
     module_kwargs = openstack_module_kwargs()
     module = AnsibleModule(argument_spec, **module_kwargs)
-    sdk, cloud = openstack_cloud_from_module(module)
+    get_tracer(module)
+    start_profiler(module)
+    sdk, cloud = openstack_cloud_from_connection(module) or \
+        openstack_cloud_from_module(module)
 
     vip_subnet = module.params['vip_subnet']
     listeners = module.params['listeners']
@@ -341,11 +357,13 @@ def main():
                 changed = True
 
             if not listeners and not module.params['wait']:
-                module.exit_json(
-                    changed=changed,
-                    loadbalancer=lb.to_dict(),
-                    id=lb.id
-                )
+                result = dict(changed=changed, loadbalancer=lb.to_dict(),
+                              id=lb.id)
+                if changed:
+                    result['job'] = job_handle(
+                        "lb_loadbalancer", lb.id, ["ACTIVE"],
+                        cloud.network.get_endpoint())
+                module.exit_json(**result)
 
             _wait_for_lb(module, cloud, lb, "ACTIVE", ["ERROR"])
 
@@ -525,13 +543,19 @@ def main():
                 cloud.network.delete_load_balancer(lb)
                 changed = True
 
+                job = None
                 if module.params['wait']:
                     _wait_for_lb(module, cloud, lb, "DELETED", ["ERROR"])
+                else:
+                    job = job_handle("lb_loadbalancer", lb.id, "absent",
+                                     cloud.network.get_endpoint())
 
             if delete_fip and public_vip_address:
                 cloud.network.delete_ip(public_vip_address)
                 changed = True
 
+            if lb and job:
+                module.exit_json(changed=changed, job=job)
             module.exit_json(changed=changed)
     except sdk.exceptions.OpenStackCloudException as e:
         module.fail_json(msg=str(e), extra_data=e.extra_data)
@@ -111,6 +111,8 @@ EXAMPLES = '''
 from ansible.module_utils.basic import AnsibleModule
 from ansible.module_utils.openstack import openstack_full_argument_spec, \
     openstack_module_kwargs, openstack_cloud_from_module
+from ansible.module_utils.hcs_utils import (
+    openstack_cloud_from_connection, start_profiler)
 
 
 def main():
@@ -125,7 +127,9 @@ def main():
 
     module_kwargs = openstack_module_kwargs()
     module = AnsibleModule(argument_spec, **module_kwargs)
-    sdk, cloud = openstack_cloud_from_module(module)
+    start_profiler(module)
+    sdk, cloud = openstack_cloud_from_connection(module) or \
+        openstack_cloud_from_module(module)
 
     name = module.params['name']
     pool = module.params['pool']
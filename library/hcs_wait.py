@@ -0,0 +1,130 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019 Huawei
+# GNU General Public License v3.0+ (see COPYING or
+# https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+###############################################################################
+# Documentation
+###############################################################################
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ["preview"],
+                    'supported_by': 'community'}
+
+DOCUMENTATION = '''
+---
+module: hcs_wait
+description:
+    - Waits for the jobs returned by the modules run with wait false, until their
+      resources reach the target status.
+    - The jobs of the same resource type and endpoint are polled together, by one
+      list of the resources per poll, so that many resources changed in parallel
+      are waited for once.
+short_description: Waits for the jobs of the resources in Huawei Cloud Stack
+version_added: '2.10'
+author: Huawei Inc. (@huaweicloud)
+requirements:
+    - keystoneauth1 >= 3.6.0
+options:
+    jobs:
+        description:
+            - The job handles returned as job by hcs_as_group, hcs_lb_loadbalancer and
+              hcs_lb_listener. Each has the type, id, target and endpoint.
+        type: list
+        elements: dict
+        required: true
+    wait_timeout:
+        description:
+            - The seconds to wait for.
+        type: int
+        default: 600
+extends_documentation_fragment: hcs
+'''
+
+EXAMPLES = '''
+# create the auto-scaling groups without waiting, then wait for all of them
+- name: create the auto-scaling groups
+  hcs_as_group:
+    group_name: "{{ item }}"
+    vpc_id: "{{ vpc_id }}"
+    networks: ["{{ subnet_id }}"]
+    wait: false
+  loop: "{{ group_names }}"
+  register: groups
+
+- name: wait for the auto-scaling groups
+  hcs_wait:
+    jobs: "{{ groups.results | selectattr('job', 'defined') | map(attribute='job') | list }}"
+'''
+
+RETURN = '''
+    jobs:
+        description:
+            - The type, id, status and state of every job. The state is done when the
+              resource has reached the target, failed, with the error in msg, when it
+              can not reach it, and pending when the wait timed out first.
+        type: list
+        returned: always
+'''
+
+from ansible.module_utils.hcs_utils import (
+    Config, HcsModule, run_module, wait_for_jobs)
+
+
+def build_module():
+    return HcsModule(
+        argument_spec=dict(
+            jobs=dict(type='list', elements='dict', required=True),
+            wait_timeout=dict(type='int', default=600),
+        ),
+        supports_check_mode=True,
+    )
+
+
+def main():
+    """Main function"""
+
+    module = build_module()
+    config = Config(module, "as", verify=False)
+
+    run_module(config, run)
+
+
+def run(config):
+    """run the module once, return its result"""
+
+    module = config.module
+    jobs = module.params['jobs']
+
+    for j in jobs:
+        missing = [k for k in ("type", "id", "target", "endpoint")
+                   if not j.get(k)]
+        if missing:
+            raise Exception("module(hcs_wait): a job misses %s" %
+                            ", ".join(missing))
+
+    if not jobs:
+        return {"changed": False, "jobs": []}
+
+    with config.tracer.span("wait"):
+        states, error = wait_for_jobs(config, jobs,
+                                      module.params['wait_timeout'])
+
+    result = {"changed": False, "jobs": states}
+
+    failed = [s for s in states if s["state"] != "done"]
+    if failed:
+        result.update(failed=True, msg=(
+            "module(hcs_wait): %d of the jobs are not done, error: %s" % (
+                len(failed), error or failed[0].get("msg"))))
+
+    return result
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,552 @@
+# Copyright (C) 2019 Huawei
+# Simplified BSD License (see licenses/simplified_bsd.txt or
+# https://opensource.org/licenses/BSD-2-Clause)
+
+"""
+The builders of the requests and the fillers of the responses of the AS
+configurations, groups and policies. They take the options of a resource as
+a dict, so that hcs_as_stack sends the same requests as the modules.
+"""
+
+from ansible.module_utils.hwc_utils import is_empty_value, navigate_value
+
+
+def build_configuration_identity_object(opts):
+    return {
+        "id": opts.get("id"),
+        "configuration_name": opts.get("configuration_name"),
+        "instance_id": opts.get("instance_id"),
+        "flavor_id": opts.get("flavor_id"),
+        "image_id": opts.get("image_id"),
+        "disks": opts.get("disks"),
+        "public_ip": opts.get("public_ip"),
+        "ssh_key_name": opts.get("ssh_key_name"),
+        "admin_pass": opts.get("admin_pass"),
+        "user_data": opts.get("user_data"),
+        "server_metadata": opts.get("server_metadata"),
+    }
+
+
+def build_configuration_create_parameters(opts):
+    """
+    - change the input parameters with required name or value format of create API
+    - ignore empty parameter
+    """
+
+    params = dict()
+    instance_config = dict()
+
+    v = navigate_value(opts, ["configuration_name"], None)
+    if not is_empty_value(v):
+        params["scaling_configuration_name"] = v
+
+    v = navigate_value(opts, ["instance_id"], None)
+    if not is_empty_value(v):
+        instance_config["instance_id"] = v
+
+    v = navigate_value(opts, ["flavor_id"], None)
+    if not is_empty_value(v):
+        instance_config["flavorRef"] = v
+
+    v = navigate_value(opts, ["image_id"], None)
+    if not is_empty_value(v):
+        instance_config["imageRef"] = v
+
+    v = expand_create_disks_param(opts, None)
+    if not is_empty_value(v):
+        instance_config["disk"] = v
+
+    v = navigate_value(opts, ["ssh_key_name"], None)
+    if not is_empty_value(v):
+        instance_config["key_name"] = v
+
+    v = navigate_value(opts, ["admin_pass"], None)
+    if not is_empty_value(v):
+        instance_config["adminPass"] = v
+
+    v = navigate_value(opts, ["user_data"], None)
+    if not is_empty_value(v):
+        instance_config["user_data"] = v
+
+    v = navigate_value(opts, ["server_metadata"], None)
+    if not is_empty_value(v):
+        instance_config["metadata"] = v
+
+    v = expand_create_publicip(opts, None)
+    if not is_empty_value(v):
+        instance_config["public_ip"] = v
+
+    if instance_config:
+        params["instance_config"] = instance_config
+
+    if not params:
+        return None
+
+    return params
+
+
+def expand_create_disks_param(d, array_index):
+    disks = []
+    new_ai = dict()
+    if array_index:
+        new_ai.update(array_index)
+
+    v = navigate_value(d, ["disks"], new_ai)
+    if not v:
+        return disks
+
+    n = len(v)
+    for i in range(n):
+        new_ai["disks"] = i
+        transformed = dict()
+
+        v = navigate_value(d, ["disks", "disk_type"], new_ai)
+        if not is_empty_value(v):
+            transformed["disk_type"] = v
+
+        v = navigate_value(d, ["disks", "volume_type"], new_ai)
+        if not is_empty_value(v):
+            transformed["volume_type"] = v
+
+        v = navigate_value(d, ["disks", "size"], new_ai)
+        if not is_empty_value(v):
+            transformed["size"] = v
+
+        if transformed:
+            disks.append(transformed)
+
+    return disks
+
+
+def expand_create_publicip(d, array_index):
+    r = dict()
+
+    v = expand_create_publicip_bandwidth(d)
+    if not is_empty_value(v):
+        r["bandwidth"] = v
+
+    v = navigate_value(d, ["public_ip", "type"], array_index)
+    if not is_empty_value(v):
+        r["ip_type"] = v
+
+    if not r:
+        return None
+
+    return {"eip": r}
+
+
+def expand_create_publicip_bandwidth(d):
+    bandwidth = dict()
+
+    raw = navigate_value(d, ["public_ip", "bandwidth"])
+    if is_empty_value(raw):
+        return bandwidth
+
+    v = navigate_value(raw, ["charge_mode"])
+    if not is_empty_value(v):
+        bandwidth["charge_mode"] = v
+
+    v = navigate_value(raw, ["share"])
+    if not is_empty_value(v):
+        bandwidth["share"] = v
+
+    v = navigate_value(raw, ["size"])
+    if not is_empty_value(v):
+        bandwidth["size"] = v
+
+    return bandwidth
+
+
+def fill_configuration_resp_body(body):
+    """build resource from response body"""
+
+    result = dict()
+
+    result["id"] = body.get("scaling_configuration_id")
+    result["configuration_name"] = body.get("scaling_configuration_name")
+
+    config_body = body.get("instance_config")
+    if not config_body:
+        raise Exception("instance_config is missing in response body")
+
+    result["instance_id"] = config_body.get("instance_id")
+    result["flavor_id"] = config_body.get("flavorRef")
+    result["image_id"] = config_body.get("imageRef")
+    result["ssh_key_name"] = config_body.get("key_name")
+    result["admin_pass"] = config_body.get("adminPass")
+    result["user_data"] = config_body.get("user_data")
+    result["server_metadata"] = config_body.get("metadata")
+    result["public_ip"] = config_body.get("public_ip")
+
+    v = fill_configuration_resp_disks(config_body.get("disk"))
+    result["disks"] = v
+
+    return result
+
+
+def fill_configuration_resp_disks(value):
+    if not value:
+        return None
+
+    disks = []
+    for item in value:
+        disk = {
+            "disk_type": item.get("disk_type"),
+            "volume_type": item.get("volume_type"),
+            "size": item.get("size"),
+        }
+        disks.append(disk)
+
+    return disks
+
+
+def build_configuration_query_link(opts, limit=10):
+    query_params = []
+
+    v = navigate_value(opts, ["configuration_name"])
+    if v or v in [False, 0]:
+        query_params.append(
+            "scaling_configuration_name=" + (str(v) if v else str(v).lower()))
+
+    v = navigate_value(opts, ["image_id"])
+    if v or v in [False, 0]:
+        query_params.append(
+            "image_id=" + (str(v) if v else str(v).lower()))
+
+    query_link = "?limit=%d&start_number={start_number}" % limit
+    if query_params:
+        query_link += "&" + "&".join(query_params)
+
+    return query_link
+
+
+def build_group_identity_object(opts):
+    """
+    build resource from the group options
+    :param opts: the group options
+    :return: resource object in read response format, missing params equal None
+    """
+    networks = expand_create_networks(opts)
+    security_groups = expand_create_security_groups(opts)
+    return {
+        "scaling_group_id": opts.get("id"),
+        "scaling_group_name": opts.get("group_name"),
+        "scaling_group_status": None,
+        "scaling_configuration_id": opts.get("configuration_id"),
+        "desire_instance_number": opts.get("desire_instance_number"),
+        "min_instance_number": opts.get("min_instance_number"),
+        "max_instance_number": opts.get("max_instance_number"),
+        "cool_down_time": opts.get("cool_down_time"),
+        "health_periodic_audit_time": opts.get("health_periodic_audit_time"),
+        "available_zones": opts.get("available_zones"),
+        "vpc_id": opts.get("vpc_id"),
+        "networks": networks,
+        "security_groups": security_groups,
+        "instance_terminate_policy": opts.get("instance_terminate_policy"),
+        "delete_publicip": opts.get("delete_publicip"),
+    }
+
+
+def build_group_create_parameters(opts):
+    """
+    - change the input parameters with required name or value format of create API
+    - ignore empty parameter
+    """
+
+    params = dict()
+
+    v = navigate_value(opts, ["group_name"])
+    if not is_empty_value(v):
+        params["scaling_group_name"] = v
+
+    v = navigate_value(opts, ["configuration_id"])
+    if not is_empty_value(v):
+        params["scaling_configuration_id"] = v
+
+    v = navigate_value(opts, ["desire_instance_number"])
+    if not is_empty_value(v):
+        params["desire_instance_number"] = v
+
+    v = navigate_value(opts, ["min_instance_number"])
+    if not is_empty_value(v):
+        params["min_instance_number"] = v
+
+    v = navigate_value(opts, ["max_instance_number"])
+    if not is_empty_value(v):
+        params["max_instance_number"] = v
+
+    v = navigate_value(opts, ["cool_down_time"])
+    if not is_empty_value(v):
+        params["cool_down_time"] = v
+
+    v = navigate_value(opts, ["health_periodic_audit_time"])
+    if not is_empty_value(v):
+        params["health_periodic_audit_time"] = v
+        params["health_periodic_audit_method"] = "NOVA_AUDIT"
+
+    v = navigate_value(opts, ["available_zones"])
+    if not is_empty_value(v):
+        params["available_zones"] = v
+
+    v = navigate_value(opts, ["vpc_id"])
+    if not is_empty_value(v):
+        params["vpc_id"] = v
+
+    v = expand_create_networks(opts)
+    if not is_empty_value(v):
+        params["networks"] = v
+
+    v = expand_create_security_groups(opts)
+    if not is_empty_value(v):
+        params["security_groups"] = v
+
+    v = navigate_value(opts, ["instance_terminate_policy"])
+    if not is_empty_value(v):
+        params["instance_terminate_policy"] = v
+
+    v = navigate_value(opts, ["delete_publicip"])
+    if not is_empty_value(v):
+        params["delete_publicip"] = v
+
+    return params
+
+
+def expand_create_networks(d):
+    v = d.get("networks")
+    if not v:
+        return None
+
+    return [{"id": i} for i in v]
+
+
+def expand_create_security_groups(d):
+    v = d.get("security_group")
+    if not v:
+        return None
+
+    return [{"id": v}]
+
+
+def build_group_update_parameters(opts):
+    # all params can be updated except on vpc_id
+    update_opts = build_group_create_parameters(opts)
+    update_opts.pop("vpc_id", None)
+
+    return update_opts
+
+
+def fill_group_resp_body(body):
+    """
+    build resource from response body
+    :param body: response body from List or Read
+    :return: resource object in read response format
+    """
+
+    return {
+        "scaling_group_id": body.get("scaling_group_id"),
+        "scaling_group_status": body.get("scaling_group_status"),
+        "scaling_group_name": body.get("scaling_group_name"),
+        "scaling_configuration_id": body.get("scaling_configuration_id"),
+        "desire_instance_number": body.get("desire_instance_number"),
+        "min_instance_number": body.get("min_instance_number"),
+        "max_instance_number": body.get("max_instance_number"),
+        "cool_down_time": body.get("cool_down_time"),
+        "health_periodic_audit_time": body.get("health_periodic_audit_time"),
+        "available_zones": body.get("available_zones"),
+        "vpc_id": body.get("vpc_id"),
+        "networks": body.get("networks"),
+        "security_groups": body.get("security_groups"),
+        "instance_terminate_policy": body.get("instance_terminate_policy"),
+        "delete_publicip": body.get("delete_publicip"),
+    }
+
+
+def build_group_query_link(opts, limit=10):
+    query_params = []
+
+    v = navigate_value(opts, ["group_name"])
+    if v or v in [False, 0]:
+        query_params.append(
+            "scaling_group_name=" + (str(v) if v else str(v).lower()))
+
+    v = navigate_value(opts, ["configuration_id"])
+    if v or v in [False, 0]:
+        query_params.append(
+            "scaling_configuration_id=" + (str(v) if v else str(v).lower()))
+
+    query_link = "?limit=%d&start_number={start_number}" % limit
+    if query_params:
+        query_link += "&" + "&".join(query_params)
+
+    return query_link
+
+
+def build_policy_identity_object(opts):
+    """
+    build resource from the policy options
+    :param opts: the policy options
+    :return: resource object in read response format, missing params equal None
+    """
+
+    return {
+        "scaling_group_id": opts.get("group_id"),
+        "scaling_policy_id": opts.get("id"),
+        "scaling_policy_name": opts.get("policy_name"),
+        "scaling_policy_type": opts.get("policy_type"),
+        "scaling_policy_action": opts.get("policy_action"),
+        "alarm_id": opts.get("alarm_id"),
+        "scheduled_policy": opts.get("scheduled_policy"),
+        "cool_down_time": opts.get("cool_down_time"),
+    }
+
+
+def expand_scheduled_policy_opts(d):
+    opts = d.get("scheduled_policy")
+    if not opts:
+        return None
+
+    params = dict()
+
+    v = navigate_value(opts, ["launch_time"])
+    if not is_empty_value(v):
+        params["launch_time"] = v
+
+    v = navigate_value(opts, ["recurrence_type"])
+    if not is_empty_value(v):
+        params["recurrence_type"] = v
+
+    v = navigate_value(opts, ["recurrence_value"])
+    if not is_empty_value(v):
+        params["recurrence_value"] = v
+
+    v = navigate_value(opts, ["start_time"])
+    if not is_empty_value(v):
+        params["start_time"] = v
+
+    v = navigate_value(opts, ["end_time"])
+    if not is_empty_value(v):
+        params["end_time"] = v
+
+    return params
+
+
+def expand_policy_action_opts(d):
+    opts = d.get("policy_action")
+    if not opts:
+        return None
+
+    params = dict()
+
+    v = navigate_value(opts, ["operation"])
+    if not is_empty_value(v):
+        params["operation"] = v
+
+    v = navigate_value(opts, ["instance_number"])
+    if not is_empty_value(v):
+        params["instance_number"] = v
+
+    return params
+
+
+def build_policy_create_parameters(opts):
+    """
+    - change the input parameters with required name or value format of create API
+    - ignore empty parameter
+    """
+
+    params = dict()
+
+    v = navigate_value(opts, ["group_id"])
+    if not is_empty_value(v):
+        params["scaling_group_id"] = v
+
+    v = navigate_value(opts, ["policy_name"])
+    if not is_empty_value(v):
+        params["scaling_policy_name"] = v
+
+    v = navigate_value(opts, ["policy_type"])
+    if not is_empty_value(v):
+        params["scaling_policy_type"] = v
+
+    v = navigate_value(opts, ["alarm_id"])
+    if not is_empty_value(v):
+        params["alarm_id"] = v
+
+    v = expand_scheduled_policy_opts(opts)
+    if not is_empty_value(v):
+        params["scheduled_policy"] = v
+
+    v = expand_policy_action_opts(opts)
+    if not is_empty_value(v):
+        params["scaling_policy_action"] = v
+
+    v = navigate_value(opts, ["cool_down_time"])
+    if not is_empty_value(v):
+        params["cool_down_time"] = v
+
+    return params
+
+
+def build_policy_update_parameters(opts):
+    # all params can be updated except on group_id
+    update_opts = build_policy_create_parameters(opts)
+    update_opts.pop("scaling_group_id", None)
+
+    return update_opts
+
+
+def fill_policy_resp_body(body):
+    """
+    build resource from response body
+    :param body: response body from List or Read
+    :return: resource object in read response format
+    """
+    policy_action = None
+    v = body.get("scaling_policy_action")
+    if v:
+        policy_action = {
+            "operation": v.get("operation"),
+            "instance_number": v.get("instance_number")
+        }
+
+    scheduled_policy = None
+    v = body.get("scheduled_policy")
+    if v:
+        scheduled_policy = {
+            "launch_time": v.get("launch_time"),
+            "recurrence_type": v.get("recurrence_type"),
+            "recurrence_value": v.get("recurrence_value"),
+            "start_time": v.get("start_time"),
+            "end_time": v.get("end_time")
+        }
+
+    return {
+        "scaling_group_id": body.get("scaling_group_id"),
+        "scaling_policy_id": body.get("scaling_policy_id"),
+        "scaling_policy_name": body.get("scaling_policy_name"),
+        "scaling_policy_type": body.get("scaling_policy_type"),
+        "alarm_id": body.get("alarm_id"),
+        "cool_down_time": body.get("cool_down_time"),
+        "scaling_policy_action": policy_action,
+        "scheduled_policy": scheduled_policy
+    }
+
+
+def build_policy_query_link(opts, filters=True, limit=10):
+    query_params = []
+
+    v = navigate_value(opts, ["policy_name"])
+    if filters and (v or v in [False, 0]):
+        query_params.append(
+            "scaling_policy_name=" + (str(v) if v else str(v).lower()))
+
+    v = navigate_value(opts, ["policy_type"])
+    if filters and (v or v in [False, 0]):
+        query_params.append(
+            "scaling_policy_type=" + (str(v) if v else str(v).lower()))
+
+    query_link = "?limit=%d&start_number={start_number}" % limit
+    if query_params:
+        query_link += "&" + "&".join(query_params)
+
+    return query_link
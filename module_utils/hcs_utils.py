@@ -2,6 +2,16 @@
 # Simplified BSD License (see licenses/simplified_bsd.txt or
 # https://opensource.org/licenses/BSD-2-Clause)
 
+import atexit
+import collections
+import copy
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
 import traceback
 
 THIRD_LIBRARIES_IMP_ERR = None
@@ -9,20 +19,1060 @@ try:
     from keystoneauth1.adapter import Adapter
     from keystoneauth1.identity import v3
     from keystoneauth1 import session
+    from keystoneauth1.plugin import BaseAuthPlugin
     HAS_THIRD_LIBRARIES = True
 except ImportError:
     THIRD_LIBRARIES_IMP_ERR = traceback.format_exc()
     HAS_THIRD_LIBRARIES = False
+    BaseAuthPlugin = object
 
-from ansible.module_utils.basic import (AnsibleModule, env_fallback,
-                                        missing_required_lib)
-from ansible.module_utils.hwc_utils import (HwcClientException, session_method_wrapper)
+try:
+    from urllib.parse import urlparse
+except ImportError:
+    from urlparse import urlparse
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+from ansible.module_utils.basic import (AnsibleModule, _load_params,
+                                        env_fallback, missing_required_lib)
+
+try:
+    from ansible.module_utils.common.arg_spec import ArgumentSpecValidator
+except ImportError:
+    # ansible < 2.11, the batch option is not supported
+    ArgumentSpecValidator = None
+from ansible.module_utils.hwc_utils import (
+    HwcClientException, HwcClientException404, HwcModuleException,
+    navigate_value)
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    try:
+        import ujson
+        _json_loads = ujson.loads
+    except ImportError:
+        def _json_loads(data):
+            return json.loads(data.decode("utf-8"))
+
+try:
+    import ijson
+    HAS_IJSON = True
+except ImportError:
+    HAS_IJSON = False
+
+
+def _success(code):
+    return code in [200, 201, 202, 203, 204, 205, 206, 207, 208, 226]
+
+
+def _parse_response(r, with_body=True):
+    code = r.status_code
+    result = None
+    if (with_body or code not in [202, 204]) and r.content:
+        try:
+            result = _json_loads(r.content)
+        except Exception as ex:
+            raise HwcClientException(
+                0, "Parsing response to json failed, error: %s" % ex)
+
+    if not _success(code):
+        msg = ""
+        for i in [['message'], ['error', 'message']]:
+            try:
+                msg = navigate_value(result, i)
+                break
+            except Exception:
+                pass
+        else:
+            msg = str(result)
+
+        if code == 404:
+            raise HwcClientException404(msg)
+
+        raise HwcClientException(code, msg)
+
+    return result
+
+
+class _CountingReader(object):
+    """Count the bytes read from a file-like object."""
+
+    def __init__(self, fp):
+        self._fp = fp
+        self.count = 0
+
+    def read(self, n=-1):
+        data = self._fp.read(n)
+        self.count += len(data)
+        return data
+
+
+def _wire_size(r):
+    # the number of bytes received before decompressing
+    try:
+        return r.raw.tell()
+    except Exception:
+        return int(r.headers.get("Content-Length") or 0)
+
+
+def _iter_items(r, key, on_close):
+    reader = _CountingReader(r.raw)
+    try:
+        r.raw.decode_content = True
+        for item in ijson.items(reader, key + ".item", use_float=True):
+            yield item
+    except Exception as ex:
+        raise HwcClientException(
+            0, "Parsing response to json failed, error: %s" % ex)
+    finally:
+        r.close()
+        on_close(r, reader.count)
+
+
+def _path_template(url):
+    """
+    replace the ids in the path and the values in the query of url,
+    so that the calls to the same api can be aggregated
+    """
+    path, _, query = url.partition("?")
+    path = "/".join(
+        "{id}" if re.match(r"^[0-9a-fA-F-]{16,}$", i) else i
+        for i in path.split("/"))
+    if query:
+        path += "?" + "&".join(i.split("=")[0] for i in query.split("&"))
+    return path
+
+
+def session_method_wrapper(f):
+    def _wrap(self, url, *args, **kwargs):
+        # the result of some calls, such as delete, is ignored by the
+        # caller, then it is no need to parse the body of 202 and 204
+        with_body = kwargs.pop("with_body", True)
+
+        try:
+            url = self.endpoint + url
+            r = f(self, url, *args, **kwargs)
+        except DeadlineExceeded:
+            raise
+        except Exception as ex:
+            raise HwcClientException(
+                0, "Sending request failed, error=%s" % ex)
+
+        return _parse_response(r, with_body)
+
+    return _wrap
+
+
+class _ApiCall(object):
+    def __init__(self, method, path):
+        self.method = method
+        self.path = _path_template(path)
+        self.attempts = 0
+        self.start = time.time()
+
+    def count_attempt(self, r, *args, **kwargs):
+        # response hook of requests, it is called for every attempt
+        self.attempts += 1
+
+
+class ApiStats(object):
+    """
+    ApiStats records one sample for every call sent by the service clients
+    of a module run, and the total time spent on auth, catalog lookup and
+    waiting. It can be shared by threads. When it is disabled, nothing is
+    recorded.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._samples = []
+        self._timers = {}
+
+    def start(self, method, path):
+        if not self.enabled:
+            return None
+
+        return _ApiCall(method, path)
+
+    def finish(self, call, r=None, decoded_bytes=None):
+        if call is None:
+            return
+
+        sample = {
+            "method": call.method,
+            "path": call.path,
+            "status": 0,
+            "wire_bytes": 0,
+            "decoded_bytes": 0,
+            "duration": time.time() - call.start,
+            "retries": max(call.attempts - 1, 0),
+        }
+        if r is not None:
+            sample["status"] = r.status_code
+            sample["wire_bytes"] = _wire_size(r)
+            sample["decoded_bytes"] = (
+                len(r.content) if decoded_bytes is None else decoded_bytes)
+
+        with self._lock:
+            self._samples.append(sample)
+
+    def add_time(self, name, duration):
+        if not self.enabled:
+            return
+
+        with self._lock:
+            t = self._timers.setdefault(name, {"count": 0, "duration": 0})
+            t["count"] += 1
+            t["duration"] += duration
+
+    def elapsed(self, name):
+        with self._lock:
+            return self._timers.get(name, {}).get("duration", 0)
+
+    def sleep(self, seconds):
+        start = time.time()
+        time.sleep(seconds)
+        self.add_time("wait", time.time() - start)
+
+    @property
+    def samples(self):
+        with self._lock:
+            return list(self._samples)
+
+    def summary(self):
+        samples = self.samples
+
+        requests = []
+        index = {}
+        for i in samples:
+            k = (i["method"], i["path"], i["status"])
+            if k not in index:
+                index[k] = len(requests)
+                requests.append({
+                    "method": i["method"], "path": i["path"],
+                    "status": i["status"], "count": 0, "retries": 0,
+                    "duration": 0, "max_duration": 0,
+                    "wire_bytes": 0, "decoded_bytes": 0,
+                })
+
+            g = requests[index[k]]
+            g["count"] += 1
+            g["max_duration"] = max(g["max_duration"], i["duration"])
+            for j in ["retries", "duration", "wire_bytes", "decoded_bytes"]:
+                g[j] += i[j]
+
+        with self._lock:
+            timers = dict((k, dict(v)) for k, v in self._timers.items())
+
+        result = {
+            "calls": len(samples),
+            "retries": sum(i["retries"] for i in samples),
+            "duration": sum(i["duration"] for i in samples),
+            "wire_bytes": sum(i["wire_bytes"] for i in samples),
+            "decoded_bytes": sum(i["decoded_bytes"] for i in samples),
+            "requests": requests,
+        }
+        for k in ["auth", "catalog", "wait"]:
+            result[k] = timers.get(k, {"count": 0, "duration": 0})
+
+        return result
+
+
+class DeadlineExceeded(HwcModuleException):
+    def __init__(self, deadline, what):
+        super(DeadlineExceeded, self).__init__(
+            "task_timeout(%ss) exceeded when %s, after %s" % (
+                deadline.timeout, what, deadline.describe_progress()))
+
+
+class Deadline(object):
+    """
+    Deadline is the time budget of a module run, set by the option
+    task_timeout. The HTTP calls and the waits take their timeout from the
+    remaining budget, and fail with DeadlineExceeded once it runs out. The
+    finished steps are kept to report how far the run got. Without
+    task_timeout, nothing is limited or recorded.
+    """
+
+    # the max number of the steps kept
+    max_steps = 50
+
+    def __init__(self, timeout=None):
+        self.timeout = timeout
+        self.enabled = bool(timeout)
+        self._start = time.time()
+        self._end = self._start + timeout if timeout else None
+        self._lock = threading.Lock()
+        self._steps = []
+        self._dropped = 0
+
+    def remaining(self):
+        """return the seconds left, None when there is no deadline"""
+        if self._end is None:
+            return None
+
+        return max(self._end - time.time(), 0)
+
+    def check(self, what):
+        if self._end is not None and time.time() >= self._end:
+            raise DeadlineExceeded(self, what)
+
+    def limit(self, timeout, what):
+        """return timeout cut to the remaining budget"""
+        if self._end is None:
+            return timeout
+
+        self.check(what)
+        remaining = self.remaining()
+        return remaining if timeout is None else min(timeout, remaining)
+
+    def step(self, desc):
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self._steps.append(desc)
+            if len(self._steps) > self.max_steps:
+                self._steps.pop(0)
+                self._dropped += 1
+
+    def summary(self):
+        with self._lock:
+            steps = list(self._steps)
+            dropped = self._dropped
+
+        return {
+            "task_timeout": self.timeout,
+            "elapsed": time.time() - self._start,
+            "steps": len(steps) + dropped,
+            "last_steps": steps,
+        }
+
+    def describe_progress(self):
+        s = self.summary()
+        if not s["steps"]:
+            return "%.1fs, no step was finished" % s["elapsed"]
+
+        return "%.1fs, %d steps were finished, the last: %s" % (
+            s["elapsed"], s["steps"], s["last_steps"][-1])
+
+
+class _NullSpan(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def set(self, key, value):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span(object):
+    def __init__(self, tracer, name, args):
+        self._tracer = tracer
+        self._name = name
+        self._args = args
+        self._start = None
+
+    def __enter__(self):
+        self._start = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        if exc_type is not None and exc_type is not SystemExit:
+            self._args["error"] = str(exc_value)
+
+        self._tracer.add_event(self._name, self._start, self._args)
+        return False
+
+    def set(self, key, value):
+        self._args[key] = value
+
+
+class Tracer(object):
+    """
+    Tracer records the spans of a module run in the Trace Event Format,
+    which can be loaded by chrome://tracing or Perfetto. The events are
+    written when the process exits, either to a new file in the directory
+    set by the env variable ANSIBLE_HCS_TRACE, or appended to the file set
+    by it. The timestamps are based on the epoch, so the files of all the
+    forks can be merged into one timeline. When the env variable is not
+    set, span returns a shared no-op span.
+    """
+
+    def __init__(self, path, name):
+        self.enabled = bool(path)
+        self._path = path
+        self._name = name or "module"
+        self._lock = threading.Lock()
+        self._events = []
+        self._pid = os.getpid()
+        self._main = None
+
+        if self.enabled:
+            self._main = self.span(self._name, cat="module").__enter__()
+            atexit.register(self.close)
+
+    def span(self, name, cat="hcs", **args):
+        if not self.enabled:
+            return _NULL_SPAN
+
+        args["cat"] = cat
+        return _Span(self, name, args)
+
+    def add_event(self, name, start, args):
+        cat = args.pop("cat", "hcs")
+        event = {
+            "name": name,
+            "cat": cat,
+            "ph": "X",
+            "ts": int(start * 1000000),
+            "dur": int((time.time() - start) * 1000000),
+            "pid": self._pid,
+            "tid": threading.current_thread().ident,
+            "args": args,
+        }
+        with self._lock:
+            self._events.append(event)
+
+    def close(self):
+        with self._lock:
+            main = self._main
+            self._main = None
+
+        if main is None:
+            return
+
+        main.__exit__(None, None, None)
+        try:
+            self._write()
+        except Exception:
+            # tracing must never break the module
+            pass
+
+    def _write(self):
+        events = [{
+            "name": "process_name", "ph": "M", "pid": self._pid, "tid": 0,
+            "args": {"name": "%s (%d)" % (self._name, self._pid)},
+        }]
+        with self._lock:
+            events.extend(self._events)
+
+        if os.path.isdir(self._path):
+            f = os.path.join(self._path, "%s-%d-%d.json" % (
+                self._name, self._pid, int(time.time() * 1000)))
+            with open(f, "w") as o:
+                json.dump({"traceEvents": events}, o)
+            return
+
+        # the JSON array format of which the closing bracket is optional,
+        # so the forks can append their events to the same file
+        with open(self._path, "a") as o:
+            try:
+                import fcntl
+                fcntl.flock(o, fcntl.LOCK_EX)
+            except ImportError:
+                pass
+
+            o.seek(0, os.SEEK_END)
+            if o.tell() == 0:
+                o.write("[\n")
+            o.write("".join(json.dumps(i) + ",\n" for i in events))
+
+
+def get_tracer(module):
+    """return the tracer of module, create it at the first time"""
+    tracer = getattr(module, "tracer", None)
+    if tracer is None:
+        tracer = Tracer(os.environ.get("ANSIBLE_HCS_TRACE"),
+                        getattr(module, "_name", None))
+        module.tracer = tracer
+
+    return tracer
+
+
+def start_profiler(module):
+    """
+    Profile the rest of the module run when the env variable
+    ANSIBLE_HCS_PROFILE is set to 'cpu', 'memory' or 'cpu,memory'. When the
+    process exits, the pstats of cProfile and the tracemalloc snapshot with
+    its top allocations are written to the directory ANSIBLE_HCS_PROFILE_DIR
+    (the temp directory by default). The files are named by the module,
+    ANSIBLE_HCS_PROFILE_LABEL which can be set per task, and the pid.
+    """
+    kinds = os.environ.get("ANSIBLE_HCS_PROFILE")
+    if not kinds or getattr(module, "_hcs_profiling", False):
+        return
+    module._hcs_profiling = True
+
+    kinds = set(i.strip() for i in kinds.split(","))
+    prefix = os.path.join(
+        os.environ.get("ANSIBLE_HCS_PROFILE_DIR") or tempfile.gettempdir(),
+        "-".join(i for i in [
+            getattr(module, "_name", None) or "module",
+            os.environ.get("ANSIBLE_HCS_PROFILE_LABEL"),
+            str(os.getpid())] if i))
+
+    profiler = None
+    if "cpu" in kinds:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    tracemalloc = None
+    if "memory" in kinds:
+        try:
+            import tracemalloc
+            tracemalloc.start()
+        except ImportError:
+            tracemalloc = None
+
+    def _stop():
+        try:
+            if profiler is not None:
+                profiler.disable()
+                profiler.dump_stats(prefix + ".pstats")
+
+            if tracemalloc is not None:
+                snapshot = tracemalloc.take_snapshot().filter_traces([
+                    tracemalloc.Filter(False, "*/cProfile.py"),
+                    tracemalloc.Filter(False, tracemalloc.__file__),
+                ])
+                current, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+                snapshot.dump(prefix + ".tracemalloc")
+                with open(prefix + ".tracemalloc.txt", "w") as o:
+                    o.write("current: %d bytes, peak: %d bytes\n" % (
+                        current, peak))
+                    for i in snapshot.statistics("lineno")[:50]:
+                        o.write("%s\n" % i)
+        except Exception:
+            # profiling must never break the module
+            pass
+
+    atexit.register(_stop)
+
+
+# the keys of which the values are replaced in the cassettes
+_SECRET_KEYS = frozenset(["password", "adminPass", "admin_pass", "secret"])
+
+
+def _redact(v):
+    if isinstance(v, dict):
+        return dict(
+            (k, _redact(i) if k not in _SECRET_KEYS or isinstance(
+                i, (dict, list)) else "******")
+            for k, i in v.items())
+    if isinstance(v, list):
+        return [_redact(i) for i in v]
+    return v
+
+
+def _build_response(request, status, reason, headers, data, elapsed):
+    """build the response of requests to request, with data as its body"""
+    import datetime
+    import io
+    from requests.models import Response
+    from requests.structures import CaseInsensitiveDict
+    from urllib3 import HTTPResponse
+
+    headers = dict(headers, **{"Content-Length": str(len(data))})
+
+    r = Response()
+    r.status_code = status
+    r.headers = CaseInsensitiveDict(headers)
+    r.raw = HTTPResponse(body=io.BytesIO(data), headers=headers,
+                         status=status, preload_content=False)
+    r.url = request.url
+    r.request = request
+    r.encoding = "utf-8"
+    r.reason = reason
+    r.elapsed = datetime.timedelta(seconds=elapsed)
+    return r
+
+
+class Cassette(object):
+    """
+    Cassette holds the request/response pairs of one module run. In record
+    mode the pairs are captured and written when the process exits, with
+    the passwords and the token replaced; in replay mode they are served
+    in the recorded order for each method and path, without any network
+    access, and optionally with the recorded latencies.
+    """
+
+    def __init__(self, path, mode, latency=False):
+        self.path = path
+        self.mode = mode
+        self._latency = latency
+        self._lock = threading.Lock()
+        self._interactions = []
+        self._queues = {}
+
+        if mode == "replay":
+            for i in self._load():
+                self._queues.setdefault(
+                    self._key(i["method"], i["uri"]), []).append(i)
+        else:
+            atexit.register(self.save)
+
+    @staticmethod
+    def _key(method, url):
+        # the host is not a part of the key, so a cassette recorded against
+        # one cloud can be replayed with any auth_url
+        u = urlparse(url)
+        return "%s %s%s" % (method, u.path, "?" + u.query if u.query else "")
+
+    def record(self, request, r, data, latency):
+        i = {
+            "method": request.method,
+            "uri": self._key(request.method, request.url).split(" ", 1)[1],
+            "status": r.status_code,
+            "latency": round(latency, 4),
+        }
+        if request.body:
+            try:
+                i["body"] = _redact(json.loads(request.body))
+            except ValueError:
+                i["body"] = "<non-json body>"
+
+        token = r.headers.get("X-Subject-Token")
+        if token:
+            i["token"] = True
+
+        ct = r.headers.get("Content-Type", "")
+        if data:
+            if "json" in ct:
+                i["json"] = _json_loads(data)
+            else:
+                i["text"] = data.decode("utf-8", "replace")
+            i["content_type"] = ct
+
+        with self._lock:
+            self._interactions.append(i)
+
+        return self.response(request, i)
+
+    def replay(self, request):
+        k = self._key(request.method, request.url)
+        with self._lock:
+            q = self._queues.get(k)
+            if not q:
+                raise HwcClientException(
+                    0, "No recorded response for %s in cassette %s" % (
+                        k, self.path))
+            # the last response of a path is served again when the queue
+            # runs out, e.g. for the polls of a wait
+            i = q.pop(0) if len(q) > 1 else q[0]
+
+        if self._latency:
+            time.sleep(i.get("latency", 0))
+
+        return self.response(request, i)
+
+    @staticmethod
+    def response(request, i):
+        if "json" in i:
+            data = json.dumps(i["json"]).encode("utf-8")
+        else:
+            data = i.get("text", "").encode("utf-8")
+
+        headers = {}
+        if "content_type" in i:
+            headers["Content-Type"] = i["content_type"]
+        if i.get("token"):
+            headers["X-Subject-Token"] = "recorded-token"
+
+        return _build_response(request, i["status"], "Recorded", headers,
+                               data, i.get("latency", 0))
+
+    def _load(self):
+        import gzip
+
+        opener = gzip.open if self.path.endswith(".gz") else open
+        try:
+            with opener(self.path, "rb") as o:
+                data = o.read()
+        except (IOError, OSError):
+            # every request fails with the missing response
+            return []
+
+        return json.loads(data.decode("utf-8"))["interactions"] if data \
+            else []
+
+    def save(self):
+        import gzip
+
+        with self._lock:
+            interactions = list(self._interactions)
+        if not interactions:
+            return
+
+        data = json.dumps({"version": 1, "interactions": interactions},
+                          separators=(",", ":"), sort_keys=True)
+        try:
+            opener = gzip.open if self.path.endswith(".gz") else open
+            with opener(self.path, "wb") as o:
+                o.write(data.encode("utf-8"))
+        except Exception:
+            # recording must never break the module
+            pass
+
+
+class _CassetteAdapter(object):
+    """
+    A transport adapter of requests, mounted on the keystone session, which
+    records the responses of the wrapped adapter into a cassette or replays
+    them from it.
+    """
+
+    def __init__(self, cassette, adapter=None):
+        self._cassette = cassette
+        self._adapter = adapter
+
+    def send(self, request, **kwargs):
+        if self._cassette.mode == "replay":
+            return self._cassette.replay(request)
+
+        start = time.time()
+        r = self._adapter.send(request, **kwargs)
+        data = r.content
+        return self._cassette.record(request, r, data, time.time() - start)
+
+    def close(self):
+        if self._adapter is not None:
+            self._adapter.close()
+
+
+def _recorded(path):
+    return os.path.isfile(path) and os.path.getsize(path) > 0
+
+
+def _cassette_path(module, path, mode):
+    """
+    Return the cassette of the run and its mode. When path is a directory,
+    every run of a module with the same params has its own cassette there,
+    numbered in the order of the runs, which the file .replay of the
+    directory counts; delete it to start from the first run again. Replay
+    starts over from the first run when the recorded ones are used up.
+    Without a mode, the run replays its cassette if it was recorded, and
+    is recorded when the module and params have no cassette yet.
+    """
+    if not os.path.isdir(path):
+        if mode is None:
+            mode = "replay" if _recorded(path) else "record"
+        return path, mode
+
+    params = dict((k, v) for k, v in module.params.items()
+                  if k not in ("auth", "api_stats"))
+    h = hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode(
+        "utf-8")).hexdigest()[:12]
+    prefix = "%s-%s" % (getattr(module, "_name", None) or "module", h)
+
+    def _file(n):
+        return os.path.join(path, "%s-%d.json" % (prefix, n))
+
+    state = os.path.join(path, ".replay")
+    with open(state, "a+") as o:
+        try:
+            import fcntl
+            fcntl.flock(o, fcntl.LOCK_EX)
+        except ImportError:
+            pass
+
+        o.seek(0)
+        counts = json.loads(o.read() or "{}")
+        # the number is reserved in .replay, for the concurrent forks, and
+        # the cassette is only written once there is a response in it
+        n = counts.get(prefix, 0)
+        if mode != "record" and n and not _recorded(_file(n)) and \
+                _recorded(_file(0)):
+            # the runs recorded by a previous pass are used up
+            n = 0
+        if mode is None:
+            mode = "replay" if _recorded(_file(n)) else "record"
+
+        counts[prefix] = n + 1
+        o.seek(0)
+        o.truncate()
+        json.dump(counts, o)
+
+    return _file(n), mode
+
+
+def get_transport(module, adapter):
+    """
+    Return the transport adapter for the keystone session of module. It is
+    adapter itself, unless the env variable ANSIBLE_HCS_CASSETTE names a
+    cassette file or directory. ANSIBLE_HCS_CASSETTE_MODE is 'record' or
+    'replay'; by default a recorded cassette is replayed and a missing one
+    is recorded, see _cassette_path. Set ANSIBLE_HCS_CASSETTE_LATENCY to
+    replay with the recorded latencies.
+    """
+    path = os.environ.get("ANSIBLE_HCS_CASSETTE")
+    if not path:
+        return adapter
+
+    mode = os.environ.get("ANSIBLE_HCS_CASSETTE_MODE")
+    if mode not in ("record", "replay"):
+        mode = None
+
+    path, mode = _cassette_path(module, path, mode)
+    cassette = Cassette(
+        path, mode,
+        latency=os.environ.get("ANSIBLE_HCS_CASSETTE_LATENCY", "").lower()
+        in ("1", "true", "yes"))
+    return _CassetteAdapter(cassette, adapter)
+
+
+def get_connection(module):
+    """
+    Return the hcs persistent connection of the task, which keeps the
+    keystone session, the endpoints and the connection pool for the whole
+    play, or None when the task does not run over it.
+    """
+    path = getattr(module, "_socket_path", None)
+    if not path:
+        return None
+
+    from ansible.module_utils.connection import Connection, ConnectionError
+
+    conn = Connection(path)
+    try:
+        # the socket may belong to another kind of persistent connection
+        conn.hcs_session()
+    except ConnectionError:
+        return None
+
+    return conn
+
+
+class _ConnectionAuth(BaseAuthPlugin):
+    """
+    A keystone auth plugin which takes the token and the endpoints from
+    the hcs persistent connection, service_level is 'project' or 'domain'.
+    """
+
+    def __init__(self, connection, service_level):
+        super(_ConnectionAuth, self).__init__()
+        self._connection = connection
+        self._service_level = service_level
+
+    def get_auth_ref(self, session, **kwargs):
+        return self._connection.hcs_token(self._service_level)
+
+    def get_token(self, session, **kwargs):
+        return self.get_auth_ref(session)
+
+    def get_endpoint(self, session, service_type=None, interface=None,
+                     region_name=None, **kwargs):
+        return self._connection.hcs_endpoint(
+            self._service_level, service_type, interface or "public",
+            region_name)
+
+    def get_endpoint_data(self, session, endpoint_override=None,
+                          discover_versions=True, **kwargs):
+        if not endpoint_override:
+            endpoint_override = self.get_endpoint(session, **kwargs)
+
+        return super(_ConnectionAuth, self).get_endpoint_data(
+            session, endpoint_override=endpoint_override,
+            discover_versions=discover_versions, **kwargs)
+
+    def get_project_id(self, session, **kwargs):
+        return self._connection.hcs_project_id(self._service_level)
+
+    def invalidate(self):
+        return self._connection.hcs_invalidate(self._service_level)
+
+
+class _ConnectionAdapter(object):
+    """
+    A transport adapter of requests, mounted on the keystone session, which
+    sends the requests by the hcs persistent connection, on its connection
+    pool.
+    """
+
+    def __init__(self, connection):
+        self._connection = connection
+
+    def send(self, request, timeout=None, **kwargs):
+        if isinstance(timeout, tuple):
+            timeout = max(i for i in timeout if i is not None) \
+                if any(i is not None for i in timeout) else None
+
+        body = request.body
+        if isinstance(body, bytes):
+            body = body.decode("utf-8")
+
+        r = self._connection.hcs_send(request.method, request.url,
+                                      dict(request.headers), body, timeout)
+        return _build_response(request, r["status"], r["reason"],
+                               r["headers"], r["body"].encode("utf-8"),
+                               r["elapsed"])
+
+    def close(self):
+        pass
+
+
+def openstack_cloud_from_connection(module):
+    """
+    Return (sdk, cloud) of openstacksdk over the hcs persistent connection,
+    or None when the task does not run over it.
+    """
+    conn = get_connection(module)
+    if conn is None:
+        return None
+
+    import openstack
+
+    s = session.Session(auth=_ConnectionAuth(conn, "project"),
+                        verify=module.params.get("validate_certs", True))
+    adapter = get_transport(module, _ConnectionAdapter(conn))
+    for scheme in list(s.session.adapters):
+        s.session.mount(scheme, adapter)
+
+    return openstack, openstack.connection.Connection(
+        session=s,
+        region_name=module.params.get("region_name") or conn.hcs_session()[
+            "region"],
+        interface=module.params.get("interface") or "public")
+
+
+class ListCache(object):
+    """
+    ListCache keeps the items returned by the list calls of a batch run,
+    so that the batch items sharing a list call fetch it once. Any other
+    call than GET clears it, as the listed resources may have changed;
+    writes counts those calls.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._items = {}
+        self.writes = 0
+
+    def get(self, k):
+        with self._lock:
+            return self._items.get(k)
+
+    def put(self, k, items):
+        with self._lock:
+            self._items[k] = items
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.writes += 1
+
+
+class PlanCache(object):
+    """
+    PlanCache keeps the plans of the module runs in the directory named by
+    the env variable ANSIBLE_HCS_PLAN. A run in check mode writes the ID of
+    the resource it found and the resource. The run with the same params
+    which applies it reads the resource by ID instead of searching it, and
+    uses the plan only when the resource is unchanged since; a plan is used
+    once.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def key(self, module):
+        """return the key of the current run, before it changes the params"""
+        params = dict((k, v) for k, v in module.params.items()
+                      if k not in ("auth", "api_stats", "batch"))
+        # the runs against other projects or domains must not share a
+        # plan, but the secrets are kept out of the key
+        params["auth"] = dict(
+            (k, v) for k, v in (module.params.get("auth") or {}).items()
+            if k not in _SECRET_KEYS)
+        h = hashlib.sha1(json.dumps(params, sort_keys=True, default=str)
+                         .encode("utf-8")).hexdigest()[:16]
+        return "%s-%s" % (getattr(module, "_name", None) or "module", h)
+
+    def _file(self, key):
+        return os.path.join(self.path, key + ".json")
+
+    def save(self, key, module, resource):
+        plan = {"id": module.params.get("id"), "resource": resource or None,
+                "created_at": int(time.time())}
+        try:
+            # the resources may carry secrets, e.g. in their user_data, so
+            # the plans are readable by their owner only
+            if not os.path.isdir(self.path):
+                os.makedirs(self.path, 0o700)
+            fd = os.open(self._file(key),
+                         os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w") as o:
+                json.dump(plan, o, sort_keys=True, default=str)
+        except (IOError, OSError):
+            # a plan only saves requests, it must never break the module
+            pass
+
+    def pop(self, key):
+        f = self._file(key)
+        try:
+            with open(f) as o:
+                plan = json.load(o)
+            os.remove(f)
+        except (IOError, OSError, ValueError):
+            return None
+
+        return plan if isinstance(plan, dict) else None
+
+    def resource(self, config, client, key, path, resp_key, fill):
+        """
+        Return the plan of the run when the resource it found, read by
+        path formatted with its ID, is the same as when the plan was
+        written, else None, and the run searches the resource as it does
+        without a plan. A plan without a resource is not used either, as
+        its absence can not be checked by ID.
+        """
+        plan = self.pop(key)
+        if not plan or not plan.get("id") or not plan.get("resource"):
+            return None
+
+        url = path % plan["id"]
+        with config.tracer.span("plan check"):
+            try:
+                r = navigate_value(client.get(url), [resp_key], None)
+            except HwcClientException:
+                return None
+
+        if not r:
+            return None
+
+        # the resources have no version or update time, the whole body
+        # tells whether it has changed
+        r = json.loads(json.dumps(fill(r), default=str))
+        if r != plan["resource"]:
+            return None
+
+        plan["resource"] = r
+        return plan
 
 
 class _ServiceClient(object):
-    def __init__(self, client, endpoint, product):
+    def __init__(self, client, endpoint, product, stats=None, tracer=None,
+                 deadline=None, cache=None):
         self._client = client
         self._endpoint = endpoint
+        self._stats = ApiStats(enabled=False) if stats is None else stats
+        self._tracer = Tracer(None, None) if tracer is None else tracer
+        self._deadline = Deadline() if deadline is None else deadline
+        self._cache = cache
         self._default_header = {
             'User-Agent': "Huawei-Ansible-MM-%s" % product,
             'Accept': 'application/json',
@@ -38,36 +1088,135 @@ class _ServiceClient(object):
 
     @session_method_wrapper
     def get(self, url, body=None, header=None, timeout=None):
-        return self._client.get(url, json=body, timeout=timeout,
-                                headers=self._header(header))
+        return self._send("GET", url, body, header, timeout)
+
+    def list_items(self, url, key, header=None, timeout=None):
+        """
+        Send a list request and return an iterator over the items of
+        body[key]. When ijson is installed the body is parsed incrementally
+        from the response stream, so only one item is held in memory.
+        With a list cache, the items are kept and served to the later
+        calls of the same url.
+        """
+        cache = self._cache
+        if cache is None:
+            return self._list_items(url, key, header, timeout)
+
+        k = (self.endpoint + url, key)
+        items = cache.get(k)
+        if items is None:
+            items = list(self._list_items(url, key, header, timeout))
+            cache.put(k, items)
+
+        return iter(items)
+
+    def _list_items(self, url, key, header, timeout):
+        call = self._stats.start("GET", url)
+        span = self._tracer.span("GET", cat="http", url=url).__enter__()
+        try:
+            r = self._client.get(
+                self.endpoint + url, stream=HAS_IJSON,
+                **self._request_args("GET", url, header, timeout, call))
+        except Exception as ex:
+            self._stats.finish(call)
+            span.__exit__(type(ex), ex, None)
+            if isinstance(ex, DeadlineExceeded):
+                raise
+            if self._deadline.enabled:
+                self._deadline.check("sending GET %s" % _path_template(url))
+            raise HwcClientException(
+                0, "Sending request failed, error=%s" % ex)
+
+        span.set("status", r.status_code)
+        # the steps are only formatted when there is a task_timeout
+        if self._deadline.enabled:
+            self._deadline.step("GET %s %d" % (_path_template(url),
+                                               r.status_code))
+        if not (HAS_IJSON and _success(r.status_code)):
+            self._stats.finish(call, r)
+            span.__exit__(None, None, None)
+            return iter(navigate_value(_parse_response(r), [key]) or [])
+
+        def _on_close(r, n):
+            self._stats.finish(call, r, n)
+            span.__exit__(None, None, None)
+
+        return _iter_items(r, key, _on_close)
 
     @session_method_wrapper
     def post(self, url, body=None, header=None, timeout=None):
-        return self._client.post(url, json=body, timeout=timeout,
-                                 headers=self._header(header))
+        return self._send("POST", url, body, header, timeout)
 
     @session_method_wrapper
     def delete(self, url, body=None, header=None, timeout=None):
-        return self._client.delete(url, json=body, timeout=timeout,
-                                   headers=self._header(header))
+        return self._send("DELETE", url, body, header, timeout)
 
     @session_method_wrapper
     def put(self, url, body=None, header=None, timeout=None):
-        return self._client.put(url, json=body, timeout=timeout,
-                                headers=self._header(header))
+        return self._send("PUT", url, body, header, timeout)
+
+    def _send(self, method, url, body, header, timeout):
+        path = url[len(self._endpoint):]
+        if self._cache is not None and method != "GET":
+            self._cache.clear()
+
+        call = self._stats.start(method, path)
+        with self._tracer.span(method, cat="http", url=path) as span:
+            try:
+                r = self._client.request(
+                    url, method, json=body,
+                    **self._request_args(method, path, header, timeout,
+                                         call))
+            except DeadlineExceeded:
+                self._stats.finish(call)
+                raise
+            except Exception:
+                self._stats.finish(call)
+                # a timeout cut by the deadline is reported as such
+                if self._deadline.enabled:
+                    self._deadline.check(
+                        "sending %s %s" % (method, _path_template(path)))
+                raise
+
+            span.set("status", r.status_code)
+            if self._deadline.enabled:
+                self._deadline.step("%s %s %d" % (
+                    method, _path_template(path), r.status_code))
+
+        self._stats.finish(call, r)
+        return r
+
+    def _request_args(self, method, path, header, timeout, call):
+        if self._deadline.enabled:
+            timeout = self._deadline.limit(
+                timeout, "sending %s %s" % (method, _path_template(path)))
+
+        kwargs = {"headers": self._header(header), "timeout": timeout}
+        if call is not None:
+            kwargs["hooks"] = {"response": call.count_attempt}
+
+        return kwargs
 
     def _header(self, header):
+        # build a new dict for every request, neither the caller's header
+        # nor the default header may be shared between threads
+        h = dict(self._default_header)
         if header and isinstance(header, dict):
-            for k, v in self._default_header.items():
-                if k not in header:
-                    header[k] = v
-        else:
-            header = self._default_header
+            h.update(header)
 
-        return header
+        return h
 
 
 class Config(object):
+    """
+    Config can be shared by the threads of one module run. All of the
+    service clients use the same keystone session, so the connection pool
+    is shared too, and each endpoint is looked up in the catalog only once.
+    """
+
+    # the max number of connections kept alive per host in the pool
+    pool_maxsize = 32
+
     def __init__(self, module, product, verify=True):
         self._project_client = None
         self._domain_client = None
@@ -75,6 +1224,16 @@ class Config(object):
         self._product = product
         self._verify = verify
         self._endpoints = {}
+        self._endpoints_lock = threading.Lock()
+        self._stats = getattr(module, "api_stats", None) or ApiStats(
+            enabled=bool(module.params.get("api_stats")))
+        self._tracer = get_tracer(module)
+        self._deadline = getattr(module, "deadline", None) or Deadline(
+            module.params.get("task_timeout"))
+        self._list_cache = ListCache() if module.params.get("batch") \
+            else None
+        path = os.environ.get("ANSIBLE_HCS_PLAN")
+        self._plan_cache = PlanCache(path) if path else None
 
         self._validate()
         self._gen_provider_client()
@@ -83,6 +1242,37 @@ class Config(object):
     def module(self):
         return self._module
 
+    @property
+    def stats(self):
+        return self._stats
+
+    @property
+    def tracer(self):
+        return self._tracer
+
+    @property
+    def deadline(self):
+        return self._deadline
+
+    @property
+    def list_cache(self):
+        """the list cache of a batch run, None otherwise"""
+        return self._list_cache
+
+    def for_module(self, module):
+        """
+        return a config of module sharing the keystone session, the
+        endpoints, the stats and the tracer of this one
+        """
+        c = copy.copy(self)
+        c._module = module
+        return c
+
+    @property
+    def plan_cache(self):
+        """the plan cache when ANSIBLE_HCS_PLAN is set, None otherwise"""
+        return self._plan_cache
+
     def client(self, region, service_type, service_level):
         c = self._project_client
         if service_level == "domain":
@@ -90,10 +1280,46 @@ class Config(object):
 
         e = self._get_service_endpoint(c, service_type, region)
 
-        return _ServiceClient(c, e, self._product)
+        return _ServiceClient(c, e, self._product, self._stats, self._tracer,
+                              self._deadline, self._list_cache)
+
+    def endpoint_client(self, endpoint, service_level="project"):
+        """return the client of an endpoint found before, e.g. by a job"""
+        c = self._project_client
+        if service_level == "domain":
+            c = self._domain_client
+
+        return _ServiceClient(c, endpoint, self._product, self._stats,
+                              self._tracer, self._deadline, self._list_cache)
 
     def _gen_provider_client(self):
         m = self._module
+
+        # the auth requests are bounded by the budget left at this time
+        s = session.Session(verify=self._verify,
+                            timeout=self._deadline.remaining())
+
+        conn = get_connection(m)
+        if conn is not None:
+            if not m.params.get('region'):
+                m.params['region'] = conn.hcs_session()["region"]
+
+            adapter = get_transport(m, _ConnectionAdapter(conn))
+            for scheme in list(s.session.adapters):
+                s.session.mount(scheme, adapter)
+
+            self._project_client = Adapter(
+                s, auth=self._watch_auth(_ConnectionAuth(conn, "project")),
+                raise_exc=False)
+            self._domain_client = Adapter(
+                s, auth=self._watch_auth(_ConnectionAuth(conn, "domain")),
+                raise_exc=False)
+            return
+
+        if not m.params['auth'].get('auth_url'):
+            m.fail_json(msg="missing required arguments: auth, it may be "
+                            "given by the hcs connection instead")
+
         p = {
             "auth_url": m.params['auth']['auth_url'],
             "password": m.params['auth']['password'],
@@ -103,37 +1329,81 @@ class Config(object):
             "reauthenticate": True
         }
 
+        adapter = get_transport(m, session.TCPKeepAliveAdapter(
+            pool_maxsize=self.pool_maxsize))
+        for scheme in list(s.session.adapters):
+            s.session.mount(scheme, adapter)
+
         self._project_client = Adapter(
-            session.Session(auth=v3.Password(**p), verify=self._verify),
-            raise_exc=False)
+            s, auth=self._watch_auth(v3.Password(**p)), raise_exc=False)
 
         p.pop("project_name")
         self._domain_client = Adapter(
-            session.Session(auth=v3.Password(**p), verify=self._verify),
-            raise_exc=False)
+            s, auth=self._watch_auth(v3.Password(**p)), raise_exc=False)
+
+    def _watch_auth(self, auth):
+        # record the time of getting token when the stats or the tracer is
+        # enabled
+        stats = self._stats
+        tracer = self._tracer
+        if not (stats.enabled or tracer.enabled):
+            return auth
+
+        get_auth_ref = auth.get_auth_ref
+
+        def _get_auth_ref(*args, **kwargs):
+            start = time.time()
+            try:
+                with tracer.span("auth"):
+                    return get_auth_ref(*args, **kwargs)
+            finally:
+                stats.add_time("auth", time.time() - start)
+
+        auth.get_auth_ref = _get_auth_ref
+        return auth
 
     def _get_service_endpoint(self, client, service_type, region):
         k = "%s.%s" % (service_type, region if region else "")
 
-        if k in self._endpoints:
-            return self._endpoints.get(k)
+        url = self._endpoints.get(k)
+        if url:
+            return url
+
+        with self._endpoints_lock:
+            # the endpoint may be found by another thread when waiting lock
+            url = self._endpoints.get(k)
+            if not url:
+                start = time.time()
+                auth_time = self._stats.elapsed("auth")
+
+                with self._tracer.span("catalog", endpoint=k):
+                    url = self._find_service_endpoint(
+                        client, k, service_type, region)
+                self._endpoints[k] = url
+
+                # the auth triggered by the lookup is not counted in
+                self._stats.add_time("catalog", time.time() - start - (
+                    self._stats.elapsed("auth") - auth_time))
+
+        return url
 
+    def _find_service_endpoint(self, client, k, service_type, region):
         url = None
         try:
             url = client.get_endpoint(service_type=service_type,
                                       region_name=region, interface="public")
         except Exception as ex:
+            self._deadline.check("getting endpoint for %s" % k)
             raise HwcClientException(
                 0, "Getting endpoint for %s failed, error=%s" % (k, ex))
 
-        if url == "":
+        if not url:
             raise HwcClientException(
                 0, "Can not find the endpoint for %s" % k)
 
         if url[-1] != "/":
             url += "/"
 
-        self._endpoints[k] = url
         return url
 
     def _validate(self):
@@ -174,8 +1444,496 @@ class HcsModule(AnsibleModule):
                 type='str',
                 fallback=(env_fallback, ['OS_REGION_NAME', 'ANSIBLE_HWC_REGION']),
             ),
-            id=dict(type='str')
+            id=dict(type='str'),
+            api_stats=dict(
+                type='bool',
+                fallback=(env_fallback, ['ANSIBLE_HCS_API_STATS']),
+            ),
+            task_timeout=dict(
+                type='int',
+                fallback=(env_fallback, ['ANSIBLE_HCS_TASK_TIMEOUT']),
+            ),
+            batch=dict(type='list', elements='dict'),
+            regions=dict(type='list', elements='str'),
         )
+        # the ID of a resource is only valid in its region
+        kwargs['mutually_exclusive'] = list(
+            kwargs.get('mutually_exclusive') or []) + [
+            ['regions', 'batch'], ['regions', 'id']]
+
+        raw_params = _load_params()
+
+        # the hcs connection of the task does the auth
+        if raw_params.get('_ansible_socket'):
+            for v in arg_spec['auth']['options'].values():
+                v.pop('required', None)
+
+        # the options of a batch run may be given by its items, which are
+        # checked against the complete spec one by one in run_module
+        self.item_spec = None
+        self.item_checks = {}
+        self.batch_item = False
+        if raw_params.get('batch'):
+            self.item_spec = copy.deepcopy(arg_spec)
+            for v in arg_spec.values():
+                v.pop('required', None)
+            for k in ('required_together', 'required_one_of', 'required_if'):
+                if k in kwargs:
+                    self.item_checks[k] = kwargs.pop(k)
+            if 'mutually_exclusive' in kwargs:
+                self.item_checks['mutually_exclusive'] = [
+                    [i for i in v if i != 'batch']
+                    for v in kwargs['mutually_exclusive']]
 
         super(HcsModule, self).__init__(*args, **kwargs)
 
+        self.api_stats = ApiStats(enabled=bool(self.params.get('api_stats')))
+        self.deadline = Deadline(self.params.get('task_timeout'))
+        get_tracer(self)
+        start_profiler(self)
+
+    def exit_json(self, **kwargs):
+        self._add_api_stats(kwargs)
+        super(HcsModule, self).exit_json(**kwargs)
+
+    def fail_json(self, msg, **kwargs):
+        if self.batch_item:
+            # only the current item of a batch run fails
+            raise BatchItemFailed(msg)
+
+        self._add_api_stats(kwargs)
+        deadline = getattr(self, 'deadline', None)
+        if deadline is not None and deadline.enabled:
+            kwargs['task_progress'] = deadline.summary()
+        super(HcsModule, self).fail_json(msg, **kwargs)
+
+    def _add_api_stats(self, result):
+        # fail_json may be called when parsing the arguments
+        stats = getattr(self, 'api_stats', None)
+        if stats is not None and stats.enabled:
+            result['api_stats'] = stats.summary()
+
+    def item_params(self, params, item):
+        """return the params of a batch item, checked by the module spec"""
+        if ArgumentSpecValidator is None:
+            raise HwcModuleException(
+                "the batch option requires ansible 2.11 or newer")
+
+        if not isinstance(item, dict):
+            raise HwcModuleException("a batch item must be a dict")
+
+        # unset options are None in params, leave them to the item, so
+        # that the required ones are checked
+        p = dict((k, v) for k, v in params.items()
+                 if k != 'batch' and v is not None)
+        p.update(item)
+        r = ArgumentSpecValidator(self.item_spec,
+                                  **self.item_checks).validate(p)
+        if r.error_messages:
+            raise HwcModuleException(", ".join(r.error_messages))
+
+        return r.validated_parameters
+
+
+class BatchItemFailed(Exception):
+    def __init__(self, message):
+        super(BatchItemFailed, self).__init__(message)
+
+
+class _RegionModule(object):
+    """
+    The module seen by the run of one region of a task with the option
+    regions. It has its own params, and fail_json fails the region only,
+    as the regions are run by threads.
+    """
+
+    def __init__(self, module, params):
+        self._module = module
+        self.params = params
+
+    def __getattr__(self, name):
+        return getattr(self._module, name)
+
+    def fail_json(self, msg, **kwargs):
+        raise BatchItemFailed(msg)
+
+
+# the max number of the regions of a task run at the same time
+MAX_REGION_WORKERS = 8
+
+
+def _run_regions(config, run, regions):
+    """
+    Exit the module with the results of run for every region, run at the
+    same time with the region option set to it. The regions share the
+    keystone session of config, so the token is got once, and each
+    endpoint is found in the catalog of that token.
+    """
+    from multiprocessing.pool import ThreadPool
+
+    module = config.module
+
+    def _run(region):
+        params = copy.deepcopy(module.params)
+        params.update(region=region, regions=None)
+
+        r = {'region': region}
+        try:
+            with config.tracer.span("region %s" % region):
+                r.update(run(config.for_module(
+                    _RegionModule(module, params))))
+        except Exception as ex:
+            r.update(failed=True, changed=False, msg=str(ex))
+        return r
+
+    # drop the repeated regions, keep the order
+    regions = [r for i, r in enumerate(regions) if r not in regions[:i]]
+
+    pool = ThreadPool(min(len(regions), MAX_REGION_WORKERS))
+    try:
+        results = pool.map(_run, regions)
+    finally:
+        pool.close()
+
+    changed = any(r.get('changed') for r in results)
+    if any(r.get('failed') for r in results):
+        module.fail_json(msg="One or more regions failed", changed=changed,
+                         regions=results)
+
+    module.exit_json(changed=changed, msg="All regions completed",
+                     regions=results)
+
+
+def run_module(config, run):
+    """
+    Exit the module with the result of run(config). When the option batch
+    is set, run is called for every item of it, with the options of the
+    task updated by the item, and the results are returned as the results
+    of a loop. The items share config, hence the auth, the endpoints, the
+    connections and the list calls. When the option regions is set, run is
+    called for every region at the same time, see _run_regions.
+    """
+    module = config.module
+    if module.params.get('regions'):
+        _run_regions(config, run, module.params['regions'])
+
+    items = module.params.get('batch')
+    if not items:
+        try:
+            result = run(config)
+        except Exception as ex:
+            module.fail_json(msg=str(ex))
+
+        module.exit_json(**result)
+
+    params = module.params
+    results = []
+    for item in items:
+        r = {'item': item}
+        try:
+            module.params = module.item_params(params, item)
+            module.batch_item = True
+            r.update(run(config))
+        except Exception as ex:
+            r.update(failed=True, changed=False, msg=str(ex))
+        finally:
+            module.batch_item = False
+        results.append(r)
+
+    module.params = params
+    changed = any(r['changed'] for r in results)
+    if any(r.get('failed') for r in results):
+        module.fail_json(msg="One or more items failed", changed=changed,
+                         results=results)
+
+    module.exit_json(changed=changed, msg="All items completed",
+                     results=results)
+
+
+def batch_action(ids, size, send_batch, send_one):
+    """
+    Call send_batch with at most size of ids at a time. The ids of a failed
+    call are sent one by one by send_one, so that the failed ones are told
+    apart from the others. Return the error message of every failed id.
+    """
+    errors = dict()
+    for i in range(0, len(ids), size):
+        chunk = ids[i:i + size]
+        try:
+            send_batch(chunk)
+            continue
+        except HwcClientException:
+            pass
+
+        for j in chunk:
+            try:
+                send_one(j)
+            except HwcClientException as ex:
+                errors[j] = str(ex)
+
+    return errors
+
+
+def wait_to_finish(config, target, pending, refresh, timeout,
+                   min_interval=1, delay=3):
+    """
+    It is same as wait_to_finish of hwc_utils, except that the time slept
+    is recorded in the stats of config, every poll is traced, and the wait
+    ends with DeadlineExceeded when the task_timeout runs out first.
+    """
+    tracer = config.tracer
+    deadline = config.deadline
+    polls = 0
+
+    def sleep(seconds):
+        remaining = deadline.remaining()
+        if remaining is not None and remaining < seconds:
+            config.stats.sleep(remaining)
+            deadline.check("waiting after %d polls" % polls)
+        config.stats.sleep(seconds)
+
+    is_last_time = False
+    not_found_times = 0
+    wait = 0
+
+    sleep(delay)
+
+    end = time.time() + timeout
+    while not is_last_time:
+        if time.time() > end:
+            is_last_time = True
+
+        polls += 1
+        with tracer.span("wait poll %d" % polls) as span:
+            obj, status = refresh()
+            span.set("status", status)
+        deadline.step("wait poll %d: %s" % (polls, status))
+
+        if obj is None:
+            not_found_times += 1
+
+            if not_found_times > 10:
+                raise HwcModuleException(
+                    "not found the object for %d times" % not_found_times)
+        else:
+            not_found_times = 0
+
+            if status in target:
+                return obj
+
+            if pending and status not in pending:
+                raise HwcModuleException(
+                    "unexpect status(%s) occured" % status)
+
+        if not is_last_time:
+            wait *= 2
+            if wait < min_interval:
+                wait = min_interval
+            elif wait > 10:
+                wait = 10
+
+            sleep(wait)
+
+    raise HwcModuleException("asycn wait timeout after %d seconds" % timeout)
+
+
+# the list API of the resources of a job, see job_handle
+_JobType = collections.namedtuple(
+    "_JobType", ["path", "key", "id_field", "status_field", "failures",
+                 "paged", "version"])
+
+_JOB_TYPES = {
+    "as_group": _JobType(
+        "scaling_group", "scaling_groups", "scaling_group_id",
+        "scaling_group_status", ["ERROR"], True, None),
+    "lb_loadbalancer": _JobType(
+        "lbaas/loadbalancers?fields=id&fields=provisioning_status",
+        "loadbalancers", "id", "provisioning_status", ["ERROR"], False,
+        "v2.0"),
+}
+
+# the max number of items in a page of the list APIs polled for the jobs
+JOB_PAGE_SIZE = 100
+
+
+def job_handle(resource_type, resource_id, target, endpoint):
+    """
+    Return the handle of a job which drives the resource to target, a list
+    of statuses or "absent". The module returning it does not wait, the
+    handles are waited for together by hcs_wait.
+    """
+    job_type = _JOB_TYPES.get(resource_type)
+    if job_type is None:
+        raise HwcModuleException("unknown job type(%s)" % resource_type)
+
+    # the catalog endpoint of some services has no version, which their
+    # SDK adds to every call
+    endpoint = endpoint.rstrip("/")
+    if job_type.version and not endpoint.endswith("/" + job_type.version):
+        endpoint += "/" + job_type.version
+    endpoint += "/"
+
+    return {"type": resource_type, "id": resource_id, "target": target,
+            "endpoint": endpoint}
+
+
+def _list_job_resources(client, job_type):
+    if not job_type.paged:
+        for i in client.list_items(job_type.path, job_type.key):
+            yield i
+        return
+
+    link = job_type.path + "?limit=%d&start_number={start_number}" % (
+        JOB_PAGE_SIZE)
+    start = 0
+    while True:
+        n = 0
+        for i in client.list_items(link.format(start_number=start),
+                                   job_type.key):
+            n += 1
+            yield i
+
+        # a short page is the last one
+        if n < JOB_PAGE_SIZE:
+            break
+
+        start += JOB_PAGE_SIZE
+
+
+def wait_for_jobs(config, jobs, timeout):
+    """
+    Wait until the resources of the jobs reach their targets. The jobs of
+    the same type and endpoint are polled together, by listing the
+    resources once per poll instead of reading them one by one. Return the
+    state of every job, which is done, failed or pending, and the error
+    which ended the wait, or None.
+    """
+    states = []
+    polled = collections.OrderedDict()
+    for n, j in enumerate(jobs):
+        if j.get("type") not in _JOB_TYPES:
+            raise HwcModuleException("unknown job type(%s)" % j.get("type"))
+
+        states.append({"type": j["type"], "id": j["id"], "state": "pending",
+                       "status": None})
+        polled.setdefault((j["type"], j["endpoint"]), []).append(n)
+
+    clients = {}
+
+    def _refresh():
+        for (t, endpoint), indexes in polled.items():
+            todo = [n for n in indexes if states[n]["state"] == "pending"]
+            if not todo:
+                continue
+
+            job_type = _JOB_TYPES[t]
+            client = clients.get(endpoint)
+            if client is None:
+                client = clients[endpoint] = config.endpoint_client(endpoint)
+
+            found = dict(
+                (navigate_value(i, [job_type.id_field]),
+                 i.get(job_type.status_field))
+                for i in _list_job_resources(client, job_type))
+
+            for n in todo:
+                s = states[n]
+                target = jobs[n]["target"]
+                if s["id"] not in found:
+                    s["status"] = None
+                    if target == "absent":
+                        s["state"] = "done"
+                    else:
+                        s.update(state="failed", msg="%s(%s) is not found" % (
+                            t, s["id"]))
+                    continue
+
+                status = s["status"] = found[s["id"]]
+                if target != "absent" and status in target:
+                    s["state"] = "done"
+                elif status in job_type.failures:
+                    s.update(state="failed", msg="%s(%s) is in status %s" % (
+                        t, s["id"], status))
+
+        left = any(s["state"] == "pending" for s in states)
+        return states, "pending" if left else "done"
+
+    error = None
+    try:
+        wait_to_finish(config, ["done"], ["pending"], _refresh, timeout,
+                       delay=0)
+    except HwcModuleException as ex:
+        error = str(ex)
+
+    return states, error
+
+
+def _run_node(name, run, args, finished):
+    try:
+        finished.put((name, ("done", run(args))))
+    except Exception as ex:
+        finished.put((name, ("failed", str(ex))))
+
+
+def run_graph(nodes, max_workers=8):
+    """
+    Run the nodes of a dependency graph, an ordered dict of name to (deps,
+    run), up to max_workers at a time. A node runs once all of its deps are
+    done, and run gets their results by name; a node is skipped when one of
+    its deps has failed or is skipped. run must raise instead of calling
+    fail_json, which can not exit the module from a thread. Return the
+    state of every node: ("done", result), ("failed", error message) or
+    ("skipped", None).
+    """
+    for name, (deps, _) in nodes.items():
+        unknown = [d for d in deps if d not in nodes]
+        if unknown:
+            raise HwcModuleException(
+                "node(%s) depends on unknown nodes(%s)" % (
+                    name, ", ".join(unknown)))
+
+    from multiprocessing.pool import ThreadPool
+
+    states = dict()
+    started = set()
+    finished = queue.Queue()
+    running = 0
+    pool = ThreadPool(max(1, min(max_workers, len(nodes))))
+    try:
+        while len(states) < len(nodes):
+            progress = True
+            while progress:
+                progress = False
+                for name, (deps, run) in nodes.items():
+                    if name in started:
+                        continue
+
+                    s = [states.get(d, (None,))[0] for d in deps]
+                    if "failed" in s or "skipped" in s:
+                        states[name] = ("skipped", None)
+                    elif all(i == "done" for i in s):
+                        running += 1
+                        pool.apply_async(_run_node, (
+                            name, run,
+                            dict((d, states[d][1]) for d in deps), finished))
+                    else:
+                        continue
+
+                    started.add(name)
+                    progress = True
+
+            if len(states) == len(nodes):
+                break
+
+            if not running:
+                raise HwcModuleException(
+                    "found a cycle in the nodes(%s)" % ", ".join(
+                        n for n in nodes if n not in started))
+
+            name, state = finished.get()
+            running -= 1
+            states[name] = state
+    finally:
+        pool.close()
+
+    return states
@@ -0,0 +1,43 @@
+# Copyright (C) 2019 Huawei
+# GNU General Public License v3.0+ (see COPYING or
+# https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from ansible.module_utils.six import string_types
+from ansible.plugins.action import ActionBase
+
+
+class ActionModule(ActionBase):
+    """
+    Run an hcs_as_* module. When the option batch is set, all of its items
+    are sent to one module process, which shares the auth, the endpoints
+    and the list calls among them, and the registered result has the shape
+    of a loop, so that a task can switch from loop to batch without
+    changing the tasks which use its result.
+
+    It is installed as the action of hcs_as_group, hcs_as_policy and
+    hcs_as_configuration by install.sh.
+    """
+
+    def run(self, tmp=None, task_vars=None):
+        result = super(ActionModule, self).run(tmp, task_vars)
+        del tmp
+
+        batch = self._task.args.get('batch')
+        if batch is not None and (
+                isinstance(batch, string_types) or
+                not isinstance(batch, list) or
+                not all(isinstance(i, dict) for i in batch)):
+            result.update(failed=True,
+                          msg="batch must be a list of dicts, one per item")
+            return result
+
+        result.update(self._execute_module(task_vars=task_vars))
+        if not batch:
+            return result
+
+        for r in result.get('results', []):
+            r['ansible_loop_var'] = 'item'
+        return result
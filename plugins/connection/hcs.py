@@ -0,0 +1,263 @@
+# Copyright (C) 2019 Huawei
+# GNU General Public License v3.0+ (see COPYING or
+# https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = """
+---
+author: Huawei
+name: hcs
+short_description: Persistent connection to the HCS APIs
+description:
+  - This connection plugin keeps the keystone session, the service endpoints
+    and the HTTP connection pool of HCS alive for the whole play. The
+    hcs_as_* and hcs_lb_* modules run on the controller and send their API
+    calls through it, so the token is got once and the connections are
+    reused across the tasks, instead of once per task.
+  - The auth options of the tasks are not used with this connection. The
+    modules of a task which does not use it work as before.
+options:
+  auth_url:
+    description:
+      - The Identity authentication URL.
+    env:
+      - name: OS_AUTH_URL
+      - name: ANSIBLE_HWC_IDENTITY_ENDPOINT
+    vars:
+      - name: ansible_hcs_auth_url
+  username:
+    description:
+      - The user name to login with.
+    env:
+      - name: OS_USERNAME
+      - name: ANSIBLE_HWC_USER
+    vars:
+      - name: ansible_hcs_username
+  password:
+    description:
+      - The password to login with.
+    env:
+      - name: OS_PASSWORD
+      - name: ANSIBLE_HWC_PASSWORD
+    vars:
+      - name: ansible_hcs_password
+  domain_name:
+    description:
+      - The name of the Domain to scope to.
+    env:
+      - name: OS_DOMAIN_NAME
+      - name: ANSIBLE_HWC_DOMAIN
+    vars:
+      - name: ansible_hcs_domain_name
+  project_name:
+    description:
+      - The name of the Project to scope to.
+    env:
+      - name: OS_PROJECT_NAME
+      - name: ANSIBLE_HWC_PROJECT
+    vars:
+      - name: ansible_hcs_project_name
+  region:
+    description:
+      - The region of the endpoints used when the task does not set one.
+    env:
+      - name: OS_REGION_NAME
+      - name: ANSIBLE_HWC_REGION
+    vars:
+      - name: ansible_hcs_region
+  validate_certs:
+    type: boolean
+    description:
+      - Whether to verify the TLS certificates of the APIs.
+    default: True
+    vars:
+      - name: ansible_hcs_validate_certs
+  pool_maxsize:
+    type: int
+    description:
+      - The max number of connections kept alive per host in the pool.
+    default: 32
+    vars:
+      - name: ansible_hcs_pool_maxsize
+  persistent_connect_timeout:
+    type: int
+    description:
+      - Configures, in seconds, the amount of time to wait when trying to
+        initially establish a persistent connection. It is also the time the
+        idle connection is kept.
+    default: 30
+    ini:
+      - section: persistent_connection
+        key: connect_timeout
+    env:
+      - name: ANSIBLE_PERSISTENT_CONNECT_TIMEOUT
+    vars:
+      - name: ansible_connect_timeout
+  persistent_command_timeout:
+    type: int
+    description:
+      - Configures, in seconds, the amount of time to wait for an API call
+        to return.
+    default: 30
+    ini:
+      - section: persistent_connection
+        key: command_timeout
+    env:
+      - name: ANSIBLE_PERSISTENT_COMMAND_TIMEOUT
+    vars:
+      - name: ansible_command_timeout
+  persistent_log_messages:
+    type: boolean
+    description:
+      - This flag will enable logging the API calls in the ansible log file.
+        For this option to work 'log_path' ansible configuration option is
+        required to be set to a file path with write access.
+    default: False
+    ini:
+      - section: persistent_connection
+        key: log_messages
+    env:
+      - name: ANSIBLE_PERSISTENT_LOG_MESSAGES
+    vars:
+      - name: ansible_persistent_log_messages
+"""
+
+import traceback
+
+from ansible.errors import AnsibleConnectionFailure
+from ansible.plugins.connection import NetworkConnectionBase
+
+KEYSTONEAUTH_IMP_ERR = None
+try:
+    from keystoneauth1.identity import v3
+    from keystoneauth1 import session
+    HAS_KEYSTONEAUTH = True
+except ImportError:
+    KEYSTONEAUTH_IMP_ERR = traceback.format_exc()
+    HAS_KEYSTONEAUTH = False
+
+# the headers which describe the body as sent on the wire, the body passed
+# back to the module is decoded already
+_WIRE_HEADERS = frozenset(
+    ["content-encoding", "content-length", "transfer-encoding"])
+
+
+class Connection(NetworkConnectionBase):
+    """
+    The hcs_* methods are called by the modules over the socket of the
+    persistent connection, see get_connection of hcs_utils.
+    """
+
+    transport = 'hcs'
+    has_pipelining = False
+
+    def __init__(self, play_context, *args, **kwargs):
+        super(Connection, self).__init__(play_context, *args, **kwargs)
+        self._session = None
+        self._auth = {}
+        self._endpoints = {}
+
+    def _connect(self):
+        # _connected is set already when the socket exists
+        if self._session is not None:
+            return self
+
+        if not HAS_KEYSTONEAUTH:
+            raise AnsibleConnectionFailure(
+                "keystoneauth1 is required by the hcs connection: %s" %
+                KEYSTONEAUTH_IMP_ERR)
+
+        p = {
+            "auth_url": self.get_option('auth_url'),
+            "password": self.get_option('password'),
+            "username": self.get_option('username'),
+            "project_name": self.get_option('project_name'),
+            "user_domain_name": self.get_option('domain_name'),
+            "reauthenticate": True
+        }
+        missing = [k for k in ('auth_url', 'username', 'password',
+                               'domain_name', 'project_name')
+                   if not self.get_option(k)]
+        if missing:
+            raise AnsibleConnectionFailure(
+                "missing options of the hcs connection: %s" %
+                ", ".join(missing))
+
+        s = session.Session(verify=self.get_option('validate_certs'))
+        adapter = session.TCPKeepAliveAdapter(
+            pool_maxsize=self.get_option('pool_maxsize'))
+        for scheme in list(s.session.adapters):
+            s.session.mount(scheme, adapter)
+        self._session = s
+
+        self._auth["project"] = v3.Password(**p)
+        p.pop("project_name")
+        self._auth["domain"] = v3.Password(**p)
+
+        self.queue_message('vvvv', 'hcs connection to %s' % p["auth_url"])
+        self._connected = True
+        return self
+
+    def close(self):
+        if self._session is not None:
+            self._session.session.close()
+            self._session = None
+        self._auth = {}
+        self._endpoints = {}
+        super(Connection, self).close()
+
+    def hcs_session(self):
+        """check the connection and return its defaults"""
+        self._connect()
+        return {"region": self.get_option('region')}
+
+    def hcs_token(self, service_level):
+        """return the token of the project or the domain"""
+        self._connect()
+        return self._auth[service_level].get_token(self._session)
+
+    def hcs_invalidate(self, service_level):
+        """drop the token after an authentication failure"""
+        self._connect()
+        self._endpoints.clear()
+        return self._auth[service_level].invalidate()
+
+    def hcs_project_id(self, service_level):
+        self._connect()
+        return self._auth[service_level].get_project_id(self._session)
+
+    def hcs_endpoint(self, service_level, service_type, interface, region):
+        """return the endpoint of the service from the catalog"""
+        self._connect()
+
+        k = (service_level, service_type, interface, region or "")
+        url = self._endpoints.get(k)
+        if url is None:
+            url = self._auth[service_level].get_endpoint(
+                self._session, service_type=service_type,
+                interface=interface, region_name=region)
+            if url:
+                self._endpoints[k] = url
+
+        return url
+
+    def hcs_send(self, method, url, headers, body, timeout):
+        """send the request on the pool and return its response"""
+        self._connect()
+        self._log_messages("%s %s" % (method, url))
+
+        r = self._session.session.request(
+            method, url, headers=headers,
+            data=body.encode("utf-8") if body is not None else None,
+            timeout=timeout, allow_redirects=False)
+
+        return {
+            "status": r.status_code,
+            "reason": r.reason,
+            "headers": dict((k, v) for k, v in r.headers.items()
+                            if k.lower() not in _WIRE_HEADERS),
+            "body": r.content.decode("utf-8", "replace"),
+            "elapsed": r.elapsed.total_seconds(),
+        }
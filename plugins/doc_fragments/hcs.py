@@ -11,6 +11,7 @@ options:
     auth:
         description:
             - Dictionary containing auth information as needed by the cloud's auth plugin strategy.
+            - It is not used, and not required, when the task runs over the hcs connection.
         type: dict
         suboptions:
             auth_url:
@@ -48,6 +49,39 @@ options:
         description:
             - The id of resource to be managed.
         type: str
+    api_stats:
+        description:
+            - Whether to return the statistics of the API calls in C(api_stats), including
+              the method, path, status, bytes, duration and retries of the calls, and the
+              total time spent on auth, endpoint lookup and waiting.
+        type: bool
+        default: false
+    task_timeout:
+        description:
+            - The time budget of the task in seconds. Every API call and wait takes its
+              timeout from the time left, and the task fails when it runs out, with the
+              finished steps in C(task_progress). There is no limit by default.
+        type: int
+    batch:
+        description:
+            - A list of items to run the task for, each a dict of options overriding the
+              options of the task. The items are run one after another in one module
+              process, which shares the auth, the endpoints and the list calls among them,
+              and the result has the C(results) of a loop. Use it instead of C(loop) for
+              many resources of the same kind. The options required by the module may be
+              given by the items only. It requires ansible 2.11 or newer.
+        type: list
+        elements: dict
+    regions:
+        description:
+            - A list of regions to run the task in at the same time, instead of region.
+              The regions share the token of the task, and their endpoints are found in
+              its catalog, so the project must be reachable in all of them. The result
+              has the result of every region in C(regions), with the region in
+              C(region); a failed region does not stop the others. It can not be used
+              with batch or id.
+        type: list
+        elements: str
 notes:
   - For authentication, you can set auth/auth_url using the C(OS_AUTH_URL) env variable.
   - For authentication, you can set auth/username using the C(OS_USERNAME) env variable.
@@ -55,6 +89,8 @@ notes:
   - For authentication, you can set auth/domain_name using the C(OS_DOMAIN_NAME) env variable.
   - For authentication, you can set auth/project_name using the C(OS_PROJECT_NAME) env variable.
   - For authentication, you can set region using the C(OS_REGION_NAME) env variable.
+  - You can set api_stats using the C(ANSIBLE_HCS_API_STATS) env variable.
+  - You can set task_timeout using the C(ANSIBLE_HCS_TASK_TIMEOUT) env variable.
   - Environment variables values will only be used if the playbook values are not set.
 '''
 
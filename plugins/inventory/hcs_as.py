@@ -0,0 +1,305 @@
+# Copyright (C) 2019 Huawei
+# GNU General Public License v3.0+ (see COPYING or
+# https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = """
+---
+author: Huawei
+name: hcs_as
+short_description: The instances of the auto-scaling groups of HCS
+description:
+  - Lists the auto-scaling groups of HCS and their instances, and adds the
+    instances as hosts, grouped by scaling group, availability zone and life
+    cycle status.
+  - The instance lists of the groups are fetched in parallel.
+  - With the inventory cache enabled, the groups and instances are listed
+    only when the cache is older than cache_timeout or flushed, not on every
+    start of ansible-playbook.
+  - The inventory source must be a file ending in hcs_as.yml or hcs_as.yaml.
+extends_documentation_fragment:
+  - constructed
+  - inventory_cache
+options:
+  plugin:
+    description:
+      - The name of this plugin.
+    required: True
+    choices: ['hcs_as']
+  auth_url:
+    description:
+      - The Identity authentication URL.
+    env:
+      - name: OS_AUTH_URL
+      - name: ANSIBLE_HWC_IDENTITY_ENDPOINT
+  username:
+    description:
+      - The user name to login with.
+    env:
+      - name: OS_USERNAME
+      - name: ANSIBLE_HWC_USER
+  password:
+    description:
+      - The password to login with.
+    env:
+      - name: OS_PASSWORD
+      - name: ANSIBLE_HWC_PASSWORD
+  domain_name:
+    description:
+      - The name of the Domain to scope to.
+    env:
+      - name: OS_DOMAIN_NAME
+      - name: ANSIBLE_HWC_DOMAIN
+  project_name:
+    description:
+      - The name of the Project to scope to.
+    env:
+      - name: OS_PROJECT_NAME
+      - name: ANSIBLE_HWC_PROJECT
+  region:
+    description:
+      - The region of the auto-scaling groups. By default it is the region
+        the name of the project starts with.
+    env:
+      - name: OS_REGION_NAME
+      - name: ANSIBLE_HWC_REGION
+  group_names:
+    description:
+      - Only add the instances of the AS groups with these names.
+    type: list
+    elements: str
+    default: []
+  hostnames:
+    description:
+      - The field of the instance used as the name of the host.
+    choices: ['instance_name', 'instance_id']
+    default: 'instance_name'
+  max_workers:
+    description:
+      - The max number of the instance lists fetched at the same time.
+    type: int
+    default: 8
+"""
+
+EXAMPLES = """
+# hcs_as.yml
+plugin: hcs_as
+region: region-1
+group_names:
+  - web-group
+cache: true
+cache_plugin: jsonfile
+cache_connection: ~/.ansible/hcs_as_cache
+cache_timeout: 600
+keyed_groups:
+  - key: hcs_as_health_status
+    prefix: health
+"""
+
+from multiprocessing.pool import ThreadPool
+
+from ansible import constants as C
+from ansible.errors import AnsibleError
+from ansible.plugins.inventory import (
+    BaseInventoryPlugin, Cacheable, Constructable)
+
+# the max number of items in a page of the list APIs
+LIST_PAGE_SIZE = 100
+
+# the fields of the groups kept in the cache
+GROUP_FIELDS = ("scaling_group_id", "scaling_group_name",
+                "scaling_group_status", "available_zones")
+
+# the fields of the instances kept in the cache
+INSTANCE_FIELDS = ("instance_id", "instance_name", "life_cycle_state",
+                   "health_status", "protect_from_scaling_down",
+                   "scaling_configuration_id", "availability_zone",
+                   "create_time")
+
+
+def _load_hcs_utils():
+    """
+    The inventory runs on the controller, where the module_utils paths of
+    the modules are not searched, so they are added to ansible.module_utils
+    before hcs_utils is imported.
+    """
+    import ansible.module_utils
+
+    for p in C.DEFAULT_MODULE_UTILS_PATH or []:
+        if p not in ansible.module_utils.__path__:
+            ansible.module_utils.__path__.append(p)
+
+    try:
+        from ansible.module_utils import hcs_utils
+    except ImportError as ex:
+        raise AnsibleError(
+            "hcs_utils is not found in the module_utils paths, run "
+            "install.sh first: %s" % ex)
+
+    return hcs_utils
+
+
+class _PluginModule(object):
+    """The part of AnsibleModule which Config relies on."""
+
+    _name = "hcs_as inventory"
+
+    def __init__(self, params):
+        self.params = params
+        self.check_mode = False
+
+    def fail_json(self, msg, **kwargs):
+        raise AnsibleError(msg)
+
+
+class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
+
+    NAME = 'hcs_as'
+
+    def verify_file(self, path):
+        return super(InventoryModule, self).verify_file(path) and \
+            path.endswith(("hcs_as.yml", "hcs_as.yaml"))
+
+    def parse(self, inventory, loader, path, cache=True):
+        super(InventoryModule, self).parse(inventory, loader, path, cache)
+        self._read_config_data(path)
+
+        cache_key = self.get_cache_key(path)
+        use_cache = self.get_option('cache') and cache
+        update_cache = self.get_option('cache') and not cache
+
+        groups = None
+        if use_cache:
+            try:
+                groups = self._cache[cache_key]
+            except KeyError:
+                update_cache = True
+
+        if groups is None:
+            groups = self._fetch()
+
+        if update_cache:
+            self._cache[cache_key] = groups
+
+        self._populate(groups)
+
+    def _config(self):
+        hcs_utils = _load_hcs_utils()
+
+        auth = dict((k, self.get_option(k)) for k in (
+            'auth_url', 'username', 'password', 'domain_name',
+            'project_name'))
+        missing = [k for k, v in auth.items() if not v]
+        if missing:
+            raise AnsibleError("missing options of the hcs_as inventory: %s"
+                               % ", ".join(sorted(missing)))
+
+        module = _PluginModule({
+            "auth": auth,
+            "region": self.get_option('region') or
+            auth['project_name'].split("_")[0],
+            "id": None,
+            "api_stats": False,
+            "task_timeout": None,
+            "batch": None,
+        })
+        return hcs_utils.Config(module, "as", verify=False)
+
+    def _fetch(self):
+        """return the groups, each with its instances"""
+        config = self._config()
+        client = config.client(config.module.params['region'],
+                               "autoscaling", "project")
+
+        names = self.get_option('group_names')
+        groups = []
+        for g in self._list(client, "scaling_group", "scaling_groups"):
+            if names and g.get("scaling_group_name") not in names:
+                continue
+            groups.append(dict((k, g.get(k)) for k in GROUP_FIELDS))
+
+        def _instances(g):
+            url = "scaling_group_instance/%s/list" % g["scaling_group_id"]
+            return [dict((k, i.get(k)) for k in INSTANCE_FIELDS)
+                    for i in self._list(client, url,
+                                        "scaling_group_instances")]
+
+        # the token and the endpoint are got by the list of the groups, so
+        # the threads only share the connection pool
+        if groups:
+            pool = ThreadPool(min(self.get_option('max_workers'),
+                                  len(groups)))
+            try:
+                for g, instances in zip(groups, pool.map(_instances, groups)):
+                    g["instances"] = instances
+            finally:
+                pool.close()
+
+        return groups
+
+    def _list(self, client, url, key):
+        link = url + "?limit=%d&start_number={start_number}" % LIST_PAGE_SIZE
+
+        start = 0
+        while True:
+            u = link.format(start_number=start)
+            n = 0
+            try:
+                for item in client.list_items(u, key):
+                    n += 1
+                    yield item
+            except Exception as ex:
+                raise AnsibleError(
+                    "hcs_as inventory: error running api(list), url: %s%s, "
+                    "error: %s" % (client.endpoint, u, ex))
+
+            # a short page is the last one
+            if n < LIST_PAGE_SIZE:
+                break
+
+            start += LIST_PAGE_SIZE
+
+    def _populate(self, groups):
+        hostnames = self.get_option('hostnames')
+        strict = self.get_option('strict')
+
+        for g in groups:
+            as_group = self.inventory.add_group(
+                self._sanitize_group_name("as_" + g["scaling_group_name"]))
+
+            # the instances of a group in one AZ are in that AZ
+            zones = g.get("available_zones") or []
+            group_zone = zones[0] if len(zones) == 1 else None
+
+            for i in g["instances"]:
+                host = i.get(hostnames) or i["instance_id"]
+                self.inventory.add_host(host, group=as_group)
+
+                hostvars = dict(("hcs_as_" + k, v) for k, v in i.items())
+                hostvars.update(
+                    hcs_as_availability_zone=i.get("availability_zone") or
+                    group_zone,
+                    hcs_as_group_id=g["scaling_group_id"],
+                    hcs_as_group_name=g["scaling_group_name"])
+                for k, v in hostvars.items():
+                    self.inventory.set_variable(host, k, v)
+
+                zone = hostvars["hcs_as_availability_zone"]
+                if zone:
+                    self.inventory.add_child(self.inventory.add_group(
+                        self._sanitize_group_name("az_" + zone)), host)
+
+                state = i.get("life_cycle_state")
+                if state:
+                    self.inventory.add_child(self.inventory.add_group(
+                        self._sanitize_group_name(
+                            "status_" + state.lower())), host)
+
+                self._set_composite_vars(
+                    self.get_option('compose'), hostvars, host, strict)
+                self._add_host_to_composed_groups(
+                    self.get_option('groups'), hostvars, host, strict)
+                self._add_host_to_keyed_groups(
+                    self.get_option('keyed_groups'), hostvars, host, strict)
@@ -0,0 +1,311 @@
+#!/usr/bin/env python
+# Copyright (C) 2019 Huawei
+# GNU General Public License v3.0+ (see COPYING or
+# https://www.gnu.org/licenses/gpl-3.0.txt)
+
+"""
+Scan the auto-scaling configurations, groups and policies of many projects
+and regions for drift from a desired state YAML, and write a JSON report.
+
+    python tools/as_drift.py desired.yml -o drift.json
+
+The desired state lists the targets, each a project and region with the
+configurations, groups and their policies in it, with the options of
+hcs_as_configuration, hcs_as_group and hcs_as_policy:
+
+    auth:
+      auth_url: https://iam.example.com/v3
+      username: user
+      password: password
+      domain_name: domain
+    targets:
+      - project_name: region-1_project
+        region: region-1
+        configurations:
+          - configuration_name: web-config
+            flavor_id: s3.small.1
+        groups:
+          - group_name: web
+            configuration_name: web-config
+            max_instance_number: 5
+            policies:
+              - policy_name: scale-out
+                policy_type: RECURRENCE
+
+The auth options missing in the file come from the OS_* env variables. Every
+resource type is listed once per target, except the policies, which the API
+lists per group, and the targets are scanned in parallel. The listed
+resources are joined to the desired ones by name, and compared with the
+options set in the desired state only. The exit code is 0 when there is no
+drift, 2 when there is, and 1 when a target could not be scanned.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import sys
+from multiprocessing.pool import ThreadPool
+
+import yaml
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULE_UTILS = os.path.join(ROOT, "module_utils")
+
+# the max number of items in a page of the list APIs
+LIST_PAGE_SIZE = 100
+
+AUTH_ENV = {
+    "auth_url": "OS_AUTH_URL",
+    "username": "OS_USERNAME",
+    "password": "OS_PASSWORD",
+    "domain_name": "OS_DOMAIN_NAME",
+}
+
+
+def load_module_utils():
+    """
+    return hcs_utils, hwc_utils and hcs_as_utils, whose identity objects and
+    response fillers are the ones the modules compare
+    """
+    import ansible.module_utils
+
+    if MODULE_UTILS not in ansible.module_utils.__path__:
+        ansible.module_utils.__path__.append(MODULE_UTILS)
+
+    from ansible.module_utils import hcs_as_utils, hcs_utils, hwc_utils
+
+    return hcs_utils, hwc_utils, hcs_as_utils
+
+
+class Params(object):
+    """The part of AnsibleModule which the modules and Config rely on."""
+
+    _name = "as_drift"
+
+    def __init__(self, params):
+        self.params = params
+        self.check_mode = True
+
+    def fail_json(self, msg, **kwargs):
+        raise Exception(msg)
+
+
+class Scanner(object):
+
+    def __init__(self, auth):
+        self.auth = auth
+        self.hcs_utils, self.hwc_utils, self.as_utils = load_module_utils()
+
+    def scan(self, target):
+        """return the report of a target"""
+        project = target.get("project_name")
+        region = target.get("region") or (project or "").split("_")[0]
+        report = {"project_name": project, "region": region, "error": None,
+                  "resources": []}
+
+        try:
+            self._scan(target, project, region, report["resources"])
+        except Exception as ex:
+            report["error"] = str(ex)
+
+        return report
+
+    def _scan(self, target, project, region, resources):
+        config = self.hcs_utils.Config(Params({
+            "auth": dict(self.auth, project_name=project),
+            "region": region,
+            "id": None,
+            "api_stats": False,
+            "task_timeout": None,
+            "batch": None,
+        }), "as", verify=False)
+        client = config.client(region, "autoscaling", "project")
+
+        m = self.as_utils
+        configurations = self._join(
+            "as_configuration", target.get("configurations") or [],
+            "configuration_name",
+            [m.fill_configuration_resp_body(i) for i in self._list(
+                client, "scaling_configuration", "scaling_configurations")],
+            "configuration_name", "id",
+            m.build_configuration_identity_object, resources)
+
+        desired = []
+        for g in target.get("groups") or []:
+            g = dict(g)
+            name = g.pop("configuration_name", None)
+            if name and not g.get("configuration_id"):
+                c = configurations.get(name)
+                g["configuration_id"] = c["id"] if c else "missing:" + name
+            desired.append(g)
+
+        groups = self._join(
+            "as_group", desired, "group_name",
+            [m.fill_group_resp_body(i) for i in self._list(
+                client, "scaling_group", "scaling_groups")],
+            "scaling_group_name", "scaling_group_id",
+            m.build_group_identity_object, resources)
+
+        # the policies are only listed for the groups found with desired
+        # policies, as the API lists them per group
+        todo = [(g, groups[g["group_name"]]) for g in desired
+                if g.get("policies") and groups.get(g["group_name"])]
+        if not todo:
+            return
+
+        def _policies(i):
+            g, actual = i
+            url = "scaling_policy/%s/list" % actual["scaling_group_id"]
+            return [m.fill_policy_resp_body(p) for p in self._list(
+                client, url, "scaling_policies")]
+
+        pool = ThreadPool(min(len(todo), 8))
+        try:
+            listed = pool.map(_policies, todo)
+        finally:
+            pool.close()
+
+        for (g, actual), policies in zip(todo, listed):
+            group_id = actual["scaling_group_id"]
+            r = []
+            self._join(
+                "as_policy",
+                [dict(p, group_id=group_id) for p in g["policies"]],
+                "policy_name", policies, "scaling_policy_name",
+                "scaling_policy_id", m.build_policy_identity_object, r)
+            for i in r:
+                i["group_name"] = g["group_name"]
+            resources.extend(r)
+
+    def _join(self, kind, desired, name_key, actual, actual_name_key,
+              id_key, build_identity_object, resources):
+        """
+        compare the desired resources with the listed ones of the same
+        name, add their reports to resources and return the listed
+        resource of every desired name found once
+        """
+        are_different_dicts = self.hwc_utils.are_different_dicts
+
+        by_name = {}
+        for i in actual:
+            by_name.setdefault(i.get(actual_name_key), []).append(i)
+
+        found = {}
+        for d in desired:
+            name = d.get(name_key)
+            r = {"type": kind, "name": name, "id": None, "status": None}
+            resources.append(r)
+
+            v = by_name.get(name, [])
+            if not v:
+                r["status"] = "missing"
+                continue
+
+            if len(v) > 1:
+                r.update(status="duplicate", id=[i[id_key] for i in v])
+                continue
+
+            actual = found[name] = v[0]
+            r["id"] = actual[id_key]
+
+            obj = build_identity_object(dict(d, id=None))
+            if not are_different_dicts(obj, actual):
+                r["status"] = "in_sync"
+                continue
+
+            r["status"] = "drifted"
+            r["diff"] = dict(
+                (k, {"desired": v, "actual": actual.get(k)})
+                for k, v in obj.items()
+                if v is not None and are_different_dicts(
+                    {k: v}, {k: actual.get(k)}))
+
+        return found
+
+    def _list(self, client, url, key):
+        link = url + "?limit=%d&start_number={start_number}" % LIST_PAGE_SIZE
+
+        start = 0
+        while True:
+            u = link.format(start_number=start)
+            n = 0
+            try:
+                for item in client.list_items(u, key):
+                    n += 1
+                    yield item
+            except self.hwc_utils.HwcClientException as ex:
+                raise Exception("error running api(list), url: %s%s, "
+                                "error: %s" % (client.endpoint, u, ex))
+
+            # a short page is the last one
+            if n < LIST_PAGE_SIZE:
+                break
+
+            start += LIST_PAGE_SIZE
+
+
+def summarize(targets):
+    summary = {"targets": len(targets), "failed_targets": 0, "in_sync": 0,
+               "drifted": 0, "missing": 0, "duplicate": 0}
+    for t in targets:
+        if t["error"]:
+            summary["failed_targets"] += 1
+        for r in t["resources"]:
+            summary[r["status"]] += 1
+
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("desired", help="the desired state YAML")
+    parser.add_argument("-o", "--output", default="-")
+    parser.add_argument("--max-workers", type=int, default=8,
+                        help="the max number of targets scanned at a time")
+    args = parser.parse_args()
+
+    with open(args.desired) as f:
+        desired = yaml.safe_load(f) or {}
+
+    auth = dict((k, os.environ.get(v)) for k, v in AUTH_ENV.items())
+    auth.update(desired.get("auth") or {})
+    missing = sorted(k for k, v in auth.items() if not v)
+    if missing:
+        parser.error("missing auth options: %s" % ", ".join(missing))
+
+    targets = desired.get("targets") or []
+    scanner = Scanner(auth)
+    if targets:
+        pool = ThreadPool(max(1, min(args.max_workers, len(targets))))
+        try:
+            reports = pool.map(scanner.scan, targets)
+        finally:
+            pool.close()
+    else:
+        reports = []
+
+    summary = summarize(reports)
+    report = {
+        "generated_at": datetime.datetime.now(datetime.timezone.utc).strftime(
+            "%Y-%m-%dT%H:%M:%SZ"),
+        "summary": summary,
+        "targets": reports,
+    }
+
+    if args.output == "-":
+        json.dump(report, sys.stdout, indent=2, sort_keys=True)
+        sys.stdout.write("\n")
+    else:
+        with open(args.output, "w") as o:
+            json.dump(report, o, indent=2, sort_keys=True)
+
+    if summary["failed_targets"]:
+        return 1
+    if summary["drifted"] or summary["missing"] or summary["duplicate"]:
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
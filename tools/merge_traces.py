@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# Copyright (C) 2019 Huawei
+# GNU General Public License v3.0+ (see COPYING or
+# https://www.gnu.org/licenses/gpl-3.0.txt)
+
+"""
+Merge the trace files written by the modules (ANSIBLE_HCS_TRACE) into one
+play-level timeline, which can be loaded by chrome://tracing or Perfetto.
+
+    python tools/merge_traces.py /tmp/hcs-traces -o play-trace.json
+"""
+
+import argparse
+import json
+import os
+import sys
+
+
+def load_events(path):
+    with open(path) as f:
+        data = f.read().strip()
+
+    if not data:
+        return []
+
+    if data.startswith("["):
+        # the JSON array format, the closing bracket is optional
+        data = data.rstrip(",]\n ")
+        return json.loads(data + "]")
+
+    return json.loads(data).get("traceEvents", [])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("paths", nargs="+",
+                        help="trace files or directories of trace files")
+    parser.add_argument("-o", "--output", default="-")
+    args = parser.parse_args()
+
+    files = []
+    for p in args.paths:
+        if os.path.isdir(p):
+            files.extend(sorted(
+                os.path.join(p, i) for i in os.listdir(p)
+                if i.endswith(".json")))
+        else:
+            files.append(p)
+
+    events = []
+    for f in files:
+        events.extend(load_events(f))
+
+    events.sort(key=lambda i: (i.get("ts", 0), -i.get("dur", 0)))
+    trace = {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    if args.output == "-":
+        json.dump(trace, sys.stdout)
+    else:
+        with open(args.output, "w") as o:
+            json.dump(trace, o)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())